@@ -0,0 +1,218 @@
+"""App inteiro sem navegador: início a frio, latência por interação e pico de RSS.
+
+Uso:
+    python benchmarks/bench_app.py --rows 2000 100000 1000000 10000000 --output resultados.json
+    python benchmarks/bench_app.py --rows 100000 --compare resultados.json
+
+Para cada tamanho monta em ``--workdir`` um app com ``dataset_full.csv``
+escalado (como ``bench_fragments``) e roda, num processo novo, o AppTest do
+Streamlit: primeiro ``index.py`` (início a frio: imports, leitura
+do cache colunar, índices e cubos), depois cada página de ``pages/`` (a
+primeira visita e ``--reruns`` reruns sem mudança) e por fim as interações de
+``INTERACTIONS``, cada valor aplicado ``--repeat`` vezes. O cache de figuras
+é limpo antes de cada interação (``--keep-memo`` mantém), para que cada uma
+faça o trabalho de verdade. O AppTest reexecuta a página toda mesmo para
+widgets dentro de fragmentos; o ganho dos fragmentos é medido em
+``bench_fragments``.
+
+O pico de RSS é o do processo de cada tamanho (``ru_maxrss``). ``--output``
+grava um JSON com o commit, as versões e todas as medidas; ``--compare`` lê
+um JSON anterior e mostra a razão atual/anterior das medianas. ``--rebuild``
+apaga o cache em disco do app antes do início a frio (inclui a conversão e a
+validação do CSV). Com ``--synthetic`` o CSV vem de ``core.synthetic`` (ralis
+e partidas novos com as distribuições do original) em vez de cópias do
+arquivo real.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+
+import pandas as pd
+
+from common import DATASET, ROOT, csv_rows, link_app, scaled_csv, timed
+from core.synthetic import write_csv
+
+# (nome, página, tipo de widget, rótulo, valores). Os valores podem depender
+# das opções do widget (as do dataset escalado)
+INTERACTIONS = [
+    ('times', 'index.py', 'multiselect', "Selecione os times:",
+     lambda options: [options[:1], options[1:2], options]),
+    ('tipos de ataque', 'pages/Ataque.py', 'multiselect', "Tipos de ataque:",
+     lambda options: [options[:1], options[:3], options]),
+    ('intervalo de ralis', 'pages/Analise_Geral.py', 'slider', "Intervalo de rallys:",
+     lambda options: [(1, 20), (5, 30), (10, 50)]),
+    ('metric_option', 'pages/Analise_Geral.py', 'selectbox', "Selecione a métrica para análise:",
+     lambda options: ['hit_type', 'serve_type', 'num_blockers', 'win_reason']),
+]
+
+PERCENTILES = (50, 90, 99)
+
+
+def prepare_app(rows, workdir, synthetic=False):
+    csv_path = link_app(workdir)
+    if not synthetic:
+        scaled_csv(rows, csv_path)
+    elif csv_rows(csv_path) != rows:
+        write_csv(csv_path, rows, source=DATASET)
+
+
+def percentiles(samples):
+    series = pd.Series(samples) * 1000
+    return {f'p{p} (ms)': float(series.quantile(p / 100)) for p in PERCENTILES}
+
+
+def find_widget(at, kind, label):
+    for widget in getattr(at, kind):
+        if widget.label == label:
+            return widget
+    raise LookupError(f'{kind} "{label}" não encontrado')
+
+
+def timed_run(at):
+    _, elapsed = timed(at.run)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return elapsed
+
+
+def run_worker(args):
+    # Um processo por tamanho: o pico de RSS e o início a frio são só dele
+    from streamlit.testing.v1 import AppTest
+
+    from core.memo import shared_cache
+
+    logging.disable(logging.WARNING)
+    os.chdir(args.workdir)
+    at = AppTest.from_file(os.path.abspath('index.py'), default_timeout=args.timeout)
+    cold_start = timed_run(at)
+
+    pages = ['index.py'] + sorted(os.path.join('pages', p) for p in os.listdir('pages') if p.endswith('.py'))
+    measures = []
+    for page in pages:
+        at.switch_page(page)
+        first = timed_run(at)
+        reruns = [timed_run(at) for _ in range(args.reruns)]
+        measures.append({'página': page, 'interação': 'rerun', 'primeira visita (ms)': first * 1000,
+                         'amostras': len(reruns), **percentiles(reruns)})
+
+    for name, page, kind, label, make_values in INTERACTIONS:
+        at.switch_page(page)
+        timed_run(at)
+        widget = find_widget(at, kind, label)
+        values = make_values(list(getattr(widget, 'options', [])))
+        samples = []
+        for _ in range(args.repeat):
+            for value in values:
+                if not args.keep_memo:
+                    shared_cache().clear()
+                find_widget(at, kind, label).set_value(value)
+                samples.append(timed_run(at))
+        measures.append({'página': page, 'interação': name, 'amostras': len(samples), **percentiles(samples)})
+
+    return {
+        'início a frio (s)': cold_start,
+        'pico RSS (MB)': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'medidas': measures,
+    }
+
+
+def run_size(rows, args):
+    workdir = os.path.join(args.workdir, f'linhas_{rows}' + ('_sintetico' if args.synthetic else ''))
+    prepare_app(rows, workdir, args.synthetic)
+    if args.rebuild:
+        shutil.rmtree(os.path.join(workdir, '.cache'), ignore_errors=True)
+    command = [sys.executable, os.path.abspath(__file__), '--worker', '--workdir', workdir,
+               '--reruns', str(args.reruns), '--repeat', str(args.repeat), '--timeout', str(args.timeout)]
+    if args.keep_memo:
+        command.append('--keep-memo')
+    worker = subprocess.run(command, capture_output=True, text=True)
+    if worker.returncode != 0:
+        raise RuntimeError(f'{rows} linhas: {worker.stderr.strip()[-2000:]}')
+    return {'linhas': rows, **json.loads(worker.stdout.splitlines()[-1])}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def tables(runs):
+    summary = pd.DataFrame([{k: v for k, v in run.items() if k != 'medidas'} for run in runs])
+    details = pd.DataFrame([{'linhas': run['linhas'], **m} for run in runs for m in run['medidas']])
+    return summary, details
+
+
+def compare(runs, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    keys = ['linhas', 'página', 'interação']
+    summary_now, now = tables(runs)
+    summary_before, before = tables(previous['execucoes'])
+    totals = summary_now.merge(summary_before, on='linhas', suffixes=('', ' anterior'))
+    for column in ('início a frio (s)', 'pico RSS (MB)'):
+        totals[f'razão {column.split(" (")[0]}'] = totals[column] / totals[f'{column} anterior']
+    merged = now.merge(before, on=keys, suffixes=('', ' anterior'))
+    merged['razão p50'] = merged['p50 (ms)'] / merged['p50 (ms) anterior']
+    merged['razão p90'] = merged['p90 (ms)'] / merged['p90 (ms) anterior']
+    print(f"\nComparação com {previous.get('commit')} (razão > 1: pior agora)")
+    print(totals.to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+    print()
+    print(merged[keys + ['p50 (ms) anterior', 'p50 (ms)', 'razão p50', 'razão p90']]
+          .to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[2_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--workdir', default=os.path.join(ROOT, '.cache', 'bench_app'))
+    parser.add_argument('--reruns', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=1800)
+    parser.add_argument('--keep-memo', action='store_true')
+    parser.add_argument('--rebuild', action='store_true')
+    parser.add_argument('--synthetic', action='store_true')
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args), ensure_ascii=False))
+        return
+
+    runs = [run_size(rows, args) for rows in args.rows]
+    summary, details = tables(runs)
+    print(summary.to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+    print()
+    print(details.to_string(index=False, float_format=lambda v: f'{v:.1f}', na_rep='-'))
+
+    if args.output:
+        import streamlit
+
+        result = {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'streamlit': streamlit.__version__,
+            'pandas': pd.__version__,
+            'parametros': {'reruns': args.reruns, 'repeat': args.repeat, 'keep_memo': args.keep_memo,
+                           'rebuild': args.rebuild, 'synthetic': args.synthetic},
+            'execucoes': runs,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        compare(runs, args.compare)
+
+
+if __name__ == '__main__':
+    main()
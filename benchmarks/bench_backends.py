@@ -0,0 +1,102 @@
+"""Backends das agregações: cubo em memória (pandas) x SQLite com pushdown.
+
+Uso:
+    python benchmarks/bench_backends.py --rows 1000000 50000000
+
+Para cada tamanho monta o banco SQLite em blocos (sem ter o dataset inteiro
+em memória) e mede a montagem, o tamanho em disco e o tempo médio das
+consultas típicas das páginas: contagem filtrada, tabela por tipo de ataque,
+somas das métricas por time, um delta do ``IncrementalSum`` e a contagem de
+ralis complexos da página inicial, que lê uma coluna fora do cubo (no SQLite,
+uma varredura de ``acoes``). O backend pandas (dataset em memória +
+``CountCube`` + ``FilterIndex``) só roda até ``--pandas-max-rows`` linhas;
+acima disso suas colunas ficam vazias.
+"""
+
+import argparse
+import itertools
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from common import scaled_dataset, timed
+from core.cube import CountCube, IncrementalSum
+from core.filters import FilterIndex
+from core.metrics import CUBE_AXES
+from core.sqlstore import SqlCube, write_database
+
+CHUNK_ROWS = 200_000
+
+
+def scaled_chunks(rows, chunk_rows=CHUNK_ROWS):
+    # Mesmo conteúdo de ``scaled_dataset``, em blocos
+    chunk = scaled_dataset(chunk_rows)
+    for start in range(0, rows, chunk_rows):
+        yield chunk.iloc[:min(chunk_rows, rows - start)]
+
+
+def queries(cube):
+    hit_types = [v for v in cube.labels['hit_type_pt'] if v is not None]
+    teams = [v for v in cube.labels['team_pt'] if v is not None]
+    return {
+        'contagem': lambda: cube.count({'team_pt': teams[:1]}, {'win_reason': 'kill'}),
+        'tabela': lambda: cube.table('hit_type_pt', {'team_pt': teams[:1], 'num_blockers': [1, 2]}),
+        'métricas': lambda: cube.reduce(['team_pt'] + CUBE_AXES, {'hit_type_pt': hit_types[:3]}),
+    }
+
+
+def delta(cube):
+    # Marca e desmarca um tipo de ataque: cada chamada é um delta de um valor
+    hit_types = [v for v in cube.labels['hit_type_pt'] if v is not None]
+    aggregate = IncrementalSum(cube, ['team_pt'] + CUBE_AXES)
+    selections = itertools.cycle([{'hit_type_pt': hit_types[:4]}, {'hit_type_pt': hit_types[:3]}])
+    aggregate.update(next(selections))
+    return lambda: aggregate.update(next(selections))
+
+
+def complex_rallies(cube, data=None, index=None):
+    # Como a página inicial: ações do primeiro time com ``round`` > 2
+    selection = {'team_pt': [v for v in cube.labels['team_pt'] if v is not None][:1]}
+    if data is None:
+        return lambda: cube.count_rows('"round" > 2', selection)
+    return lambda: int((index.select(data, selection).frame()['round'] > 2).sum())
+
+
+def pandas_backend(rows):
+    data = scaled_dataset(rows)
+    return data, CountCube(data), FilterIndex(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 50_000_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--pandas-max-rows', type=int, default=20_000_000)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            db_path = os.path.join(tmp, f'bench-{rows}.sqlite')
+            sql_cube, sql_build = timed(lambda: SqlCube(write_database(scaled_chunks(rows), db_path)))
+            backends = [('sqlite', sql_cube, sql_build, complex_rallies(sql_cube))]
+
+            if rows <= args.pandas_max_rows:
+                (data, cube, index), build = timed(lambda: pandas_backend(rows))
+                backends.append(('pandas', cube, build, complex_rallies(cube, data, index)))
+
+            for name, cube, build, complex_query in backends:
+                row = {'linhas': rows, 'backend': name, 'montagem (s)': build}
+                row['disco (MB)'] = os.path.getsize(db_path) / 2**20 if name == 'sqlite' else np.nan
+                for query, compute in {**queries(cube), 'delta': delta(cube), 'complexos': complex_query}.items():
+                    row[f'{query} (ms)'] = timed(compute, args.repeat)[1] * 1000
+                results.append(row)
+            os.remove(db_path)
+
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+
+
+if __name__ == '__main__':
+    main()
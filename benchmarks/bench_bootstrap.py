@@ -0,0 +1,72 @@
+"""Intervalos de confiança por bootstrap: sorteio multinomial de perfis x reamostragem de linhas.
+
+Uso:
+    python benchmarks/bench_bootstrap.py --rows 100000 1000000 --resamples 1000
+
+Para cada tamanho mede a eficiência de ataque por tipo com intervalo de 95%:
+a montagem dos perfis de ralis, as réplicas no processo principal e no pool
+de processos, e a reamostragem ingênua de ralis refazendo ``compute_metrics``
+em cada réplica (só com ``--naive`` réplicas, extrapolado para o total).
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from common import scaled_dataset, timed
+from core.bootstrap import bootstrap_replicates, rally_profiles, ESTIMATORS
+from core.metrics import compute_metrics
+from core.rallies import RallyIndex
+
+
+def naive_replicate(df, run_of_row, rng):
+    # Sorteia ralis com reposição e refaz a agregação sobre as linhas repetidas
+    starts = np.flatnonzero(np.diff(run_of_row, prepend=-1))
+    stops = np.append(starts[1:], len(run_of_row))
+    chosen = rng.integers(0, len(starts), size=len(starts))
+    lengths = stops[chosen] - starts[chosen]
+    rows = np.repeat(starts[chosen] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    return compute_metrics(df.take(rows), 'hit_type_pt')['efficiency']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--resamples', type=int, default=1000)
+    parser.add_argument('--naive', type=int, default=20, help='réplicas medidas na reamostragem de linhas')
+    args = parser.parse_args()
+
+    estimator = 'efficiency'
+    results = []
+    for rows in args.rows:
+        df = scaled_dataset(rows)
+        run_of_row = RallyIndex(df).run_of_row
+
+        (profiles, freq, _), build = timed(
+            lambda: rally_profiles(df, 'hit_type_pt', ESTIMATORS[estimator][0], run_of_row))
+        _, serial = timed(lambda: bootstrap_replicates(profiles, freq, estimator, args.resamples, parallel=False))
+
+        # Primeira chamada paga a criação do pool; mede a segunda
+        bootstrap_replicates(profiles, freq, estimator, args.resamples, parallel=True)
+        _, parallel = timed(lambda: bootstrap_replicates(profiles, freq, estimator, args.resamples, parallel=True))
+
+        rng = np.random.default_rng(0)
+        _, naive = timed(lambda: naive_replicate(df, run_of_row, rng), repeat=args.naive)
+        naive *= args.resamples
+
+        results.append({
+            'linhas': rows,
+            'ralis': int(freq.sum()),
+            'perfis': len(profiles),
+            'perfis (s)': build,
+            'réplicas (s)': serial,
+            'réplicas pool (s)': parallel,
+            'linhas reamostradas (s)': naive,
+        })
+
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Payload das séries por rali: figura Plotly direta x ``slim_figure``.
+
+Uso:
+    python benchmarks/bench_charts.py --points 10000 100000 1000000
+
+Para cada número de ralis monta o gráfico "Kills e Erros por Rally" (duas
+linhas, um ponto por rali) e mede o tamanho do JSON enviado ao navegador e o
+tempo de montagem + serialização, sem e com redução LTTB, typed arrays
+compactos e WebGL.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from common import timed
+from core.charts import slim_figure
+
+
+def rally_series(points, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'rally': np.arange(1, points + 1),
+        'Kills': rng.poisson(2.0, points).astype('float64'),
+        'Erros': rng.poisson(0.8, points).astype('float64'),
+    })
+
+
+def figure(data):
+    return px.line(data, x='rally', y=['Kills', 'Erros'], title="Kills e Erros por Rally",
+                   labels={'value': 'Quantidade', 'variable': 'Tipo'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    results = []
+    for points in args.points:
+        data = rally_series(points)
+        for name, build in [('direto', figure), ('slim', lambda d: slim_figure(figure(d)))]:
+            payload, elapsed = timed(lambda: len(build(data).to_json().encode()))
+            results.append({
+                'pontos': points,
+                'figura': name,
+                'payload (KB)': payload / 1024,
+                'montagem + JSON (ms)': elapsed * 1000,
+            })
+
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda v: f'{v:.1f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Matrizes de transição entre zonas: crosstab do pandas vs cubo de fluxos.
+
+Uso:
+    python benchmarks/bench_flows.py --rows 1000000 10000000
+
+Para cada tamanho mede a montagem do ``FlowCube`` (uma vez por versão dos
+dados) e, por seleção de filtros, o caminho ingênuo (filtrar as linhas e
+``pd.crosstab`` para cada par de etapas) contra ``FlowCube.matrices``,
+conferindo que as contagens são iguais.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from common import scaled_dataset, timed
+from core.filters import FilterIndex
+from core.flows import FlowCube, STAGE_PAIRS, pair_label
+
+SELECTIONS = [
+    {'team_pt': [], 'hit_type_pt': []},
+    {'team_pt': ['Time A'], 'hit_type_pt': []},
+    {'team_pt': ['Time B'], 'hit_type_pt': ['Ataque Forte', 'Largada']},
+]
+
+
+def crosstab_matrices(df, index, selection):
+    rows = index.rows(selection)
+    rows = np.arange(len(df)) if rows is None else rows
+    rally = df['rally'].to_numpy()
+    matrices = {}
+    for source, target, next_action in STAGE_PAIRS:
+        origin = destination = rows
+        if next_action:
+            origin = rows[rows + 1 < len(df)]
+            origin = origin[rally[origin + 1] == rally[origin]]
+            destination = origin + 1
+        matrices[pair_label(source, target, next_action)] = pd.crosstab(
+            df[source].take(origin).to_numpy(dtype='float64', na_value=0),
+            df[target].take(destination).to_numpy(dtype='float64', na_value=0),
+        )
+    return matrices
+
+
+def same_counts(table, matrix):
+    rows, cols = table.index.astype(int), table.columns.astype(int)
+    return matrix.sum() == table.to_numpy().sum() and (matrix[np.ix_(rows, cols)] == table.to_numpy()).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        df = scaled_dataset(rows)
+        index = FilterIndex(df)
+        flows, build = timed(lambda: FlowCube(df))
+        for selection in SELECTIONS:
+            old, old_time = timed(lambda: crosstab_matrices(df, index, selection))
+            new, new_time = timed(lambda: flows.matrices(selection))
+            results.append({
+                'linhas': rows,
+                'seleção': ' / '.join(', '.join(v) or 'todos' for v in selection.values()),
+                'montagem (s)': build,
+                'crosstab (ms)': old_time * 1000,
+                'cubo (ms)': new_time * 1000,
+                'ganho': old_time / new_time,
+                'iguais': all(same_counts(old[label], new[label]) for label in old),
+            })
+
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+
+
+if __name__ == '__main__':
+    main()
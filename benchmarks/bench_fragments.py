@@ -0,0 +1,136 @@
+"""Latência por interação: rerun da página inteira vs rerun só do fragmento.
+
+Uso:
+    python benchmarks/bench_fragments.py --rows 1000000
+
+Monta em ``--workdir`` um app com ``dataset_full.csv`` escalado para
+``--rows`` linhas e, para cada widget que agora vive num fragmento, mede o
+tempo de uma interação como rerun da página toda (comportamento anterior) e
+como rerun apenas do fragmento. O cache de figuras é limpo antes de cada
+medida, para que os dois modos façam o trabalho de verdade.
+
+O rerun de fragmento é disparado pelo AppTest com ``fragment_id_queue``,
+recurso interno do Streamlit (testado com a versão 1.65). Como isso pode
+mudar sem aviso, cada rerun medido confere o escopo: no de fragmento o topo
+da página (``sync_session``, fora de qualquer fragmento) não pode rodar, e no
+completo precisa rodar; senão o benchmark para com erro em vez de medir a
+coisa errada.
+"""
+
+import argparse
+import functools
+import logging
+import os
+import statistics
+
+import pandas as pd
+
+from common import ROOT, link_app, scaled_csv, timed
+import core.live
+from core.memo import shared_cache
+
+TESTED_STREAMLIT = '1.65'
+
+# (página, fragmento, tipo de widget, posição, valores testados)
+INTERACTIONS = [
+    ('pages/Saque.py', 'secao_eficacia', 'slider', 0, [5, 20, 35, 50, 65, 80]),
+    ('pages/Ataque.py', 'secao_preferencias', 'selectbox', 0, ['Time B', 'Time A'] * 3),
+    ('pages/Defesa.py', 'secao_eficiencia', 'slider', 0, [2, 8, 14, 20, 26, 32]),
+    ('pages/Defesa.py', 'secao_evolucao', 'selectbox', 0, ['block_touch', 'num_blockers'] * 3),
+    ('pages/Analise_Geral.py', 'secao_mapa_calor', 'selectbox', 0, ['hit_type', 'serve_type', 'num_blockers'] * 2),
+    ('pages/Analise_Geral.py', 'secao_evolucao', 'slider', 0, [(1, 20), (5, 30), (10, 40), (2, 12), (3, 33), (1, 50)]),
+]
+
+
+def prepare_app(rows, workdir):
+    scaled_csv(rows, link_app(workdir))
+
+
+def fragment_id(at, name):
+    # O armazenamento guarda a função embrulhada; o nome vem do closure
+    for fid, wrapped in at._fragment_storage._fragments.items():
+        cells = wrapped.__closure__ or []
+        if any(getattr(cell.cell_contents, '__name__', None) == name for cell in cells):
+            return fid
+    raise LookupError(f'Fragmento {name} não registrado')
+
+
+class PageRuns:
+    """Conta as execuções do topo das páginas (``sync_session`` roda fora dos fragmentos)."""
+
+    def __init__(self):
+        self.count = 0
+        original = core.live.sync_session
+
+        def counted():
+            self.count += 1
+            return original()
+
+        # As páginas importam ``sync_session`` a cada execução: o atributo do módulo basta
+        core.live.sync_session = counted
+
+
+def timed_run(at, page_runs, fragment=None):
+    import streamlit
+    from streamlit.runtime.scriptrunner import RerunData
+    import streamlit.testing.v1.local_script_runner as runner
+
+    shared_cache().clear()
+    if fragment is not None:
+        runner.RerunData = functools.partial(RerunData, fragment_id_queue=[fragment], is_fragment_scoped_rerun=True)
+    before = page_runs.count
+    try:
+        _, elapsed = timed(at.run)
+    finally:
+        runner.RerunData = RerunData
+    page_ran = page_runs.count > before
+    if fragment is not None and page_ran or fragment is None and not page_ran or at.exception:
+        raise RuntimeError(
+            f"Rerun {'de fragmento' if fragment else 'completo'} não teve o escopo esperado "
+            f"(Streamlit {streamlit.__version__}; benchmark testado com {TESTED_STREAMLIT})"
+        )
+    return elapsed
+
+
+def measure(page, name, kind, position, values, page_runs):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.abspath('index.py'), default_timeout=600)
+    at.run()
+    at.switch_page(page)
+    at.run()
+    fid = fragment_id(at, name)
+    full, partial = [], []
+    for i, value in enumerate(values):
+        getattr(at, kind)[position].set_value(value)
+        if i % 2 == 0:
+            full.append(timed_run(at, page_runs))
+        else:
+            partial.append(timed_run(at, page_runs, fid))
+            at.run()  # rerun completo para a árvore do AppTest voltar a ter todos os widgets
+    return {
+        'página': os.path.basename(page),
+        'widget': name,
+        'página inteira (s)': statistics.median(full),
+        'fragmento (s)': statistics.median(partial),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--workdir', default=os.path.join(ROOT, '.cache', 'bench_fragments'))
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    prepare_app(args.rows, args.workdir)
+    os.chdir(args.workdir)
+    page_runs = PageRuns()
+    results = pd.DataFrame([measure(*interaction, page_runs) for interaction in INTERACTIONS])
+    results['ganho'] = results['página inteira (s)'] / results['fragmento (s)']
+    print(f'{args.rows:,} linhas')
+    print(results.to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+
+
+if __name__ == '__main__':
+    main()
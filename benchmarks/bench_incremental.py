@@ -0,0 +1,77 @@
+"""Agregados por time ao marcar/desmarcar um valor de filtro: recálculo x delta.
+
+Uso:
+    python benchmarks/bench_incremental.py --rows 100000 1000000 --toggles 200
+
+Para cada tamanho simula uma sequência de cliques (um valor de time, tipo de
+ataque, tipo de saque ou bloqueadores marcado ou desmarcado por vez) e mede o
+tempo médio por clique das métricas por time: ``compute_metrics`` sobre as
+linhas filtradas, soma completa do cubo e ``IncrementalSum`` aplicando deltas.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from common import scaled_dataset, timed
+from core.cube import CountCube, IncrementalSum
+from core.filters import FilterIndex
+from core.metrics import CUBE_AXES, compute_metrics, cube_metrics
+
+FILTER_COLUMNS = ['team_pt', 'hit_type_pt', 'serve_type_pt', 'num_blockers']
+
+
+def toggles(cube, n, seed=0):
+    # Seleções sucessivas, cada uma diferindo da anterior em um único valor
+    rng = np.random.default_rng(seed)
+    options = {col: [v for v in cube.labels[col] if v is not None] for col in FILTER_COLUMNS}
+    selection = {col: list(values) for col, values in options.items()}
+    result = []
+    for _ in range(n):
+        col = FILTER_COLUMNS[rng.integers(len(FILTER_COLUMNS))]
+        value = options[col][rng.integers(len(options[col]))]
+        values = [v for v in selection[col] if v != value]
+        if len(values) == len(selection[col]):
+            values.append(value)
+        selection = {**selection, col: values}
+        result.append(selection)
+    return result
+
+
+def per_selection(selections, compute):
+    # Milissegundos por seleção, em sequência (os deltas dependem da anterior)
+    _, elapsed = timed(lambda: [compute(selection) for selection in selections])
+    return elapsed / len(selections) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--toggles', type=int, default=200)
+    args = parser.parse_args()
+
+    dims = ['team_pt'] + CUBE_AXES
+    results = []
+    for rows in args.rows:
+        df = scaled_dataset(rows)
+        index = FilterIndex(df)
+        cube = CountCube(df)
+        selections = toggles(cube, args.toggles)
+
+        aggregate = IncrementalSum(cube, dims)
+        aggregate.update(selections[0])
+        results.append({
+            'linhas': rows,
+            'linhas filtradas (ms)': per_selection(selections, lambda s: compute_metrics(index.filter(df, s), 'team_pt')),
+            'cubo completo (ms)': per_selection(selections, lambda s: cube_metrics(cube.reduce(dims, s), cube.labels, 'team_pt')),
+            'delta (ms)': per_selection(selections, lambda s: cube_metrics(aggregate.update(s), cube.labels, 'team_pt')),
+            'deltas': aggregate.deltas,
+            'recálculos': aggregate.recomputes,
+        })
+
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Custo da instrumentação por bloco: desligada, ligada e o trabalho medido.
+
+Uso:
+    python benchmarks/bench_instrument.py --blocks 100000 --rows 1000000
+
+Mede o custo de abrir e fechar um bloco vazio com a instrumentação desligada
+(objeto nulo) e ligada (relógio, pilha e ``tracemalloc``, que liga e desliga
+com o bloco), e compara com um bloco típico de preparo de dados: a seleção
+dos times pelo índice de filtros no dataset repetido até ``--rows`` linhas.
+Os casos desligados rodam depois de um caso ligado, sem desligar o
+``tracemalloc`` à mão: se ele continuar ativo fora dos blocos, o benchmark
+falha. Roda fora do Streamlit (a session state é um dicionário local).
+"""
+
+import argparse
+import logging
+import time
+import tracemalloc
+
+import pandas as pd
+import streamlit as st
+
+from common import scaled_dataset
+from core.filters import FilterIndex
+from core.instrument import STATE_KEY, begin_run, block
+
+
+def per_block(blocks, work):
+    state = st.session_state.get(STATE_KEY)
+    start = time.perf_counter()
+    for i in range(blocks):
+        with block('bench'):
+            work()
+        # Os registros de um rerun real são poucos; a lista não deve crescer
+        if state is not None and i % 1000 == 999:
+            state['records'].clear()
+    return (time.perf_counter() - start) / blocks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=100_000)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+    # Fora de ``streamlit run`` a session state avisa a cada acesso
+    logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').setLevel(logging.ERROR)
+
+    df = scaled_dataset(args.rows)
+    index = FilterIndex(df)
+    selections = {'team_pt': index.options('team_pt')[:1]}
+
+    def select():
+        index.select(df, selections)
+
+    results = []
+    for label, enabled, work, blocks in [
+        ('vazio', True, lambda: None, args.blocks),
+        ('vazio', False, lambda: None, args.blocks),
+        ('seleção', True, select, 200),
+        ('seleção', False, select, 200),
+    ]:
+        st.session_state['instrumentacao'] = enabled
+        begin_run('bench')
+        results.append({
+            'bloco': label,
+            'instrumentação': 'ligada' if enabled else 'desligada',
+            'µs por bloco': per_block(blocks, work),
+        })
+        if tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc continua ativo fora dos blocos instrumentados")
+
+    table = pd.DataFrame(results)
+    desligada = table['µs por bloco'].where(table['instrumentação'] == 'desligada').bfill()
+    table['acréscimo (µs)'] = table['µs por bloco'] - desligada
+    print(table.to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Montagem e consultas do modelo de Markov do rali.
+
+Uso:
+    python benchmarks/bench_markov.py --rows 100000 1000000
+
+Para cada tamanho mede a montagem completa do ``RallyMarkov`` (contagens e
+sistema linear), a extensão com um bloco de ações novas (modo ao vivo) e o
+tempo médio de uma consulta de probabilidade por estado.
+"""
+
+import argparse
+
+import pandas as pd
+
+from common import scaled_dataset, timed
+from core.markov import RallyMarkov
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--chunk', type=int, default=500, help='ações novas por extensão')
+    parser.add_argument('--lookups', type=int, default=10_000)
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        df = scaled_dataset(rows)
+        model, build = timed(lambda: RallyMarkov(df))
+
+        base = RallyMarkov(df.iloc[:rows - args.chunk])
+        _, extend = timed(lambda: base.extended(df, rows - args.chunk))
+
+        states = model.table()[['team_pt', 'phase', 'hit_type_pt', 'num_blockers']].to_numpy().tolist()
+        _, lookups = timed(lambda: [model.probability(*states[i % len(states)]) for i in range(args.lookups)])
+        lookup = lookups / args.lookups
+
+        results.append({
+            'linhas': rows,
+            'estados': len(model.states),
+            'montagem (s)': build,
+            f'extensão +{args.chunk} (ms)': extend * 1000,
+            'consulta (µs)': lookup * 1e6,
+        })
+
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Índice de partidas: detecção, métricas por partida (série x pool) e fatias.
+
+Uso:
+    python benchmarks/bench_matches.py --rows 1000000 10000000
+
+Para cada tamanho (o dataset repetido: 9 partidas a cada cópia) mede a
+detecção das partidas pelas quedas de ``rally``, as métricas por (partida,
+time) em série e no pool de processos, a fatia de uma partida com o índice
+de filtros e o cubo montados só sobre ela, e a tabela de comparação entre
+todas as partidas.
+"""
+
+import argparse
+
+import pandas as pd
+
+from common import scaled_dataset, timed
+from core.cube import CountCube
+from core.filters import FilterIndex
+from core.matches import MatchIndex, match_ids, match_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        df = scaled_dataset(rows)
+        rally = df['rally'].to_numpy()
+        _, detection = timed(lambda: match_ids(rally))
+        index, serial = timed(lambda: MatchIndex(df, parallel=False))
+        # Aquece o pool antes de medir (a primeira chamada inicia os processos)
+        match_metrics(df, index.starts[:2], index.stops[:2], parallel=True, chunk_rows=1)
+        _, parallel = timed(lambda: match_metrics(df, index.starts, index.stops, parallel=True))
+
+        def slice_match():
+            start, stop = index.bounds(len(index) // 2)
+            data = df.iloc[start:stop].reset_index(drop=True)
+            return FilterIndex(data), CountCube(data)
+
+        _, slicing = timed(slice_match)
+        _, comparison = timed(lambda: index.team_metrics().pivot(index='match', columns='team_pt', values='efficiency'))
+        results.append({
+            'linhas': rows,
+            'partidas': len(index),
+            'detecção (ms)': detection * 1000,
+            'métricas série (ms)': serial * 1000,
+            'métricas pool (ms)': parallel * 1000,
+            'fatia de uma partida (ms)': slicing * 1000,
+            'comparação (ms)': comparison * 1000,
+        })
+
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda v: f'{v:.1f}'))
+
+
+if __name__ == '__main__':
+    main()
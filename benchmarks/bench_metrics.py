@@ -0,0 +1,79 @@
+"""Benchmark do motor de métricas contra o código antigo das páginas.
+
+Uso:
+    python benchmarks/bench_metrics.py --rows 1000000
+
+Compara o laço por tipo de ataque e os ``groupby(...).agg`` com lambdas
+(Ataque, Saque e Defesa) com ``compute_metrics``.
+"""
+
+import argparse
+
+import pandas as pd
+
+from common import scaled_dataset, timed
+from core.metrics import compute_metrics
+
+
+def old_attack_loop(df):
+    attack_stats = []
+    for attack_type in df['hit_type_pt'].unique():
+        subset = df[df['hit_type_pt'] == attack_type]
+        kills = len(subset[subset['win_reason'] == 'kill'])
+        errors = len(subset[subset['lose_reason'] == 'hit_error'])
+        total = len(subset)
+        attack_stats.append({'Tipo': attack_type, 'Eficiência': (kills - errors) / total * 100, 'Total': total})
+    return pd.DataFrame(attack_stats)
+
+
+def old_rally_agg(df):
+    return df.groupby('rally').agg({
+        'win_reason': lambda x: (x == 'kill').sum(),
+        'lose_reason': lambda x: (x == 'hit_error').sum()
+    })
+
+
+def old_serve_agg(df):
+    return df.groupby('team_pt', observed=True).agg({
+        'win_reason': lambda x: (x == 'ace').sum(),
+        'lose_reason': lambda x: (x == 'serve_error').sum()
+    })
+
+
+def old_defense_agg(df):
+    return df.groupby('team_pt', observed=True).agg({
+        'win_reason': lambda x: (x == 'blocked').sum(),
+        'num_blockers': 'count'
+    })
+
+
+CASES = [
+    ('Ataque: eficiência por tipo', old_attack_loop, lambda df: compute_metrics(df, 'hit_type_pt')),
+    ('Ataque: kills/erros por rally', old_rally_agg, lambda df: compute_metrics(df, 'rally')),
+    ('Saque: aces/erros por time', old_serve_agg, lambda df: compute_metrics(df, 'team_pt')),
+    ('Defesa: bloqueios por time', old_defense_agg, lambda df: compute_metrics(df, 'team_pt')),
+]
+
+
+def best_of(fn, df, repeat):
+    return min(timed(lambda: fn(df))[1] for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = scaled_dataset(args.rows)
+    results = []
+    for name, old, new in CASES:
+        t_old = best_of(old, df, args.repeat)
+        t_new = best_of(new, df, args.repeat)
+        results.append({'caso': name, 'antigo (s)': t_old, 'motor (s)': t_new, 'ganho': t_old / t_new})
+    print(f'{len(df):,} linhas')
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Correlações e Fatores de Sucesso: pandas sobre as linhas vs estatísticas suficientes.
+
+Uso:
+    python benchmarks/bench_moments.py --rows 10000 100000 1000000
+
+Para cada tamanho mede o que a Análise Geral fazia por seleção de times
+(filtrar, ``corr()`` nas colunas numéricas e as médias dos Fatores de
+Sucesso) contra ``MomentCube.corr``/``MomentCube.mean``, e confere a maior
+diferença entre as duas matrizes.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from common import scaled_dataset, timed
+from core.filters import FilterIndex
+from core.moments import MomentCube
+
+SELECTIONS = [{'team_pt': []}, {'team_pt': ['Time A']}, {'team_pt': ['Time B']}]
+FACTORS = ['num_blockers', 'round']
+
+
+def old_queries(df, index, selection):
+    filtered = index.filter(df, selection)
+    corr = filtered.select_dtypes(include=['number']).corr()
+    kills, errors = filtered[filtered['win_reason'] == 'kill'], filtered[filtered['lose_reason'] == 'hit_error']
+    return corr, [kills[col].mean() - errors[col].mean() for col in FACTORS]
+
+
+def new_queries(moments, selection):
+    corr = moments.corr(selection)
+    return corr, [
+        moments.mean(col, selection, {'win_reason': 'kill'}) - moments.mean(col, selection, {'lose_reason': 'hit_error'})
+        for col in FACTORS
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        df = scaled_dataset(rows)
+        index = FilterIndex(df)
+        moments, build = timed(lambda: MomentCube(df))
+        for selection in SELECTIONS:
+            (old_corr, old_factors), old = timed(lambda: old_queries(df, index, selection), repeat=5)
+            (new_corr, new_factors), new = timed(lambda: new_queries(moments, selection), repeat=5)
+            results.append({
+                'linhas': rows,
+                'times': ', '.join(selection['team_pt']) or 'todos',
+                'montagem (s)': build,
+                'pandas (ms)': old * 1000,
+                'estatísticas (ms)': new * 1000,
+                'ganho': old / new,
+                'maior diferença': max(
+                    np.nanmax(np.abs(old_corr.to_numpy() - new_corr.to_numpy())),
+                    np.nanmax(np.abs(np.subtract(old_factors, new_factors))),
+                ),
+            })
+
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+
+
+if __name__ == '__main__':
+    main()
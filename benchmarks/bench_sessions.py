@@ -0,0 +1,71 @@
+"""Memória por sessão: cópia filtrada (``df_filtrado``) vs seleção compacta.
+
+Uso:
+    python benchmarks/bench_sessions.py --rows 10000 100000 1000000 --sessions 50
+
+Para cada tamanho de dataset, simula ``--sessions`` sessões com filtros
+ativos e mede com ``tracemalloc`` os bytes retidos por sessão: antes cada
+sessão guardava um DataFrame filtrado; agora guarda uma ``RowSelection``
+(referência ao dataset compartilhado + bitmap de ``n/8`` bytes, ou nenhum
+bitmap próprio quando a seleção é um único valor já indexado).
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+import pandas as pd
+
+from common import scaled_dataset
+from core.filters import FilterIndex
+
+# Filtros que cada sessão simulada mantém ativos (alternados entre sessões)
+SELECTIONS = {
+    'um time': [{'team_pt': ['Time A']}, {'team_pt': ['Time B']}],
+    'time + ataque': [
+        {'team_pt': ['Time A'], 'hit_type_pt': ['Ataque Forte']},
+        {'team_pt': ['Time B'], 'hit_type_pt': ['Ataque Forte', 'Largada']},
+    ],
+}
+
+
+def retained_per_session(make_state, selections, sessions):
+    gc.collect()
+    tracemalloc.start()
+    states = [make_state(selections[i % len(selections)]) for i in range(sessions)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del states
+    return current / sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--sessions', type=int, default=50)
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        df = scaled_dataset(rows)
+        index = FilterIndex(df)
+        shared = df.memory_usage(deep=True).sum()
+        for name, selections in SELECTIONS.items():
+            before = retained_per_session(lambda s: index.filter(df, s), selections, args.sessions)
+            after = retained_per_session(lambda s: index.select(df, s), selections, args.sessions)
+            results.append({
+                'linhas': rows,
+                'filtros': name,
+                'dataset compartilhado (MB)': shared / 2**20,
+                'antes por sessão (KB)': before / 2**10,
+                'agora por sessão (KB)': after / 2**10,
+                'antes total (MB)': before * args.sessions / 2**20,
+                'agora total (MB)': after * args.sessions / 2**20,
+            })
+
+    print(f'{args.sessions} sessões simuladas por medida')
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+
+
+if __name__ == '__main__':
+    main()
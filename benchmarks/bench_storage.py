@@ -0,0 +1,51 @@
+"""Benchmark de carga: CSV puro vs cache colunar (frio e quente).
+
+Uso:
+    python benchmarks/bench_storage.py --sizes 2000 1000000 10000000
+
+Os CSVs escalados são gerados repetindo ``dataset_full.csv`` e ficam em
+``--workdir`` para reaproveitamento entre execuções.
+"""
+
+import argparse
+import os
+import shutil
+
+import pandas as pd
+
+from common import ROOT, scaled_csv, timed
+from core.storage import load_columnar
+
+
+def run(rows, workdir):
+    csv_path = scaled_csv(rows, os.path.join(workdir, f'dataset_{rows}.csv'))
+    cache_dir = os.path.join(workdir, f'cache_{rows}')
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    _, t_csv = timed(lambda: pd.read_csv(csv_path))
+    _, t_cold = timed(lambda: load_columnar(csv_path, cache_dir))
+    df, t_warm = timed(lambda: load_columnar(csv_path, cache_dir))
+    _, t_scan = timed(lambda: [df[col].value_counts() for col in ('team', 'hit_type', 'num_blockers')])
+    return {
+        'linhas': rows,
+        'read_csv (s)': t_csv,
+        'frio (s)': t_cold,
+        'quente (s)': t_warm,
+        'varredura quente (s)': t_scan,
+        'memória (MB)': df.memory_usage(deep=True).sum() / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2_000, 1_000_000, 10_000_000])
+    parser.add_argument('--workdir', default=os.path.join(ROOT, '.cache', 'bench'))
+    args = parser.parse_args()
+    os.makedirs(args.workdir, exist_ok=True)
+
+    results = pd.DataFrame([run(rows, args.workdir) for rows in args.sizes])
+    print(results.to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Validação na carga: detecção do mapeamento de colunas, regras e quarentena.
+
+Uso:
+    python benchmarks/bench_validation.py --rows 1000000 10000000
+
+Para cada tamanho (o CSV bruto repetido, com as colunas deslocadas e as
+linhas inválidas do original) mede a detecção do mapeamento, as máscaras de
+todas as regras e ``validate`` completo (mapeamento, regras e separação das
+linhas válidas e em quarentena).
+"""
+
+import argparse
+
+import pandas as pd
+
+from common import DATASET, scaled_dataset, timed
+from core.storage import read_csv_typed
+from core.validation import apply_mapping, detect_mapping, rule_masks, validate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    # CSV bruto (sem o cache colunar, que já é validado)
+    base = read_csv_typed(DATASET)
+    results = []
+    for rows in args.rows:
+        df = scaled_dataset(rows, base)
+        mapping, detection = timed(lambda: detect_mapping(df))
+        mapped = apply_mapping(df, mapping)
+        _, rules = timed(lambda: rule_masks(mapped))
+        (valid, quarantine, _), total = timed(lambda: validate(df))
+        results.append({
+            'linhas': rows,
+            'mapeamento (s)': detection,
+            'regras (s)': rules,
+            'validate (s)': total,
+            'válidas': len(valid),
+            'quarentena': len(quarantine),
+        })
+
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Peças comuns dos benchmarks: raiz do repositório, dataset escalado e cronômetro.
+
+Os scripts rodam como ``python benchmarks/bench_<nome>.py``: o diretório do
+script já está no ``sys.path`` e ``from common import ...`` acrescenta a raiz
+do repositório, para os imports de ``core`` que vêm em seguida.
+"""
+
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.storage import load_columnar  # noqa: E402
+from core.translation import add_translations  # noqa: E402
+
+DATASET = os.path.join(ROOT, 'dataset_full.csv')
+
+
+def repeat_rows(base, rows):
+    """``base`` repetido até ``rows`` linhas, com índice novo."""
+    reps = -(-rows // len(base))
+    return pd.concat([base] * reps, ignore_index=True).iloc[:rows]
+
+
+def base_dataset():
+    """O dataset como o app o usa: cache colunar com as colunas traduzidas."""
+    return add_translations(load_columnar(DATASET))
+
+
+def scaled_dataset(rows, base=None):
+    """``base`` (por padrão ``base_dataset()``) repetido até ``rows`` linhas."""
+    return repeat_rows(base_dataset() if base is None else base, rows)
+
+
+def csv_rows(path):
+    """Linhas de dados de um CSV (sem o cabeçalho); ``None`` se o arquivo não existe."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f) - 1
+
+
+def scaled_csv(rows, path):
+    """Grava em ``path`` o CSV original repetido até ``rows`` linhas (reaproveita o de mesmo tamanho)."""
+    if csv_rows(path) != rows:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        repeat_rows(pd.read_csv(DATASET), rows).to_csv(path, index=False)
+    return path
+
+
+def link_app(workdir):
+    """Monta em ``workdir`` um app com links para o código do repositório; devolve o caminho do CSV."""
+    os.makedirs(workdir, exist_ok=True)
+    for name in ('index.py', 'pages', 'core'):
+        link = os.path.join(workdir, name)
+        if not os.path.lexists(link):
+            os.symlink(os.path.join(ROOT, name), link)
+    return os.path.join(workdir, 'dataset_full.csv')
+
+
+def timed(compute, repeat=1):
+    """Roda ``compute`` ``repeat`` vezes; devolve o último resultado e os segundos por execução."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = compute()
+    return result, (time.perf_counter() - start) / repeat
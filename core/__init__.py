@@ -0,0 +1 @@
+"""Camada de dados compartilhada pelo dashboard (index.py e pages/)."""
@@ -0,0 +1,149 @@
+"""Intervalos de confiança por bootstrap no nível do rali.
+
+A unidade reamostrada é o rali, não a linha: ações do mesmo rali não são
+independentes. Cada rali vira um perfil de contagens (grupo x métrica) e
+ralis com o mesmo perfil são agrupados. Reamostrar ``R`` ralis com reposição
+equivale a um sorteio multinomial ``Multinomial(R, frequências dos perfis)``,
+e as contagens da réplica são esse vetor vezes a matriz de perfis: um produto
+de matrizes por bloco de réplicas, sem tocar nas linhas.
+
+Blocos grandes de réplicas vão para um pool de processos. Cada bloco tem a
+própria semente (``SeedSequence.spawn``), então o resultado é o mesmo com ou
+sem o pool.
+"""
+
+import numpy as np
+import pandas as pd
+
+from core.filters import encode_column
+from core.metrics import outcome_flags
+from core.workers import process_pool
+
+N_RESAMPLES = 1000
+CONFIDENCE = 0.95
+# Tamanho do bloco de sorteios: no máximo BLOCK_RESAMPLES réplicas e
+# BLOCK_CELLS células (réplicas x perfis). Depende só dos dados, então os
+# blocos (e as sementes) são os mesmos com ou sem o pool
+BLOCK_RESAMPLES = 250
+BLOCK_CELLS = 4_000_000
+# A partir deste total de células os blocos vão para o pool de processos
+PARALLEL_CELLS = 50_000_000
+
+
+def _efficiency(sums):
+    kills, errors, total = sums[..., 0], sums[..., 1], sums[..., 2]
+    return (kills - errors) / total * 100
+
+
+def _rate(sums):
+    return sums[..., 0] / sums[..., 1] * 100
+
+
+def _count(sums):
+    return sums[..., 0]
+
+
+# Estimador -> (contagens usadas, função das somas (..., grupos, contagens))
+ESTIMATORS = {
+    'efficiency': (['kills', 'errors', 'total'], _efficiency),
+    'block_efficiency': (['blocks', 'defensive_actions'], _rate),
+    'aces': (['aces'], _count),
+    'serve_errors': (['serve_errors'], _count),
+}
+
+
+def rally_profiles(df, by, metrics, run_of_row, rows=None):
+    """Perfis distintos de contagens por rali e quantos ralis têm cada um.
+
+    Devolve ``(perfis, frequências, rótulos)``, com ``perfis`` de forma
+    ``(n_perfis, n_grupos, n_métricas)``. Entram só os ralis e os grupos com
+    alguma linha selecionada (um grupo presente pode ter contagens zeradas).
+    """
+    columns = [by] + [c for c in ('win_reason', 'lose_reason', 'num_blockers') if c in df.columns]
+    part = df[columns] if rows is None else df[columns].take(rows)
+    runs = run_of_row if rows is None else run_of_row[rows]
+    _, run_local = np.unique(runs, return_inverse=True)
+    n_runs = int(run_local.max()) + 1 if len(run_local) else 0
+
+    group_codes, labels = encode_column(part[by])
+    valid = group_codes >= 0
+    # Categorias sem linhas na seleção ficam de fora; as demais são renumeradas
+    kept = np.flatnonzero(np.bincount(group_codes[valid], minlength=len(labels)))
+    remap = np.full(len(labels), -1, dtype=np.int64)
+    remap[kept] = np.arange(len(kept))
+    group_codes = np.where(valid, remap[np.maximum(group_codes, 0)], -1)
+    labels = [labels[i] for i in kept]
+    n_groups = len(labels)
+    # Contagens em (grupo, métrica, rali): cada coluna do perfil é contígua
+    key = group_codes[valid].astype(np.int64) * n_runs + run_local[valid]
+    counts = np.stack([
+        np.bincount(key, weights=outcome_flags(part, m)[valid], minlength=n_groups * n_runs)
+        .astype(np.int64).reshape(n_groups, n_runs)
+        for m in metrics
+    ], axis=1).reshape(n_groups * len(metrics), n_runs)
+    profile = _profile_codes(counts, n_runs)
+    freq = np.bincount(profile)
+    first = np.full(len(freq), n_runs, dtype=np.int64)
+    np.minimum.at(first, profile, np.arange(n_runs))
+    return counts[:, first].T.reshape(-1, n_groups, len(metrics)), freq, labels
+
+
+def _profile_codes(counts, n_runs):
+    # Código denso por rali distinto sem ordenar os ralis: colunas são
+    # empacotadas em base mista enquanto o código cabe em int64 e então
+    # renumeradas por hash (``pd.factorize``); colunas zeradas não contam
+    code, bound = np.zeros(n_runs, dtype=np.int64), 1
+    for column in counts:
+        radix = int(column.max(initial=0)) + 1
+        if radix == 1:
+            continue
+        if bound * radix >= 2 ** 62:
+            code, uniques = pd.factorize(code)
+            bound = len(uniques)
+        code, bound = code * radix + column, bound * radix
+    return pd.factorize(code)[0] if n_runs else code
+
+
+def _replicates(profiles, freq, estimator, size, seed):
+    # Um bloco de réplicas: sorteio multinomial dos perfis e produto de matrizes
+    rng = np.random.default_rng(seed)
+    weights = rng.multinomial(int(freq.sum()), freq / freq.sum(), size=size)
+    sums = (weights @ profiles.reshape(len(profiles), -1)).reshape(size, *profiles.shape[1:])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ESTIMATORS[estimator][1](sums)
+
+
+def bootstrap_replicates(profiles, freq, estimator, n_resamples=N_RESAMPLES, seed=0, parallel=None):
+    """Estimador aplicado a ``n_resamples`` reamostragens de ralis: ``(n_resamples, n_grupos)``."""
+    block = max(1, min(BLOCK_RESAMPLES, BLOCK_CELLS // max(len(profiles), 1)))
+    sizes = [min(block, n_resamples - start) for start in range(0, n_resamples, block)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if parallel is None:
+        parallel = n_resamples * len(profiles) >= PARALLEL_CELLS and len(sizes) > 1
+    if parallel:
+        pool = process_pool()
+        futures = [pool.submit(_replicates, profiles, freq, estimator, size, s) for size, s in zip(sizes, seeds)]
+        blocks = [future.result() for future in futures]
+    else:
+        blocks = [_replicates(profiles, freq, estimator, size, s) for size, s in zip(sizes, seeds)]
+    return np.concatenate(blocks) if blocks else np.zeros((0, profiles.shape[1]))
+
+
+def bootstrap_ci(df, by, estimator, run_of_row, rows=None, n_resamples=N_RESAMPLES,
+                 confidence=CONFIDENCE, seed=0, parallel=None):
+    """Estimativa e intervalo percentil por grupo de ``by``.
+
+    Devolve um DataFrame indexado pelos grupos (só os com linhas na seleção),
+    com as colunas ``estimate``, ``low`` e ``high``.
+    """
+    metrics = ESTIMATORS[estimator][0]
+    profiles, freq, labels = rally_profiles(df, by, metrics, run_of_row, rows)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        estimate = ESTIMATORS[estimator][1]((freq[:, None, None] * profiles).sum(axis=0))
+    replicates = bootstrap_replicates(profiles, freq, estimator, n_resamples, seed, parallel)
+    tail = (1 - confidence) / 2 * 100
+    low = high = np.full(len(estimate), np.nan)
+    if len(replicates) and len(estimate):
+        low, high = np.nanpercentile(replicates, [tail, 100 - tail], axis=0)
+    index = pd.Index(labels, name=by)
+    return pd.DataFrame({'estimate': estimate, 'low': low, 'high': high}, index=index)
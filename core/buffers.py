@@ -0,0 +1,61 @@
+"""Vetores com capacidade extra para anexar linhas sem recopiar o histórico."""
+
+import numpy as np
+
+
+class GrowableArray:
+    """Vetor NumPy que cresce por duplicação: anexar custa o tamanho do trecho novo.
+
+    ``view()`` devolve uma fatia ``[:size]``; fatias antigas continuam válidas
+    depois de novos anexos (os dados já escritos nunca mudam de valor).
+    ``fork()`` cria um segundo vetor sobre os mesmos dados: cada um anexa no
+    espaço livre enquanto ninguém mais escreveu depois do seu fim; caso
+    contrário, o anexo copia primeiro (cópia na escrita).
+    """
+
+    def __init__(self, initial, dtype=None):
+        self._data = np.asarray(initial, dtype=dtype)
+        self.size = len(self._data)
+        # Até onde algum vetor que compartilha ``_data`` já escreveu (None: não compartilhado)
+        self._extent = None
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def view(self):
+        return self._data[:self.size]
+
+    def fork(self):
+        """Vetor com o mesmo conteúdo, compartilhando o buffer até o primeiro anexo conflitante."""
+        if self._extent is None:
+            self._extent = [self.size]
+        twin = GrowableArray.__new__(GrowableArray)
+        twin._data, twin.size, twin._extent = self._data, self.size, self._extent
+        return twin
+
+    def truncate(self, size):
+        self.size = min(size, self.size)
+
+    def append(self, values):
+        # O tipo do buffer é fixo; quem chama troca com astype() quando precisa
+        values = np.asarray(values).astype(self._data.dtype, copy=False)
+        needed = self.size + len(values)
+        conflict = self._extent is not None and self._extent[0] > self.size
+        if needed > len(self._data) or not self._data.flags.writeable or conflict:
+            # Buffers mapeados do disco são somente leitura: a primeira escrita copia para a RAM.
+            # Só o crescimento dobra a capacidade; uma cópia na escrita parte do tamanho em uso
+            capacity = max(needed, 2 * (len(self._data) if needed > len(self._data) else self.size), 1024)
+            grown = np.empty(capacity, dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+            self._extent = None
+        self._data[self.size:needed] = values
+        self.size = needed
+        if self._extent is not None:
+            self._extent[0] = needed
+
+    def astype(self, dtype):
+        """Troca o tipo do buffer (cópia única, usada quando os códigos não cabem mais)."""
+        self._data = self._data[:self.size].astype(dtype)
+        self._extent = None
@@ -0,0 +1,133 @@
+"""Figuras leves para séries longas (um ponto por rali).
+
+Acima de ``TARGET_POINTS`` pontos, cada traço de linha ou área é reduzido por
+LTTB (Largest-Triangle-Three-Buckets), que mantém picos e vales, para cerca
+da largura do gráfico em pixels. Acima de ``WEBGL_POINTS`` pontos originais o
+traço vira ``Scattergl``. Os eixos vão como arrays numpy no menor tipo exato,
+que o Plotly serializa como typed arrays em base64 em vez de listas JSON.
+``chart`` mostra a figura com o tamanho do payload enviado ao navegador.
+"""
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from core.instrument import plotly_chart
+
+# Aproximadamente a largura em pixels de um gráfico em meia página larga
+TARGET_POINTS = 1500
+WEBGL_POINTS = 5000
+
+# Propriedades de Scatter sem equivalente em Scattergl
+# Arrays com um valor por ponto, reduzidos junto com x e y
+_PER_POINT = ('customdata', 'text', 'hovertext')
+_SCATTER_ONLY = {'stackgroup', 'orientation', 'groupnorm', 'stackgaps', 'cliponaxis', 'alignmentgroup',
+                 'offsetgroup', 'fillpattern', 'hoveron'}
+
+
+def lttb(x, y, n_out):
+    """Posições dos ``n_out`` pontos escolhidos pelo LTTB (primeiro e último sempre entram)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    # n_out - 2 baldes entre o primeiro e o último ponto; o último "balde" é
+    # o ponto final. As médias de todos os baldes saem de um reduceat
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sizes = np.diff(np.append(edges, n))
+    valid = ~np.isnan(y)
+    mean_x = np.add.reduceat(x, edges) / sizes
+    with np.errstate(invalid='ignore'):
+        mean_y = np.add.reduceat(np.where(valid, y, 0), edges) / np.add.reduceat(valid, edges)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i in range(n_out - 2):
+        low, high = edges[i], edges[i + 1]
+        # Ponto do balde que forma o maior triângulo com o anterior e a média do próximo
+        area = np.abs((x[anchor] - mean_x[i + 1]) * (y[low:high] - y[anchor])
+                      - (x[anchor] - x[low:high]) * (mean_y[i + 1] - y[anchor]))
+        anchor = low + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selected[i + 1] = anchor
+    return selected
+
+
+def compact(values):
+    """Array no menor tipo que representa os valores sem perda (inteiros ou float32)."""
+    values = np.asarray(values)
+    if values.dtype.kind in 'iub' and len(values):
+        low, high = values.min(), values.max()
+        for dtype in (np.int8, np.int16, np.int32):
+            if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+                return values.astype(dtype)
+        return values
+    if values.dtype.kind == 'f':
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow.astype(values.dtype), values, equal_nan=True):
+            return narrow
+    return values
+
+
+def slim_figure(fig, target_points=TARGET_POINTS, webgl_points=WEBGL_POINTS):
+    """Reduz, compacta e, se preciso, troca para WebGL os traços de linha/área de ``fig`` (no lugar).
+
+    Devolve a própria figura; ``fig._points`` guarda (pontos enviados, pontos
+    originais) para a legenda de ``chart``.
+    """
+    traces, sent, total = [], 0, 0
+    stacks = {}
+    for trace in fig.data:
+        if getattr(trace, 'stackgroup', None):
+            stacks[trace.stackgroup] = stacks.get(trace.stackgroup, 0) + 1
+    for trace in fig.data:
+        if trace.type not in ('scatter', 'scattergl') or trace.x is None or trace.y is None:
+            traces.append(trace)
+            continue
+        x, y = np.asarray(trace.x), np.asarray(trace.y)
+        total += len(x)
+        props = trace.to_plotly_json()
+        if len(x) > target_points and x.dtype.kind in 'iuf' and y.dtype.kind in 'iuf':
+            keep = lttb(x, y, target_points)
+            x, y = x[keep], y[keep]
+            for name in _PER_POINT:
+                values = props.get(name)
+                if values is not None and not isinstance(values, str) and len(values) == len(trace.x):
+                    props[name] = np.asarray(values)[keep]
+        sent += len(x)
+        props.update(x=compact(x), y=compact(y))
+        stack = props.get('stackgroup')
+        if trace.type == 'scatter' and len(trace.x) > webgl_points and (not stack or stacks[stack] == 1):
+            # Área de um único traço: o preenchimento até zero equivale ao empilhamento
+            if stack:
+                props['fill'] = 'tozeroy'
+            props = {k: v for k, v in props.items() if k not in _SCATTER_ONLY and k != 'type'}
+            traces.append(go.Scattergl(**props))
+        else:
+            traces.append(type(trace)(**{k: v for k, v in props.items() if k != 'type'}))
+    fig.data = []
+    fig.add_traces(traces)
+    fig._points = (sent, total)
+    return fig
+
+
+def payload_bytes(fig):
+    """Bytes do JSON da figura enviado ao navegador (calculado uma vez por figura)."""
+    size = getattr(fig, '_payload_bytes', None)
+    if size is None:
+        size = len(fig.to_json().encode())
+        fig._payload_bytes = size
+    return size
+
+
+def chart(fig, name):
+    """``st.plotly_chart`` com o tamanho do payload (e a redução de pontos, se houve) na legenda."""
+    plotly_chart(fig, name)
+    sent, total = getattr(fig, '_points', (None, None))
+    info = f"Dados do gráfico: {payload_bytes(fig) / 1024:.1f} KB"
+    if sent is not None and sent < total:
+        info += f" · {sent:,} de {total:,} pontos (LTTB)".replace(',', '.')
+    if any(trace.type == 'scattergl' for trace in fig.data):
+        info += " · WebGL"
+    st.caption(info)
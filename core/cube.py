@@ -0,0 +1,264 @@
+"""Cubo de contagens materializado sobre as dimensões dos KPIs.
+
+Cada célula guarda quantas ações têm aquela combinação de time, tipo de
+ataque, tipo de saque, bloqueadores, motivo de vitória/derrota e vencedor.
+Consultas somam fatias do cubo: o custo depende do número de categorias,
+não do número de linhas.
+
+``IncrementalSum`` guarda a última soma de um agregado e, quando a seleção
+muda em uma única dimensão (um time ou tipo marcado/desmarcado), soma ou
+subtrai só a fatia dos valores alterados.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from core.filters import encode_column, value_key
+
+CUBE_DIMENSIONS = [
+    'team_pt', 'hit_type_pt', 'serve_type_pt', 'num_blockers',
+    'win_reason', 'lose_reason', 'winning_team',
+]
+
+
+def dimension_positions(values, lookup, labels):
+    """Posição de cada linha no eixo da dimensão.
+
+    Só os valores presentes viram posições; rótulos novos entram no fim do
+    eixo (``lookup`` e ``labels`` são atualizados no lugar).
+    """
+    codes, value_labels = encode_column(values)
+    present = np.bincount(codes + 1, minlength=len(value_labels) + 1)
+    lut = np.zeros(len(value_labels) + 1, dtype=np.int64)
+    for code in np.flatnonzero(present):
+        key = None if code == 0 else value_labels[code - 1]
+        if key not in lookup:
+            lookup[key] = len(labels)
+            labels.append(key)
+        lut[code] = lookup[key]
+    return lut[codes + 1]
+
+
+def selected_positions(dim, lookup, selections):
+    """Posições da dimensão que satisfazem todas as seleções (AND entre dicionários)."""
+    allowed = None
+    for selection in selections:
+        selected = selection.get(dim)
+        if selected is None:
+            continue
+        if isinstance(selected, (str, int, np.integer)):
+            selected = [selected]
+        # Lista vazia significa "sem filtro", como nos multiselects
+        if len(selected) == 0:
+            continue
+        keys = {value_key(v) for v in selected}
+        allowed = keys if allowed is None else allowed & keys
+    if allowed is None:
+        return np.arange(len(lookup))
+    return np.array(sorted(lookup[k] for k in allowed if k in lookup), dtype=np.intp)
+
+
+class CellIndex:
+    """Células (combinações presentes de valores) de um conjunto de dimensões.
+
+    Para estruturas esparsas por célula: cada linha recebe o id da sua célula,
+    células novas entram no fim e uma seleção vira uma máscara sobre as células.
+    """
+
+    def __init__(self, dimensions):
+        self.dimensions = list(dimensions)
+        self.labels = {dim: [] for dim in self.dimensions}
+        self._positions_by_label = {dim: {} for dim in self.dimensions}
+        self._cell_ids = {}
+        self.cells = np.zeros((0, len(self.dimensions)), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def copy(self):
+        new = copy.copy(self)
+        new.labels = {dim: list(labels) for dim, labels in self.labels.items()}
+        new._positions_by_label = {dim: dict(lookup) for dim, lookup in self._positions_by_label.items()}
+        new._cell_ids = dict(self._cell_ids)
+        return new
+
+    def assign(self, df):
+        """Id da célula de cada linha de ``df``."""
+        positions = [
+            dimension_positions(df[dim], self._positions_by_label[dim], self.labels[dim])
+            for dim in self.dimensions
+        ]
+        shape = tuple(len(self.labels[dim]) for dim in self.dimensions)
+        flat = np.ravel_multi_index(positions, shape)
+        size = int(np.prod(shape))
+        # Espaço de combinações pequeno: tabela direta em vez de ordenar as linhas
+        direct = size <= max(len(flat), 1 << 16)
+        if direct:
+            keys = np.flatnonzero(np.bincount(flat, minlength=size))
+        else:
+            keys, flat = np.unique(flat, return_inverse=True)
+        ids = np.empty(len(keys), dtype=np.int64)
+        new_cells = []
+        for i, cell in enumerate(zip(*np.unravel_index(keys, shape))):
+            cell = tuple(int(p) for p in cell)
+            if cell not in self._cell_ids:
+                self._cell_ids[cell] = len(self._cell_ids)
+                new_cells.append(cell)
+            ids[i] = self._cell_ids[cell]
+        if new_cells:
+            self.cells = np.concatenate([self.cells, np.array(new_cells, dtype=np.int64)])
+        if direct:
+            lut = np.zeros(size, dtype=np.int64)
+            lut[keys] = ids
+            return lut[flat]
+        return ids[flat.ravel()]
+
+    def find(self, *values):
+        """Id da célula com esses valores (um por dimensão), ou ``None``."""
+        positions = []
+        for dim, value in zip(self.dimensions, values):
+            key = value_key(value)
+            if key not in self._positions_by_label[dim]:
+                return None
+            positions.append(self._positions_by_label[dim][key])
+        return self._cell_ids.get(tuple(positions))
+
+    def selected(self, selections):
+        """Máscara das células que satisfazem todas as seleções."""
+        mask = np.ones(len(self.cells), dtype=bool)
+        for axis, dim in enumerate(self.dimensions):
+            allowed = selected_positions(dim, self._positions_by_label[dim], selections)
+            if len(allowed) < len(self.labels[dim]):
+                mask &= np.isin(self.cells[:, axis], allowed)
+        return mask
+
+
+class CountCube:
+    def __init__(self, df, dimensions=CUBE_DIMENSIONS):
+        self.dimensions = list(dimensions)
+        self.labels = {dim: [] for dim in self.dimensions}
+        self._positions_by_label = {dim: {} for dim in self.dimensions}
+        self.counts = np.zeros((0,) * len(self.dimensions), dtype=np.int64)
+        self._append(df, 0)
+
+    @property
+    def shape(self):
+        return self.counts.shape
+
+    def extended(self, df, start):
+        """Novo cubo somando as linhas ``df[start:]`` às contagens atuais."""
+        new = copy.copy(self)
+        new.labels = {dim: list(labels) for dim, labels in self.labels.items()}
+        new._positions_by_label = {dim: dict(lookup) for dim, lookup in self._positions_by_label.items()}
+        new._append(df, start)
+        return new
+
+    def _append(self, df, start):
+        positions = [
+            dimension_positions(df[dim].iloc[start:], self._positions_by_label[dim], self.labels[dim])
+            for dim in self.dimensions
+        ]
+
+        shape = tuple(len(self.labels[dim]) for dim in self.dimensions)
+        counts = np.zeros(shape, dtype=np.int64)
+        counts[tuple(slice(0, size) for size in self.counts.shape)] = self.counts
+        if len(df) > start:
+            flat = np.ravel_multi_index(positions, shape)
+            counts += np.bincount(flat, minlength=counts.size).reshape(shape)
+        self.counts = counts
+
+    def _positions(self, dim, selections):
+        return selected_positions(dim, self._positions_by_label[dim], selections)
+
+    def _slice(self, selections):
+        index = [self._positions(dim, selections) for dim in self.dimensions]
+        return self.counts[np.ix_(*index)], index
+
+    def _reduce(self, dims, index):
+        # Soma da fatia ``index`` nos eixos de ``dims``, densa sobre todos os
+        # rótulos desses eixos (posições fora da seleção ficam zeradas)
+        axes = [self.dimensions.index(d) for d in dims]
+        other = tuple(i for i in range(len(self.dimensions)) if i not in axes)
+        reduced = self.counts[np.ix_(*index)].sum(axis=other)
+        full = np.zeros([self.counts.shape[a] for a in sorted(axes)], dtype=np.int64)
+        full[np.ix_(*[index[a] for a in sorted(axes)])] = reduced
+        return np.transpose(full, np.argsort(np.argsort(axes)))
+
+    def reduce(self, dims, *selections):
+        """Contagens por ``dims`` (eixos nessa ordem, sobre todos os rótulos), sem rótulos."""
+        return self._reduce(list(dims), [self._positions(dim, selections) for dim in self.dimensions])
+
+    def count(self, *selections):
+        """Número de ações que satisfazem todas as seleções."""
+        sub, _ = self._slice(selections)
+        return int(sub.sum())
+
+    def table(self, dims, *selections, dropna=True):
+        """Contagens agrupadas por uma (Series) ou duas (DataFrame) dimensões, sem zeros."""
+        if isinstance(dims, str):
+            dims = [dims]
+        # Posições fora da seleção saem zeradas e são descartadas como as vazias
+        reduced = self.reduce(dims, *selections)
+        labels = [list(self.labels[d]) for d in dims]
+        if dropna:
+            keep = [[label is not None for label in axis_labels] for axis_labels in labels]
+            reduced = reduced[np.ix_(*[np.array(k, dtype=bool) for k in keep])]
+            labels = [[l for l, k in zip(axis_labels, axis_keep) if k] for axis_labels, axis_keep in zip(labels, keep)]
+        if len(dims) == 1:
+            result = pd.Series(reduced, index=pd.Index(labels[0], name=dims[0]), dtype='int64')
+            return result[result > 0]
+        result = pd.DataFrame(reduced, index=pd.Index(labels[0], name=dims[0]),
+                              columns=pd.Index(labels[1], name=dims[1]), dtype='int64')
+        return result.loc[result.sum(axis=1) > 0, result.sum(axis=0) > 0]
+
+
+class IncrementalSum:
+    """``cube.reduce(dims, ...)`` mantido entre seleções consecutivas.
+
+    Se só uma dimensão mudou e os valores incluídos ou removidos são menos
+    que os selecionados, a nova soma é a anterior mais a fatia dos incluídos
+    menos a dos removidos; senão, refaz a soma inteira.
+    """
+
+    def __init__(self, cube, dims):
+        self.cube = cube
+        self.dims = list(dims)
+        self.values = None
+        self.deltas = 0
+        self.recomputes = 0
+        self._index = None
+
+    def update(self, *selections):
+        index = [self.cube._positions(dim, selections) for dim in self.cube.dimensions]
+        if self._index is None:
+            return self._recompute(index)
+        changed = [
+            axis for axis, (old, new) in enumerate(zip(self._index, index))
+            if not np.array_equal(old, new)
+        ]
+        if not changed:
+            return self.values
+        if len(changed) > 1:
+            return self._recompute(index)
+        axis = changed[0]
+        added = np.setdiff1d(index[axis], self._index[axis])
+        removed = np.setdiff1d(self._index[axis], index[axis])
+        if len(added) + len(removed) >= len(index[axis]):
+            return self._recompute(index)
+
+        values = self.values.copy()
+        for positions, sign in ((added, 1), (removed, -1)):
+            if len(positions):
+                part = list(index)
+                part[axis] = positions
+                values += sign * self.cube._reduce(self.dims, part)
+        self.values, self._index = values, index
+        self.deltas += 1
+        return values
+
+    def _recompute(self, index):
+        self.values, self._index = self.cube._reduce(self.dims, index), index
+        self.recomputes += 1
+        return self.values
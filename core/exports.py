@@ -0,0 +1,130 @@
+"""Exportação do dataset sob demanda, escrita em blocos e guardada em disco.
+
+Nada é gerado enquanto ninguém clica em baixar: a página passa ao
+``st.download_button`` uma função (``export_reader``) que só escreve o arquivo
+quando chamada. O arquivo fica em ``.cache/exports/`` com o nome derivado da
+assinatura (versão dos dados + filtros + formato), então downloads repetidos
+da mesma seleção reaproveitam o arquivo já escrito.
+
+A fonte pode ser um DataFrame (ou função que o devolve) ou o caminho do CSV
+de origem: nesse caso o arquivo é exportado como está, sem validação,
+mapeamento de colunas ou traduções.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from core.storage import CACHE_DIR, read_csv_typed
+
+EXPORT_DIR = os.path.join(CACHE_DIR, 'exports')
+CHUNK_ROWS = 50_000
+MAX_EXPORTS = 16
+
+EXPORT_FORMATS = {
+    'csv': {'label': 'CSV', 'extension': 'csv', 'mime': 'text/csv'},
+    'csv.gz': {'label': 'CSV compactado', 'extension': 'csv.gz', 'mime': 'application/gzip'},
+    'parquet': {'label': 'Parquet', 'extension': 'parquet', 'mime': 'application/vnd.apache.parquet'},
+}
+
+
+def export_signature(*parts):
+    """Hash estável dos componentes da seleção (versão, filtros, formato)."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def write_csv(df, f, chunk_rows=CHUNK_ROWS):
+    """Escreve o CSV bloco a bloco, sem montar o texto inteiro na memória."""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        f.write(chunk.to_csv(index=False, header=start == 0).encode())
+
+
+def write_parquet(df, path, chunk_rows=CHUNK_ROWS):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for start in range(0, max(len(df), 1), chunk_rows):
+            table = pa.Table.from_pandas(df.iloc[start:start + chunk_rows], preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_source(csv_path, fmt, path):
+    # CSV copiado byte a byte; o Parquet lê o arquivo só com os tipos do esquema
+    if fmt == 'csv':
+        shutil.copyfile(csv_path, path)
+    elif fmt == 'csv.gz':
+        with open(csv_path, 'rb') as src, gzip.open(path, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+    elif fmt == 'parquet':
+        write_parquet(read_csv_typed(csv_path), path)
+    else:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+
+
+def _write(df, fmt, path):
+    if isinstance(df, str):
+        _write_source(df, fmt, path)
+    elif fmt == 'csv':
+        with open(path, 'wb') as f:
+            write_csv(df, f)
+    elif fmt == 'csv.gz':
+        with gzip.open(path, 'wb', compresslevel=6) as f:
+            write_csv(df, f)
+    elif fmt == 'parquet':
+        write_parquet(df, path)
+    else:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+
+
+def _prune(export_dir, keep):
+    # Mantém só os arquivos usados mais recentemente
+    files = [os.path.join(export_dir, name) for name in os.listdir(export_dir) if not name.startswith('.')]
+    files.sort(key=os.path.getmtime, reverse=True)
+    for path in files[keep:]:
+        os.remove(path)
+
+
+def export_file(df, fmt, signature, export_dir=EXPORT_DIR):
+    """Caminho do arquivo exportado, escrevendo-o apenas se ainda não existir.
+
+    ``df`` pode ser uma função sem argumentos que devolve o DataFrame; ela só é
+    chamada quando o arquivo precisa ser escrito. Um caminho de CSV em
+    formato ``csv`` é devolvido diretamente, sem cópia.
+    """
+    if isinstance(df, str) and fmt == 'csv':
+        return df
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, f"{signature}.{EXPORT_FORMATS[fmt]['extension']}")
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+    fd, tmp = tempfile.mkstemp(dir=export_dir, prefix='.tmp-')
+    os.close(fd)
+    try:
+        _write(df() if callable(df) else df, fmt, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    _prune(export_dir, MAX_EXPORTS)
+    return path
+
+
+def export_reader(df, fmt, signature, export_dir=EXPORT_DIR):
+    """Função sem argumentos para o ``st.download_button``: gera o arquivo no clique."""
+    def read():
+        with open(export_file(df, fmt, signature, export_dir), 'rb') as f:
+            return f.read()
+    return read
@@ -0,0 +1,187 @@
+"""Índice de bitmaps para os filtros de multiselect.
+
+Para cada coluna filtrável é guardado um bitmap compactado (``np.packbits``)
+por valor distinto. Uma combinação de seleções vira OR dentro da coluna e AND
+entre colunas, operações sobre ``n/8`` bytes, e só no fim é convertida em
+posições de linha.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from core.buffers import GrowableArray
+
+# Colunas dos filtros globais e por página
+FILTER_COLUMNS = ['team_pt', 'hit_type_pt', 'serve_type_pt', 'num_blockers']
+
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def value_key(value):
+    """Normaliza um valor de filtro: ``None`` para ausente e ``int`` para números inteiros."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return int(value) if float(value).is_integer() else float(value)
+    return str(value)
+
+
+def encode_column(values):
+    """Códigos inteiros (-1 = ausente) e rótulos de uma coluna."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), [value_key(v) for v in values.cat.categories]
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, [value_key(v) for v in uniques]
+
+
+def _popcount(mask, n_bits):
+    # Ignora os bits de preenchimento do último byte (podem pertencer a linhas
+    # anexadas depois, no modo ao vivo)
+    full = n_bits // 8
+    total = int(_POPCOUNT[mask[:full]].sum(dtype=np.int64))
+    if n_bits % 8:
+        total += int(np.unpackbits(mask[full:full + 1], count=n_bits % 8).sum())
+    return total
+
+
+def _append_bits(buffer, n_bits, bits):
+    # O último byte pode estar incompleto: é reescrito com os bits antigos na
+    # frente. Num vetor de ``fork()`` a reescrita copia o buffer (cópia na
+    # escrita): o byte visto pelo índice anterior e por suas seleções não muda
+    used = n_bits % 8
+    if used:
+        head = np.unpackbits(buffer.view()[-1:])[:used].astype(bool)
+        bits = np.concatenate([head, bits])
+        buffer.truncate(buffer.size - 1)
+    buffer.append(np.packbits(bits))
+
+
+class FilterIndex:
+    def __init__(self, df, columns=FILTER_COLUMNS):
+        self.columns = list(columns)
+        self.n_rows = 0
+        self.bitmaps = {col: {} for col in self.columns}
+        self._buffers = {col: {} for col in self.columns}
+        self._append(df, 0)
+
+    def extended(self, df, start):
+        """Novo índice incluindo as linhas ``df[start:]``; este continua válido e intacto.
+
+        Os buffers do novo índice são ``fork()`` dos deste: o trecho novo é
+        anexado no espaço livre, sem recopiar o histórico, quando ``n_rows`` é
+        múltiplo de 8; caso contrário o último byte é reescrito numa cópia
+        (``n/8`` bytes por valor). Estender o mesmo índice duas vezes também
+        copia na segunda.
+        """
+        new = copy.copy(self)
+        new.bitmaps = {col: dict(bitmaps) for col, bitmaps in self.bitmaps.items()}
+        new._buffers = {col: {key: buffer.fork() for key, buffer in buffers.items()}
+                        for col, buffers in self._buffers.items()}
+        new._append(df, start)
+        return new
+
+    def _append(self, df, start):
+        old_rows, n_new = self.n_rows, len(df) - start
+        for col in self.columns:
+            codes, labels = encode_column(df[col].iloc[start:])
+            counts = np.bincount(codes + 1, minlength=len(labels) + 1)
+            present = {None: -1} if counts[0] else {}
+            present.update({label: code for code, label in enumerate(labels) if counts[code + 1]})
+            buffers = self._buffers[col]
+            for key in list(buffers) + [k for k in present if k not in buffers]:
+                if key not in buffers:
+                    buffers[key] = GrowableArray(np.zeros((old_rows + 7) // 8, dtype=np.uint8))
+                bits = codes == present[key] if key in present else np.zeros(n_new, dtype=bool)
+                _append_bits(buffers[key], old_rows, bits)
+                self.bitmaps[col][key] = buffers[key].view()
+        self.n_rows = old_rows + n_new
+
+    def options(self, column, within=None):
+        """Valores presentes na coluna (sem ausentes), opcionalmente restritos a outra seleção."""
+        mask = self.mask(within or {})
+        return [
+            value for value, bits in self.bitmaps[column].items()
+            if value is not None and (mask is None or (bits & mask).any())
+        ]
+
+    def mask(self, selections):
+        """Bitmap compactado da seleção, ou ``None`` quando nenhuma linha é excluída."""
+        result = None
+        for column, selected in selections.items():
+            column_mask = self._column_mask(column, selected)
+            if column_mask is None:
+                continue
+            result = column_mask if result is None else result & column_mask
+        return result
+
+    def _column_mask(self, column, selected):
+        # Seleção vazia mantém o comportamento das páginas: sem filtro
+        if selected is None or len(selected) == 0:
+            return None
+        bitmaps = self.bitmaps[column]
+        keys = {value_key(v) for v in selected}
+        if keys.issuperset(bitmaps):
+            return None
+        chosen = [bitmaps[k] for k in keys if k in bitmaps]
+        if not chosen:
+            return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        return np.bitwise_or.reduce(chosen) if len(chosen) > 1 else chosen[0]
+
+    def rows(self, selections):
+        """Posições (ordenadas) das linhas selecionadas, ou ``None`` para todas."""
+        mask = self.mask(selections)
+        if mask is None:
+            return None
+        return np.flatnonzero(np.unpackbits(mask, count=self.n_rows))
+
+    def count(self, selections):
+        mask = self.mask(selections)
+        return self.n_rows if mask is None else _popcount(mask, self.n_rows)
+
+    def filter(self, df, selections):
+        """Linhas de ``df`` na seleção; devolve o próprio ``df`` quando nada é excluído."""
+        rows = self.rows(selections)
+        return df if rows is None else df.take(rows)
+
+    def select(self, df, selections):
+        """Seleção compacta sobre ``df`` (só o bitmap), sem copiar linhas."""
+        return RowSelection(df, self.mask(selections))
+
+
+class RowSelection:
+    """Linhas selecionadas de um dataset compartilhado.
+
+    Guarda uma referência ao DataFrame (o mesmo objeto para todas as sessões)
+    e o bitmap da seleção, ``n/8`` bytes; ``None`` seleciona todas as linhas.
+    As linhas só são copiadas em ``frame()``/``head()``, para uso imediato.
+    """
+
+    def __init__(self, df, mask=None):
+        self.df = df
+        self.mask = mask
+
+    @property
+    def nbytes(self):
+        return 0 if self.mask is None else self.mask.nbytes
+
+    def __len__(self):
+        if self.mask is None:
+            return len(self.df)
+        return _popcount(self.mask, len(self.df))
+
+    def rows(self):
+        if self.mask is None:
+            return None
+        return np.flatnonzero(np.unpackbits(self.mask, count=len(self.df)))
+
+    def frame(self):
+        rows = self.rows()
+        return self.df if rows is None else self.df.take(rows)
+
+    def head(self, n):
+        rows = self.rows()
+        return self.df.iloc[:n] if rows is None else self.df.take(rows[:n])
@@ -0,0 +1,172 @@
+"""Matrizes de transição entre zonas da quadra.
+
+Cada etapa da jogada (recepção, defesa, passe, atacante, aterrissagem) é uma
+coluna de zona. Para um par de etapas, a matriz ``Z x Z`` conta quantas
+ações saíram da zona ``i`` e chegaram à zona ``j``: um único ``bincount`` sobre
+``origem * Z + destino``, sem laços sobre linhas nem groupby. A zona 0 guarda
+os ausentes.
+
+As matrizes são montadas uma vez por versão dos dados, separadas por célula
+de filtros (time, tipo de ataque, tipo de saque); a matriz de uma seleção é a
+soma das células selecionadas, com custo independente do número de ações.
+
+As zonas 1–25 são desenhadas numa grade 5×5 numerada por linhas (a 13 no
+centro); zonas acima de 25 só aparecem nas matrizes.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from core.cube import CellIndex
+
+ZONE_COLUMNS = [
+    'receive_location', 'digger_location', 'pass_land_location',
+    'hitter_location', 'hit_land_location',
+]
+
+STAGE_LABELS = {
+    'receive_location': 'Recepção',
+    'digger_location': 'Defesa',
+    'pass_land_location': 'Passe',
+    'hitter_location': 'Atacante',
+    'hit_land_location': 'Aterrissagem',
+}
+
+# (origem, destino, destino na ação seguinte do mesmo rali?)
+STAGE_PAIRS = [
+    ('receive_location', 'pass_land_location', False),
+    ('digger_location', 'pass_land_location', False),
+    ('pass_land_location', 'hitter_location', False),
+    ('hitter_location', 'hit_land_location', False),
+    ('hit_land_location', 'receive_location', True),
+]
+
+# Etapas do diagrama de fluxo, na ordem da jogada
+FLOW_STAGES = ['receive_location', 'pass_land_location', 'hitter_location', 'hit_land_location']
+
+FLOW_DIMENSIONS = ['team_pt', 'hit_type_pt', 'serve_type_pt']
+
+GRID_SIZE = 5
+
+
+def pair_label(source, target, next_action=False):
+    suffix = ' seguinte' if next_action else ''
+    return f"{STAGE_LABELS[source]} → {STAGE_LABELS[target]}{suffix}"
+
+
+def zone_codes(values):
+    """Zonas como inteiros pequenos, 0 para ausente."""
+    return values.to_numpy(dtype=np.uint16, na_value=0)
+
+
+class FlowCube:
+    def __init__(self, df, dimensions=FLOW_DIMENSIONS, pairs=STAGE_PAIRS):
+        self.pairs = list(pairs)
+        self.labels = [pair_label(*pair) for pair in self.pairs]
+        self.cells = CellIndex(dimensions)
+        self.n_zones = 1
+        # counts[célula, par, origem, destino]
+        self.counts = np.zeros((0, len(self.pairs), 1, 1), dtype=np.int64)
+        self._append(df, 0)
+
+    def extended(self, df, start):
+        """Novo cubo somando as transições das linhas ``df[start:]``."""
+        new = copy.copy(self)
+        new.cells = self.cells.copy()
+        new._append(df, start)
+        return new
+
+    def _append(self, df, start):
+        if len(df) <= start:
+            return
+        # A última linha já contada entra de novo como origem da transição
+        # para a ação seguinte, que só agora existe
+        first = max(start - 1, 0)
+        window = df.iloc[first:]
+        cell_ids = self.cells.assign(window)
+        columns = {col for pair in self.pairs for col in pair[:2]}
+        codes = {col: zone_codes(window[col]) for col in columns}
+        n_zones = max(self.n_zones, *(int(c.max()) + 1 for c in codes.values()))
+
+        counts = np.zeros((len(self.cells), len(self.pairs), n_zones, n_zones), dtype=np.int64)
+        old = self.counts.shape
+        counts[:old[0], :, :old[2], :old[3]] = self.counts
+        size = n_zones * n_zones
+        rally = window['rally'].to_numpy()
+        skip = start - first
+        for p, (source, target, next_action) in enumerate(self.pairs):
+            if next_action:
+                origin = np.flatnonzero(rally[1:] == rally[:-1])
+                destination = origin + 1
+            else:
+                origin = destination = np.arange(skip, len(window))
+            key = (cell_ids[origin] * n_zones + codes[source][origin]) * n_zones + codes[target][destination]
+            counts[:, p] += np.bincount(key, minlength=len(self.cells) * size).reshape(-1, n_zones, n_zones)
+        self.counts, self.n_zones = counts, n_zones
+
+    def matrices(self, *selections):
+        """Matriz de transição de cada par de etapas, somando as células da seleção."""
+        merged = self.counts[self.cells.selected(selections)].sum(axis=0)
+        return dict(zip(self.labels, merged))
+
+
+def stage_totals(matrices, stage, pairs=STAGE_PAIRS):
+    """Ações por zona de uma etapa, tiradas da margem de uma matriz da mesma ação."""
+    for source, target, next_action in pairs:
+        if next_action:
+            continue
+        if stage == source:
+            return matrices[pair_label(source, target)].sum(axis=1)
+        if stage == target:
+            return matrices[pair_label(source, target)].sum(axis=0)
+    raise KeyError(stage)
+
+
+def matrix_frame(matrix, source, target):
+    """Matriz como DataFrame, sem a zona ausente e sem zonas vazias nos dois eixos."""
+    matrix = matrix[1:, 1:]
+    keep_rows = np.flatnonzero(matrix.sum(axis=1))
+    keep_cols = np.flatnonzero(matrix.sum(axis=0))
+    return pd.DataFrame(
+        matrix[np.ix_(keep_rows, keep_cols)],
+        index=pd.Index(keep_rows + 1, name=STAGE_LABELS[source]),
+        columns=pd.Index(keep_cols + 1, name=STAGE_LABELS[target]),
+    )
+
+
+def court_grid(totals):
+    """Totais por zona (índice = zona) distribuídos na grade da quadra, com o total fora dela."""
+    cells = GRID_SIZE * GRID_SIZE
+    padded = np.zeros(max(len(totals), cells + 1), dtype=np.int64)
+    padded[:len(totals)] = totals
+    grid = padded[1:cells + 1].reshape(GRID_SIZE, GRID_SIZE)
+    return grid, int(padded[cells + 1:].sum())
+
+
+def sankey_links(matrices, stages=FLOW_STAGES, top=12):
+    """Ligações do diagrama de fluxo: as ``top`` maiores transições de cada etapa para a seguinte.
+
+    Devolve ``(rótulos dos nós, origens, destinos, valores)`` no formato do
+    ``go.Sankey``.
+    """
+    labels, nodes = [], {}
+
+    def node(stage, zone):
+        key = (stage, zone)
+        if key not in nodes:
+            nodes[key] = len(labels)
+            labels.append(f"{STAGE_LABELS[stage]} {zone}")
+        return nodes[key]
+
+    sources, targets, values = [], [], []
+    for source, target in zip(stages, stages[1:]):
+        matrix = matrices[pair_label(source, target)][1:, 1:]
+        flat = matrix.ravel()
+        best = np.argsort(flat, kind='stable')[::-1][:top]
+        for i, j in zip(*np.unravel_index(best[flat[best] > 0], matrix.shape)):
+            sources.append(node(source, int(i) + 1))
+            targets.append(node(target, int(j) + 1))
+            values.append(int(matrix[i, j]))
+    return labels, sources, targets, values
@@ -0,0 +1,245 @@
+"""Ingestão incremental para o modo ao vivo.
+
+Os scouts anexam ações ao CSV durante a partida (ou deixam arquivos CSV com
+cabeçalho no diretório ``ao_vivo/``). ``LiveDataset.poll()`` lê apenas o
+trecho novo, aplica esquema, validação e tradução a ele e estende colunas,
+índice de filtros, cubo, índices de ralis e de partidas. O custo é
+proporcional às linhas novas. O trecho usa o mapeamento de colunas da carga
+completa; linhas inválidas ficam de fora e só entram no relatório.
+
+As regras de borda de rali precisam do rali inteiro: o último rali de cada
+trecho do CSV fica guardado e é validado com o trecho seguinte. Quando o
+arquivo para de crescer (uma leitura sem bytes novos), esse rali e uma última
+linha sem quebra de linha entram, como na carga completa.
+"""
+
+import glob
+import io
+import os
+import shutil
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from core.buffers import GrowableArray
+from core.cube import CountCube
+from core.filters import FilterIndex
+from core.flows import FlowCube
+from core.markov import RallyMarkov
+from core.matches import MatchIndex
+from core.moments import MomentCube
+from core.rallies import RallyIndex
+from core.storage import CACHE_DIR, dataset_version, load_columnar, read_csv_typed, validation_report
+from core.translation import TRANSLATED_COLUMNS, add_translations
+from core.validation import concat_chunks, merge_reports, split_last_rally, validate
+
+DROP_DIR = 'ao_vivo'
+PROCESSED_DIR = 'processados'
+
+# ``source`` é a versão do CSV na última carga completa: com ``version``,
+# identifica o conteúdo do snapshot mesmo entre reinícios do processo
+LiveSnapshot = namedtuple('LiveSnapshot', [
+    'version', 'data', 'filters', 'cube', 'rallies', 'moments', 'flows', 'markov', 'matches', 'source',
+])
+
+
+def _codes_dtype(n_categories):
+    # Mesmo critério do pandas para o tipo dos códigos, evitando cópias no from_codes
+    if n_categories < np.iinfo(np.int8).max:
+        return np.int8
+    if n_categories < np.iinfo(np.int16).max:
+        return np.int16
+    return np.int32
+
+
+class ColumnStore:
+    """Colunas do dataset em buffers crescentes; categorias novas entram no fim."""
+
+    def __init__(self, df):
+        self.columns = list(df.columns)
+        self.n_rows = len(df)
+        self.kinds, self.buffers, self.masks, self.categories = {}, {}, {}, {}
+        # As colunas traduzidas compartilham a mesma lista de categorias
+        shared = None
+        for col in self.columns:
+            values = df[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                if col in TRANSLATED_COLUMNS.values():
+                    shared = shared if shared is not None else list(values.cat.categories)
+                    self.categories[col] = shared
+                else:
+                    self.categories[col] = list(values.cat.categories)
+                self.kinds[col] = 'category'
+                self.buffers[col] = GrowableArray(values.cat.codes.to_numpy())
+            elif isinstance(values.array, pd.arrays.IntegerArray):
+                self.kinds[col] = 'masked'
+                self.buffers[col] = GrowableArray(values.array._data)
+                self.masks[col] = GrowableArray(values.array._mask)
+            else:
+                self.kinds[col] = 'plain'
+                self.buffers[col] = GrowableArray(values.to_numpy())
+
+    def append(self, chunk):
+        for col in self.columns:
+            values = chunk[col]
+            kind = self.kinds[col]
+            if kind == 'category':
+                self._append_category(col, values)
+                continue
+            data = values.to_numpy(dtype='float64', na_value=np.nan)
+            mask = np.isnan(data)
+            if mask.any() and kind == 'plain':
+                # Primeira lacuna numa coluna sem nulos: passa a ter máscara
+                self.kinds[col] = kind = 'masked'
+                self.masks[col] = GrowableArray(np.zeros(self.n_rows, dtype=bool))
+            buffer = self.buffers[col]
+            filled = np.where(mask, 0, data)
+            if len(filled) and np.issubdtype(buffer.dtype, np.integer) and filled.max() > np.iinfo(buffer.dtype).max:
+                buffer.astype(np.min_scalar_type(int(filled.max())))
+            buffer.append(filled)
+            if kind == 'masked':
+                self.masks[col].append(mask)
+        self.n_rows += len(chunk)
+
+    def _append_category(self, col, values):
+        categories = self.categories[col]
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype('category')
+        lut = []
+        for category in values.cat.categories:
+            if category not in categories:
+                categories.append(category)
+            lut.append(categories.index(category))
+        # O código -1 (NaN) indexa o último elemento da tabela
+        lut = np.array(lut + [-1], dtype=np.int64)
+        buffer = self.buffers[col]
+        wanted = _codes_dtype(len(categories))
+        if np.dtype(wanted).itemsize > buffer.dtype.itemsize:
+            buffer.astype(wanted)
+        buffer.append(lut[values.cat.codes.to_numpy()])
+
+    def frame(self):
+        """DataFrame montado sobre as fatias dos buffers, sem copiar as colunas."""
+        data = {}
+        for col in self.columns:
+            kind, values = self.kinds[col], self.buffers[col].view()
+            if kind == 'category':
+                dtype = pd.CategoricalDtype(list(self.categories[col]))
+                data[col] = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+            elif kind == 'masked':
+                data[col] = pd.arrays.IntegerArray(values, self.masks[col].view())
+            else:
+                data[col] = values
+        return pd.DataFrame(data, copy=False)
+
+
+class LiveDataset:
+    def __init__(self, csv_path, drop_dir=DROP_DIR, cache_dir=CACHE_DIR):
+        self.csv_path = csv_path
+        self.drop_dir = drop_dir
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self.snapshot = None
+        self._load()
+
+    def _load(self):
+        version = self.snapshot.version + 1 if self.snapshot else 0
+        self._offset = self._seen_size = os.path.getsize(self.csv_path)
+        # Linhas lidas do CSV (sem validar) do rali que pode continuar no próximo trecho
+        self._carry = None
+        source = dataset_version(self.csv_path)
+        with open(self.csv_path, 'rb') as f:
+            self._header = f.readline()
+        data = add_translations(load_columnar(self.csv_path, self.cache_dir))
+        self.validation = validation_report(self.csv_path, self.cache_dir)
+        self._store = ColumnStore(data)
+        self.snapshot = LiveSnapshot(
+            version,
+            data,
+            FilterIndex(data),
+            CountCube(data),
+            RallyIndex(data),
+            MomentCube(data),
+            FlowCube(data),
+            RallyMarkov(data),
+            MatchIndex(data),
+            source,
+        )
+        # Arquivos já processados de execuções anteriores voltam a entrar
+        for path in sorted(glob.glob(os.path.join(self.drop_dir, PROCESSED_DIR, '*.csv'))):
+            self._extend(self._parse(path))
+
+    def _parse(self, source):
+        return self._validate(read_csv_typed(source))
+
+    def _validate(self, raw):
+        valid, _, report = validate(raw, self.validation['mapping'])
+        self.validation = merge_reports([self.validation, report])
+        return add_translations(valid)
+
+    def _read_tail(self):
+        size = os.path.getsize(self.csv_path)
+        # Sem bytes novos desde a leitura anterior: o que está no fim do arquivo terminou
+        settled = size == self._seen_size
+        self._seen_size = size
+        rows = self._carry
+        if size > self._offset:
+            with open(self.csv_path, 'rb') as f:
+                f.seek(self._offset)
+                tail = f.read(size - self._offset)
+            # Só linhas completas: uma linha sendo escrita fica para a próxima leitura
+            end = len(tail) if settled else tail.rfind(b'\n') + 1
+            if end:
+                self._offset += end
+                new = read_csv_typed(io.BytesIO(self._header + tail[:end]))
+                rows = new if rows is None else concat_chunks(rows, new)
+        if rows is None or not len(rows):
+            self._carry = None
+            return None
+        if settled:
+            self._carry = None
+            return self._validate(rows)
+        complete, self._carry = split_last_rally(rows)
+        return self._validate(complete) if len(complete) else None
+
+    def _read_drop_dir(self):
+        chunks = []
+        processed = os.path.join(self.drop_dir, PROCESSED_DIR)
+        for path in sorted(glob.glob(os.path.join(self.drop_dir, '*.csv'))):
+            chunks.append(self._parse(path))
+            os.makedirs(processed, exist_ok=True)
+            shutil.move(path, os.path.join(processed, os.path.basename(path)))
+        return chunks
+
+    def poll(self):
+        """Incorpora ações novas; devolve ``True`` quando o snapshot mudou."""
+        with self._lock:
+            if os.path.getsize(self.csv_path) < self._offset:
+                # Arquivo reescrito (não apenas anexado): recarrega tudo
+                self._load()
+                return True
+            chunks = [self._read_tail()] + self._read_drop_dir()
+            chunks = [chunk for chunk in chunks if chunk is not None and len(chunk)]
+            for chunk in chunks:
+                self._extend(chunk)
+            return bool(chunks)
+
+    def _extend(self, chunk):
+        start = self._store.n_rows
+        self._store.append(chunk)
+        data = self._store.frame()
+        snapshot = self.snapshot
+        self.snapshot = LiveSnapshot(
+            snapshot.version + 1,
+            data,
+            snapshot.filters.extended(data, start),
+            snapshot.cube.extended(data, start),
+            snapshot.rallies.extended(data, start),
+            snapshot.moments.extended(data, start),
+            snapshot.flows.extended(data, start),
+            snapshot.markov.extended(data, start),
+            snapshot.matches.extended(data, start),
+            snapshot.source,
+        )
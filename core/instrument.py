@@ -0,0 +1,241 @@
+"""Instrumentação opcional dos blocos de preparo de dados e gráficos.
+
+Cada página chama ``begin_run`` no início e ``panel`` no fim; entre os dois,
+``block(nome)`` mede um trecho (tempo, linhas processadas, acerto ou falta de
+cache e pico de memória alocada acima do início do bloco). ``memoized`` e
+``plotly_chart`` já abrem seus blocos; as funções com ``st.cache_resource``
+chamam ``cache_miss()`` no corpo, que só roda quando o cache falha.
+
+Desligada (o padrão), ``block`` devolve um objeto nulo compartilhado: o custo
+é a leitura de um atributo da thread do rerun. Ligada pelo toggle da sidebar (ou
+``INSTRUMENTACAO=1``), a memória é medida com ``tracemalloc`` só enquanto há
+algum bloco aberto no processo: o rastreamento começa no primeiro bloco e
+para quando o último fecha. Como o ``tracemalloc`` vale para o processo
+inteiro, um bloco que se sobrepõe a blocos de outra thread fica sem pico
+(``mem_peak_kb`` nulo) em vez de misturar as alocações das duas sessões.
+Cada rerun é anexado em JSON lines a ``INSTRUMENT_LOG``; reruns só de um
+fragmento somam seus blocos ao rerun da página e saem no próximo registro.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+
+import pandas as pd
+import streamlit as st
+
+INSTRUMENT_LOG = os.environ.get('INSTRUMENTACAO_LOG', os.path.join('.cache', 'instrumentacao.jsonl'))
+ENV_ENABLED = os.environ.get('INSTRUMENTACAO') == '1'
+STATE_KEY = '_instrumentacao'
+
+# Estado do rerun em andamento, guardado também na thread que executa o script
+# (evita ir à session state em cada bloco); reruns de fragmento em outra
+# thread o recuperam da session state
+_current = threading.local()
+
+# Blocos abertos no processo (todas as sessões) e quantas vezes um bloco abriu
+# com blocos de outra thread abertos; ``_owns_tracing``: o rastreamento foi
+# ligado aqui (um ``tracemalloc`` ligado de fora não é desligado)
+_lock = threading.Lock()
+_open_blocks = 0
+_overlaps = 0
+_owns_tracing = False
+
+
+class _NullBlock:
+    """Bloco da instrumentação desligada: aceita e descarta tudo."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+NULL_BLOCK = _NullBlock()
+
+
+class Block:
+    __slots__ = ('name', 'rows', 'cache', 'depth', 'wall_ms', 'mem_peak_kb',
+                 '_state', '_start', '_mem_start', '_child_peak', '_overlap')
+
+    def __init__(self, state, name, rows, cache):
+        self._state = state
+        self.name = name
+        self.rows = rows
+        self.cache = cache
+        self.depth = len(state['stack'])
+        self.wall_ms = None
+        self.mem_peak_kb = None
+
+    def __enter__(self):
+        global _open_blocks, _overlaps, _owns_tracing
+        stack = self._state['stack']
+        with _lock:
+            if _open_blocks > len(stack):
+                # Há blocos de outra thread abertos: o pico é do processo, não deste bloco
+                _overlaps += 1
+                self._overlap = None
+            else:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _owns_tracing = True
+                if stack:
+                    # O pico do bloco de fora até aqui é guardado antes de zerar o contador
+                    stack[-1]._child_peak = max(stack[-1]._child_peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.reset_peak()
+                self._overlap = _overlaps
+            _open_blocks += 1
+            self._mem_start = tracemalloc.get_traced_memory()[0]
+        self._child_peak = 0
+        stack.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        global _open_blocks, _owns_tracing
+        self.wall_ms = (time.perf_counter() - self._start) * 1000
+        with _lock:
+            if self._overlap == _overlaps:
+                peak = max(tracemalloc.get_traced_memory()[1], self._child_peak)
+                self.mem_peak_kb = max(peak - self._mem_start, 0) / 1024
+            _open_blocks -= 1
+            if not _open_blocks and _owns_tracing:
+                tracemalloc.stop()
+                _owns_tracing = False
+        self._state['stack'].pop()
+        self._state['records'].append(self.record())
+        return False
+
+    def record(self):
+        return {
+            'block': self.name,
+            'depth': self.depth,
+            'wall_ms': round(self.wall_ms, 3),
+            'rows': self.rows,
+            'cache': self.cache,
+            'mem_peak_kb': None if self.mem_peak_kb is None else round(self.mem_peak_kb, 1),
+        }
+
+
+def enabled():
+    return ENV_ENABLED or st.session_state.get('instrumentacao', False)
+
+
+def _state():
+    try:
+        return _current.state
+    except AttributeError:
+        return st.session_state.get(STATE_KEY)
+
+
+def begin_run(page):
+    """Começa a medição de um rerun da página (descarta a do rerun anterior)."""
+    if not enabled():
+        st.session_state.pop(STATE_KEY, None)
+        _current.state = None
+        return
+    previous = st.session_state.get(STATE_KEY)
+    if previous:
+        # Blocos de reruns de fragmento depois do último painel
+        export_jsonl(records()[previous['exported']:])
+    _current.state = st.session_state[STATE_KEY] = {
+        'session': previous['session'] if previous else uuid.uuid4().hex[:12],
+        'run': previous['run'] + 1 if previous else 1,
+        'page': page,
+        'started': time.time(),
+        'stack': [],
+        'records': [],
+        'exported': 0,
+    }
+
+
+def block(name, rows=None, cache=None):
+    """Contexto que mede um trecho; ``rows`` e ``cache`` podem ser preenchidos dentro dele."""
+    state = _state()
+    if state is None:
+        return NULL_BLOCK
+    return Block(state, name, rows, cache)
+
+
+def cache_miss():
+    """Marca o bloco aberto como falta de cache (chamada no corpo das funções em cache)."""
+    state = _state()
+    if state is not None and state['stack']:
+        state['stack'][-1].cache = 'miss'
+
+
+def _points(trace):
+    # Pontos de um traço: o primeiro array presente (pizza usa values, sankey os links)
+    for prop in ('x', 'values', 'y', 'z'):
+        values = getattr(trace, prop, None)
+        if values is not None:
+            return len(values)
+    link = getattr(trace, 'link', None)
+    return len(link.value) if link is not None and link.value is not None else 0
+
+
+def plotly_chart(fig, name, **kwargs):
+    """``st.plotly_chart`` medido (a serialização da figura acontece aqui); linhas = pontos."""
+    kwargs.setdefault('use_container_width', True)
+    if _state() is None:
+        return st.plotly_chart(fig, **kwargs)
+    with block(f'{name}/render') as b:
+        b.rows = sum(_points(trace) for trace in fig.data)
+        return st.plotly_chart(fig, **kwargs)
+
+
+def records():
+    """Registros do rerun atual, com sessão, rerun e página."""
+    state = _state()
+    if state is None:
+        return []
+    meta = {'ts': round(state['started'], 3), 'session': state['session'], 'run': state['run'], 'page': state['page']}
+    return [{**meta, **record} for record in state['records']]
+
+
+def export_jsonl(rows, path=INSTRUMENT_LOG):
+    """Anexa os registros em JSON lines (um objeto por bloco)."""
+    if not rows:
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+def panel():
+    """Painel na sidebar com os blocos deste rerun; também grava o rerun em ``INSTRUMENT_LOG``."""
+    rows = records()
+    if not rows:
+        return
+    state = _state()
+    export_jsonl(rows[state['exported']:])
+    state['exported'] = len(rows)
+    table = pd.DataFrame(rows)
+    table['block'] = ['  ' * d + b for d, b in zip(table['depth'], table['block'])]
+    with st.sidebar.expander("🩺 Instrumentação deste rerun", expanded=True):
+        total = table.loc[table['depth'] == 0, 'wall_ms'].sum()
+        st.caption(f"Rerun {rows[0]['run']} · {len(rows)} blocos · {total:.1f} ms medidos")
+        st.dataframe(
+            table[['block', 'wall_ms', 'rows', 'cache', 'mem_peak_kb']],
+            hide_index=True,
+            column_config={
+                'block': 'Bloco', 'wall_ms': 'ms', 'rows': 'Linhas',
+                'cache': 'Cache', 'mem_peak_kb': 'Pico (KB)',
+            },
+        )
+        st.download_button(
+            "⬇️ JSON lines",
+            data='\n'.join(json.dumps(row, ensure_ascii=False) for row in rows) + '\n',
+            file_name=f"instrumentacao-{rows[0]['session']}-{rows[0]['run']}.jsonl",
+            mime='application/x-ndjson',
+        )
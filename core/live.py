@@ -0,0 +1,56 @@
+"""Modo ao vivo no Streamlit: um ``LiveDataset`` por processo, atualizado por sondagem.
+
+``index.py`` lê o snapshot com ``live_snapshot()`` e as páginas chamam
+``sync_session()``, que publica o snapshot mais recente na session state.
+Em ambos os casos ``watch()`` registra um fragmento que procura ações novas a
+cada segundo e reexecuta a página quando a versão muda.
+"""
+
+import streamlit as st
+
+from core.ingest import LiveDataset
+
+POLL_INTERVAL = 1.0
+
+
+@st.cache_resource
+def get_live_dataset(csv_path):
+    return LiveDataset(csv_path)
+
+
+def live_snapshot(csv_path):
+    live = get_live_dataset(csv_path)
+    live.poll()
+    return live.snapshot
+
+
+def watch(csv_path, version):
+    """Reexecuta a página quando o dataset ao vivo passar da versão exibida."""
+    live = get_live_dataset(csv_path)
+
+    @st.fragment(run_every=POLL_INTERVAL)
+    def _watch():
+        live.poll()
+        if live.snapshot.version != version:
+            st.rerun()
+
+    _watch()
+
+
+def sync_session():
+    """Nas páginas: troca os dados da session state pelo snapshot ao vivo."""
+    if not st.session_state.get('modo_ao_vivo'):
+        return
+    csv_path = st.session_state.caminho_dados
+    snapshot = live_snapshot(csv_path)
+    st.session_state.dados = snapshot.data
+    st.session_state.chave_dados = ('ao_vivo', snapshot.source, snapshot.version)
+    st.session_state.indice_filtros = snapshot.filters
+    st.session_state.cubo = snapshot.cube
+    st.session_state.indice_ralis = snapshot.rallies
+    st.session_state.momentos = snapshot.moments
+    st.session_state.fluxos = snapshot.flows
+    st.session_state.modelo_ralis = snapshot.markov
+    st.session_state.partidas = snapshot.matches
+    st.session_state.selecao = snapshot.filters.select(snapshot.data, st.session_state.filtros_globais)
+    watch(csv_path, snapshot.version)
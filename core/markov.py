@@ -0,0 +1,153 @@
+"""Modelo de Markov do rali: probabilidade de vencer o ponto a partir de cada ação.
+
+Cada ação é um estado (time com a bola, fase, tipo de ataque, bloqueadores),
+codificado como inteiro pelo ``CellIndex``. A ação seguinte do mesmo rali é a
+transição; a última ação do rali vai para um estado absorvente "ponto do time
+X". As contagens saem de dois ``bincount`` e são aditivas (o modo ao vivo só
+soma as ações novas); as probabilidades de absorção vêm de um único sistema
+linear ``(I - Q) B = R`` com um estado por combinação presente, não por ação.
+Depois disso, cada consulta é uma leitura de vetor.
+
+O modelo cobre os dados com que foi montado: o app monta um por conjunto de
+partições e um por partida, então esses filtros já estão nas contagens. O
+filtro de times não corta as linhas (um rali alterna ações dos dois times):
+``table`` e ``by_choice`` só escolhem os estados do time com a bola.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from core.cube import CellIndex
+from core.filters import encode_column
+from core.translation import translate_value
+
+# A ação 1 é do time que recebeu o saque (side-out); as demais são contra-ataques
+PHASES = ['Side-out', 'Transição']
+
+MARKOV_DIMENSIONS = ['team_pt', 'phase', 'hit_type_pt', 'num_blockers']
+
+
+def _state_frame(df):
+    transition = df['round'].to_numpy(dtype='float64', na_value=1) > 1
+    return pd.DataFrame({
+        'team_pt': df['team_pt'],
+        'phase': pd.Categorical.from_codes(transition.astype(np.int8), categories=PHASES),
+        'hit_type_pt': df['hit_type_pt'],
+        'num_blockers': df['num_blockers'],
+    }, copy=False)
+
+
+def _grow(matrix, rows, cols):
+    grown = np.zeros((rows, cols), dtype=matrix.dtype)
+    grown[:matrix.shape[0], :matrix.shape[1]] = matrix
+    return grown
+
+
+class RallyMarkov:
+    def __init__(self, df):
+        self.states = CellIndex(MARKOV_DIMENSIONS)
+        self.teams = []
+        self._team_ids = {}
+        self.transitions = np.zeros((0, 0), dtype=np.int64)
+        self.absorptions = np.zeros((0, 0), dtype=np.int64)
+        # Última ação vista: contada como fim de rali até chegar a próxima
+        self._last = None
+        self._append(df, 0)
+
+    def extended(self, df, start):
+        """Novo modelo somando as transições das linhas ``df[start:]`` e resolvendo de novo."""
+        new = copy.copy(self)
+        new.states = self.states.copy()
+        new.teams = list(self.teams)
+        new._team_ids = dict(self._team_ids)
+        new._append(df, start)
+        return new
+
+    def _team_id(self, label):
+        if label not in self._team_ids:
+            self._team_ids[label] = len(self.teams)
+            self.teams.append(label)
+        return self._team_ids[label]
+
+    def _append(self, df, start):
+        if len(df) <= start:
+            return
+        first = max(start - 1, 0)
+        window = df.iloc[first:]
+        ids = self.states.assign(_state_frame(window))
+        codes, labels = encode_column(window['winning_team'])
+        lut = np.array([self._team_id(translate_value(label)) for label in labels] + [-1], dtype=np.int64)
+        winner = lut[codes]
+
+        n_states, n_teams = len(self.states), len(self.teams)
+        transitions = _grow(self.transitions, n_states, n_states)
+        absorptions = _grow(self.absorptions, n_states, n_teams)
+        if first < start and self._last is not None:
+            # A ação que fechava os dados ganhou uma sucessora: sai a absorção provisória
+            absorptions[self._last] -= 1
+
+        rally = window['rally'].to_numpy()
+        same = np.append(rally[1:] == rally[:-1], False)
+        source, target = ids[:-1][same[:-1]], ids[1:][same[:-1]]
+        transitions += np.bincount(
+            source * n_states + target, minlength=n_states * n_states
+        ).reshape(n_states, n_states)
+        ended = ~same & (winner >= 0)
+        absorptions += np.bincount(
+            ids[ended] * n_teams + winner[ended], minlength=n_states * n_teams
+        ).reshape(n_states, n_teams)
+        self._last = (ids[-1], winner[-1]) if winner[-1] >= 0 else None
+
+        self.transitions, self.absorptions = transitions, absorptions
+        self._solve()
+
+    def _solve(self):
+        self.visits = self.transitions.sum(axis=1) + self.absorptions.sum(axis=1)
+        scale = np.where(self.visits > 0, self.visits, 1)[:, None]
+        q = self.transitions / scale
+        r = self.absorptions / scale
+        system = np.eye(len(q)) - q
+        try:
+            self.absorption = np.linalg.solve(system, r)
+        except np.linalg.LinAlgError:
+            self.absorption = np.linalg.lstsq(system, r, rcond=None)[0]
+
+        # Probabilidade de o time com a bola vencer o ponto, por estado
+        team_labels = self.states.labels['team_pt']
+        state_team = np.array([
+            self._team_ids.get(team_labels[position], -1) for position in self.states.cells[:, 0]
+        ], dtype=np.int64)
+        probability = np.full(len(state_team), np.nan)
+        known = (state_team >= 0) & (self.visits > 0)
+        probability[known] = self.absorption[np.flatnonzero(known), state_team[known]]
+        self.win_probability = probability
+
+    def probability(self, team, phase, hit_type, num_blockers):
+        """Probabilidade de ``team`` vencer o ponto a partir do estado (``NaN`` se nunca visto)."""
+        state = self.states.find(team, phase, hit_type, num_blockers)
+        return np.nan if state is None else self.win_probability[state]
+
+    def table(self, teams=None, min_visits=1):
+        """Estados visitados, com o número de ações e a probabilidade de vitória do time com a bola."""
+        result = pd.DataFrame({
+            dim: [self.states.labels[dim][p] for p in self.states.cells[:, axis]]
+            for axis, dim in enumerate(MARKOV_DIMENSIONS)
+        })
+        result['visits'] = self.visits
+        result['win_probability'] = self.win_probability
+        keep = (result['visits'] >= min_visits) & result['win_probability'].notna()
+        if teams:
+            keep &= result['team_pt'].isin(teams)
+        return result[keep].reset_index(drop=True)
+
+    def by_choice(self, column, teams=None, phase=None):
+        """Probabilidade média de vitória por valor de ``column`` e time, ponderada pelas visitas."""
+        states = self.table(teams)
+        if phase is not None:
+            states = states[states['phase'] == phase]
+        weighted = states.assign(weight=states['visits'] * states['win_probability'])
+        grouped = weighted.groupby(['team_pt', column], dropna=False, sort=True)[['visits', 'weight']].sum()
+        grouped['win_probability'] = grouped['weight'] / grouped['visits']
+        return grouped.drop(columns='weight').reset_index()
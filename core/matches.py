@@ -0,0 +1,162 @@
+"""Partidas do dataset: identificação, índice de intervalos e agregados por partida.
+
+O CSV traz várias partidas em sequência e ``rally`` volta a 1 a cada partida
+nova. A partida de cada linha sai de uma soma acumulada das quedas de
+``rally`` (``match_ids``), e cada partida é um intervalo contíguo de linhas
+``[start, stop)``: selecionar uma partida é fatiar o dataset.
+
+As métricas por (partida, time) são calculadas uma vez por versão dos dados.
+As partidas são divididas em blocos de linhas; em arquivos grandes os blocos
+vão para o pool de processos, com o mesmo resultado do cálculo em série.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from core.filters import encode_column, value_key
+from core.metrics import METRIC_COLUMNS, compute_metrics
+from core.workers import process_pool
+
+# Linhas por bloco de partidas enviado a um processo
+CHUNK_ROWS = 250_000
+# A partir deste número de linhas os blocos vão para o pool de processos
+PARALLEL_ROWS = 2_000_000
+METRIC_INPUTS = ['win_reason', 'lose_reason', 'num_blockers']
+
+
+def match_ids(rally):
+    """Partida (0, 1, ...) de cada posição: uma nova começa quando ``rally`` diminui."""
+    rally = np.asarray(rally)
+    ids = np.zeros(len(rally), dtype=np.int64)
+    if len(rally) > 1:
+        np.cumsum(rally[1:] < rally[:-1], out=ids[1:])
+    return ids
+
+
+def match_label(match):
+    return f"Partida {match + 1}"
+
+
+def _chunk_metrics(frame, groups, width):
+    # Métricas de um bloco de partidas; o grupo codifica (partida, time)
+    metrics = compute_metrics(frame.assign(grupo=groups), 'grupo')
+    index = metrics.index.to_numpy(dtype=np.int64)
+    return metrics.reset_index(drop=True).assign(match=index // width, team=index % width - 1)
+
+
+def _chunks(starts, stops, chunk_rows):
+    # Partidas inteiras em cada bloco, com cerca de ``chunk_rows`` linhas
+    bounds, first = [], 0
+    for i in range(len(starts)):
+        if stops[i] - starts[first] >= chunk_rows or i == len(starts) - 1:
+            bounds.append((first, i + 1))
+            first = i + 1
+    return bounds
+
+
+def match_metrics(df, starts, stops, parallel=None, chunk_rows=CHUNK_ROWS):
+    """Métricas de ``compute_metrics`` por (partida, time) das partidas ``[starts, stops)``.
+
+    Devolve uma linha por par com ações, com as colunas ``match`` (posição
+    em ``starts``) e ``team_pt`` antes das métricas.
+    """
+    team_codes, team_labels = encode_column(df['team_pt'])
+    width = len(team_labels) + 1
+    rows = int(stops[-1] - starts[0]) if len(starts) else 0
+    if parallel is None:
+        parallel = rows >= PARALLEL_ROWS
+    tasks = []
+    for first, last in _chunks(starts, stops, chunk_rows):
+        low, high = starts[first], stops[last - 1]
+        local = match_ids(df['rally'].to_numpy()[low:high]) + first
+        groups = local * width + team_codes[low:high] + 1
+        tasks.append((df[METRIC_INPUTS].iloc[low:high], groups, width))
+    if parallel and len(tasks) > 1:
+        pool = process_pool()
+        parts = [f.result() for f in [pool.submit(_chunk_metrics, *task) for task in tasks]]
+    else:
+        parts = [_chunk_metrics(*task) for task in tasks]
+    if not parts:
+        return pd.DataFrame(columns=['match', 'team_pt'] + METRIC_COLUMNS)
+    result = pd.concat(parts, ignore_index=True)
+    result = result[result['team'] >= 0]
+    result.insert(0, 'team_pt', [team_labels[t] for t in result['team']])
+    result.insert(0, 'match', result.pop('match'))
+    return result.drop(columns='team').reset_index(drop=True)
+
+
+class MatchIndex:
+    def __init__(self, df, parallel=None):
+        self.n_rows = 0
+        self.starts = np.zeros(0, dtype=np.int64)
+        self.stops = np.zeros(0, dtype=np.int64)
+        self.summary = pd.DataFrame(columns=['match', 'start', 'stop', 'rallies', 'actions'])
+        self.metrics = pd.DataFrame(columns=['match', 'team_pt'] + METRIC_COLUMNS)
+        self._append(df, 0, parallel)
+
+    def extended(self, df, start):
+        """Novo índice incluindo as linhas ``df[start:]``.
+
+        Só a última partida (se continua no trecho novo) e as partidas novas
+        são refeitas; as anteriores já estão fechadas.
+        """
+        new = copy.copy(self)
+        new._append(df, start, parallel=False)
+        return new
+
+    def _append(self, df, start, parallel=None):
+        rally = df['rally'].to_numpy()
+        kept = len(self.starts)
+        if kept and 0 < start < len(df) and rally[start] >= rally[start - 1]:
+            kept -= 1
+        segment_start = self.starts[kept] if kept < len(self.starts) else start
+        ids = match_ids(rally[segment_start:])
+        n_new = int(ids[-1]) + 1 if len(ids) else 0
+
+        first = np.flatnonzero(np.diff(ids, prepend=-1)) + segment_start
+        starts = first[:n_new]
+        stops = np.append(starts[1:], len(df))
+        # Ralis por partida: mudanças de ``rally`` dentro de cada intervalo
+        changes = np.ones(len(df) - segment_start, dtype=np.int64)
+        changes[1:] = rally[segment_start + 1:] != rally[segment_start:-1]
+        rallies = np.add.reduceat(changes, starts - segment_start) if n_new else np.zeros(0, dtype=np.int64)
+        summary = pd.DataFrame({
+            'match': np.arange(kept, kept + n_new),
+            'start': starts,
+            'stop': stops,
+            'rallies': rallies,
+            'actions': stops - starts,
+        })
+        self.summary = pd.concat([self.summary.iloc[:kept], summary], ignore_index=True) if kept else summary
+        self.starts = self.summary['start'].to_numpy(dtype=np.int64)
+        self.stops = self.summary['stop'].to_numpy(dtype=np.int64)
+        self.n_rows = len(df)
+
+        metrics = match_metrics(df, starts, stops, parallel)
+        metrics['match'] += kept
+        old = self.metrics[self.metrics['match'] < kept]
+        self.metrics = pd.concat([old, metrics], ignore_index=True) if len(old) else metrics
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def labels(self):
+        return [match_label(m) for m in range(len(self))]
+
+    def bounds(self, match):
+        """Intervalo de linhas ``(start, stop)`` da partida."""
+        return int(self.starts[match]), int(self.stops[match])
+
+    def match_of_rows(self, rows):
+        """Partida de cada linha (posições ordenadas ou não)."""
+        return np.searchsorted(self.starts, rows, side='right') - 1
+
+    def team_metrics(self, teams=None):
+        """Métricas por (partida, time), restritas aos times indicados (vazio = todos)."""
+        if teams is None or len(teams) == 0:
+            return self.metrics
+        keys = {value_key(t) for t in teams}
+        return self.metrics[self.metrics['team_pt'].isin(keys)]
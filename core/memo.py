@@ -0,0 +1,131 @@
+"""Memoização de agregados e figuras das páginas, compartilhada entre sessões.
+
+A chave é (versão dos dados, filtros globais, filtros da página, id do
+gráfico). O valor é o que a função de cálculo devolve: uma figura Plotly
+pronta, uma tabela agregada ou ``None``. Uma visita repetida ao mesmo estado
+de filtros não executa pandas nem Plotly. O cache é um LRU limitado pelo
+tamanho estimado dos valores (figuras contam pelo tamanho do JSON).
+"""
+
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from core.charts import payload_bytes
+from core.cube import IncrementalSum
+from core.instrument import NULL_BLOCK, block, cache_miss
+
+MAX_BYTES = 128 * 1024 * 1024
+
+
+def freeze(selections):
+    """Versão imutável e ordenada de um dicionário de seleções, usada em chaves."""
+    frozen = []
+    for name, value in sorted((selections or {}).items()):
+        if isinstance(value, (list, tuple, set)):
+            value = tuple(sorted(map(str, value)))
+        frozen.append((name, value if isinstance(value, (int, float, bool, type(None))) else str(value)))
+    return tuple(frozen)
+
+
+def _size_of(value):
+    if isinstance(value, go.Figure):
+        return payload_bytes(value)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, tuple):
+        return sum(_size_of(v) for v in value)
+    return 64
+
+
+class MemoCache:
+    """LRU thread-safe com limite de bytes."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+        # O cálculo roda fora do lock; duas sessões podem calcular a mesma chave
+        value = compute()
+        size = _size_of(value)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self.total_bytes += size
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+
+@st.cache_resource
+def shared_cache():
+    return MemoCache()
+
+
+def memoized(chart_id, page_selections, compute):
+    """Valor de ``compute()`` para o estado atual de filtros, reaproveitado entre reruns e sessões.
+
+    ``page_selections`` deve conter tudo o que, além dos filtros globais, muda o
+    resultado (filtros da página e widgets do próprio gráfico). Figuras vindas do
+    cache são compartilhadas: não devem ser alteradas depois de devolvidas.
+    """
+    key = (
+        st.session_state.chave_dados,
+        freeze(st.session_state.filtros_globais),
+        freeze(page_selections),
+        chart_id,
+    )
+    measured = block(chart_id, cache='hit')
+    if measured is NULL_BLOCK:
+        return shared_cache().get(key, compute)
+
+    def compute_measured():
+        # Só roda quando a chave falta no cache; as linhas são as da seleção global
+        # (sem seleção em memória no backend SQLite)
+        cache_miss()
+        selecao = st.session_state.selecao
+        measured.rows = None if selecao is None else len(selecao)
+        return compute()
+
+    with measured:
+        return shared_cache().get(key, compute_measured)
+
+
+def incremental(aggregate_id, cube, dims, *selections):
+    """``cube.reduce(dims, *selections)`` atualizado por delta a partir da última chamada da sessão.
+
+    Cada sessão guarda um ``IncrementalSum`` por agregado; trocar de cubo
+    (nova versão dos dados) começa do zero. O array devolvido não deve ser
+    alterado.
+    """
+    aggregates = st.session_state.setdefault('agregados', {})
+    aggregate = aggregates.get(aggregate_id)
+    # Na instrumentação, 'delta' é uma atualização a partir da chamada anterior
+    with block(aggregate_id, cache='delta') as measured:
+        if aggregate is None or aggregate.cube is not cube:
+            measured.cache = 'miss'
+            aggregate = aggregates[aggregate_id] = IncrementalSum(cube, dims)
+        return aggregate.update(*selections)
@@ -0,0 +1,108 @@
+"""Métricas de eficiência agrupadas, calculadas em uma passada vetorizada.
+
+Cada linha recebe um código de resultado que combina a posição de
+``win_reason``, a de ``lose_reason`` e a presença de ``num_blockers``
+(tabelas de consulta sobre as categorias). A contagem por grupo é um único
+``np.bincount`` sobre ``grupo * n_resultados + resultado``.
+"""
+
+import numpy as np
+import pandas as pd
+
+from core.filters import encode_column
+
+# Métrica -> (coluna, valor)
+OUTCOMES = {
+    'kills': ('win_reason', 'kill'),
+    'tools': ('win_reason', 'tool'),
+    'aces': ('win_reason', 'ace'),
+    'blocks': ('win_reason', 'blocked'),
+    'errors': ('lose_reason', 'hit_error'),
+    'serve_errors': ('lose_reason', 'serve_error'),
+}
+
+METRIC_COLUMNS = list(OUTCOMES) + ['defensive_actions', 'total', 'efficiency']
+
+# Eixos do cubo usados por ``cube_metrics``, depois do eixo do grupo
+CUBE_AXES = ['win_reason', 'lose_reason', 'num_blockers']
+
+
+def _slot_codes(values, slots):
+    # Código da categoria -> posição do resultado; "nenhum" fica na última posição
+    codes, labels = encode_column(values)
+    lut = np.full(len(labels) + 1, len(slots), dtype=np.int32)
+    for slot, label in enumerate(slots):
+        if label in labels:
+            lut[labels.index(label)] = slot
+    return lut[codes]
+
+
+def outcome_flags(df, name):
+    """Indicador 0/1 por linha de uma das contagens de ``compute_metrics``."""
+    if name == 'total':
+        return np.ones(len(df), dtype=np.int8)
+    if name == 'defensive_actions':
+        return df['num_blockers'].notna().to_numpy().view(np.int8)
+    column, value = OUTCOMES[name]
+    return (df[column] == value).to_numpy(dtype=bool).view(np.int8)
+
+
+def compute_metrics(df, by):
+    """Kills, erros, tools, aces, erros de saque, bloqueios, total e eficiência por grupo."""
+    group_codes, labels = encode_column(df[by])
+    n_groups = len(labels)
+    win_metrics = [m for m, (col, _) in OUTCOMES.items() if col == 'win_reason']
+    lose_metrics = [m for m, (col, _) in OUTCOMES.items() if col == 'lose_reason']
+    n_win, n_lose = len(win_metrics) + 1, len(lose_metrics) + 1
+
+    win = _slot_codes(df['win_reason'], [OUTCOMES[m][1] for m in win_metrics])
+    lose = _slot_codes(df['lose_reason'], [OUTCOMES[m][1] for m in lose_metrics])
+    if 'num_blockers' in df.columns:
+        blockers = df['num_blockers'].notna().to_numpy().view(np.int8)
+    else:
+        blockers = np.zeros(len(df), dtype=np.int8)
+
+    # Grupo ausente (-1) vai para a linha 0, descartada no fim
+    width = n_win * n_lose * 2
+    key = (group_codes.astype(np.int32) + 1) * width + (win * n_lose + lose) * 2 + blockers
+    counts = np.bincount(key, minlength=(n_groups + 1) * width)
+    counts = counts.reshape(n_groups + 1, n_win, n_lose, 2)[1:]
+
+    by_win = counts.sum(axis=(2, 3))
+    by_lose = counts.sum(axis=(1, 3))
+    result = pd.DataFrame(index=pd.Index(labels, name=by))
+    for name in OUTCOMES:
+        if name in win_metrics:
+            result[name] = by_win[:, win_metrics.index(name)]
+        else:
+            result[name] = by_lose[:, lose_metrics.index(name)]
+    result['defensive_actions'] = counts[..., 1].sum(axis=(1, 2))
+    result['total'] = counts.sum(axis=(1, 2, 3))
+    result = result[result['total'] > 0]
+    return result.assign(efficiency=(result['kills'] - result['errors']) / result['total'] * 100)
+
+
+def cube_metrics(counts, labels, by):
+    """As métricas de ``compute_metrics`` a partir das somas do cubo.
+
+    ``counts`` tem eixos ``[by] + CUBE_AXES`` (``CountCube.reduce`` ou
+    ``IncrementalSum``) e ``labels`` são os rótulos do cubo.
+    """
+    # Tudo em numpy; o DataFrame é montado uma vez no fim
+    by_win = counts.sum(axis=(2, 3))
+    by_lose = counts.sum(axis=(1, 3))
+    columns = {}
+    for name, (column, value) in OUTCOMES.items():
+        sums = by_win if column == 'win_reason' else by_lose
+        if value in labels[column]:
+            columns[name] = sums[:, labels[column].index(value)]
+        else:
+            columns[name] = np.zeros(len(counts), dtype=np.int64)
+    blockers = np.array([label is not None for label in labels['num_blockers']], dtype=bool)
+    columns['defensive_actions'] = counts[..., blockers].sum(axis=(1, 2, 3))
+    columns['total'] = counts.sum(axis=(1, 2, 3))
+    keep = np.array([label is not None for label in labels[by]], dtype=bool) & (columns['total'] > 0)
+    columns = {name: values[keep] for name, values in columns.items()}
+    columns['efficiency'] = (columns['kills'] - columns['errors']) / columns['total'] * 100
+    index = pd.Index([label for label, k in zip(labels[by], keep) if k], name=by)
+    return pd.DataFrame(columns, index=index)
@@ -0,0 +1,115 @@
+"""Estatísticas suficientes das colunas numéricas, por célula de filtros.
+
+Para cada combinação presente de time, tipo de ataque, tipo de saque,
+bloqueadores e motivos de vitória/derrota são guardados, para cada par de
+colunas (i, j): o número de linhas com as duas preenchidas, a soma de i e de
+i² nessas linhas e a soma de i·j. Essas estatísticas são aditivas: somar as
+células de uma seleção dá a matriz de correlação (com a mesma exclusão par a
+par de ausentes do ``DataFrame.corr``) e as médias em O(colunas²), sem tocar
+nas linhas.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from core.cube import CellIndex
+
+MOMENT_DIMENSIONS = [
+    'team_pt', 'hit_type_pt', 'serve_type_pt', 'num_blockers',
+    'win_reason', 'lose_reason',
+]
+
+# Índices do segundo eixo de ``stats``
+_COUNT, _SUM, _SUMSQ, _CROSS = range(4)
+
+
+def _moments(values, present):
+    # (4, k, k) para um bloco de linhas; valores ausentes já zerados
+    mask = present.astype(np.float64)
+    return np.stack([
+        mask.T @ mask,
+        values.T @ mask,
+        (values * values).T @ mask,
+        values.T @ values,
+    ])
+
+
+class MomentCube:
+    def __init__(self, df, dimensions=MOMENT_DIMENSIONS, columns=None):
+        self.dimensions = list(dimensions)
+        if columns is None:
+            columns = df.select_dtypes(include=['number']).columns
+        self.columns = list(columns)
+        # Valores guardados deslocados por uma referência fixa por coluna, o
+        # que evita cancelamento em soma² - soma²/n (a correlação não muda)
+        self.shift = np.array([
+            0.0 if df[col].isna().all() else float(np.round(df[col].mean())) for col in self.columns
+        ])
+        self.cells = CellIndex(self.dimensions)
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.stats = np.zeros((0, 4, len(self.columns), len(self.columns)))
+        self._append(df, 0)
+
+    def extended(self, df, start):
+        """Novo cubo somando as linhas ``df[start:]`` às estatísticas atuais."""
+        new = copy.copy(self)
+        new.cells = self.cells.copy()
+        new._append(df, start)
+        return new
+
+    def _append(self, df, start):
+        chunk = df.iloc[start:]
+        if not len(chunk):
+            return
+        # Células novas entram no fim; as existentes acumulam
+        cell_ids = self.cells.assign(chunk)
+        k, added = len(self.columns), len(self.cells) - len(self.rows)
+        self.rows = np.concatenate([self.rows, np.zeros(added, dtype=np.int64)])
+        self.stats = np.concatenate([self.stats, np.zeros((added, 4, k, k))])
+
+        values = np.column_stack([
+            chunk[col].to_numpy(dtype='float64', na_value=np.nan) for col in self.columns
+        ]) if k else np.zeros((len(chunk), 0))
+        present = ~np.isnan(values)
+        values = np.where(present, values - self.shift, 0.0)
+
+        # Linhas agrupadas por célula: um produto de matrizes por célula
+        order = np.argsort(cell_ids, kind='stable')
+        values, present = values[order], present[order]
+        sizes = np.bincount(cell_ids, minlength=len(self.cells))
+        bounds = np.concatenate([[0], np.cumsum(sizes)])
+        self.rows += sizes
+        for cell in np.flatnonzero(sizes):
+            rows = slice(bounds[cell], bounds[cell + 1])
+            self.stats[cell] += _moments(values[rows], present[rows])
+
+    def _merged(self, selections):
+        selected = self.cells.selected(selections)
+        return int(self.rows[selected].sum()), self.stats[selected].sum(axis=0)
+
+    def count(self, *selections):
+        """Número de linhas que satisfazem todas as seleções."""
+        return self._merged(selections)[0]
+
+    def mean(self, column, *selections):
+        """Média da coluna (ignorando ausentes) nas linhas da seleção."""
+        i = self.columns.index(column)
+        _, stats = self._merged(selections)
+        n = stats[_COUNT, i, i]
+        return stats[_SUM, i, i] / n + self.shift[i] if n else np.nan
+
+    def corr(self, *selections):
+        """Matriz de correlação de Pearson, como ``DataFrame.corr()`` sobre as linhas da seleção."""
+        _, stats = self._merged(selections)
+        n = stats[_COUNT]
+        sums, sumsq = stats[_SUM], stats[_SUMSQ]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # sums[i, j]: soma de i nas linhas com i e j presentes; sums.T é a de j
+            cov = stats[_CROSS] - sums * sums.T / n
+            var = sumsq - sums * sums / n
+            divisor = np.sqrt(var * var.T)
+            result = np.where((n > 0) & (divisor > 0), cov / divisor, np.nan)
+        result = np.clip(result, -1, 1)
+        return pd.DataFrame(result, index=self.columns, columns=self.columns)
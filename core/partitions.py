@@ -0,0 +1,159 @@
+"""Dataset particionado por temporada e competição, com manifesto.
+
+Layout (cada partição usa o mesmo formato colunar do cache em ``.cache/``)::
+
+    dados/
+        manifest.json
+        season=2023-2024/competition=liga-universitaria-feminina/
+            meta.json  rally.npy  team.npy  ...
+
+O manifesto lista temporada, competição, caminho, número de linhas e times de
+cada partição, e o resultado da validação na importação (mapeamento de colunas
+e linhas em quarentena, que não entram na partição). A seleção de partições
+lê só o manifesto; o carregamento mapeia apenas as partições pedidas (todas
+as colunas: a página do dataset mostra e exporta todas).
+
+Importar um CSV (substitui a partição da mesma temporada/competição)::
+
+    python -m core.partitions dataset_full.csv --season 2023-2024 \\
+        --competition "Liga Universitária Feminina"
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+import unicodedata
+
+import pandas as pd
+
+from core.storage import file_signature, read_columns, read_csv_typed, write_columns, write_json
+from core.validation import validate
+
+PARTITION_ROOT = 'dados'
+MANIFEST_NAME = 'manifest.json'
+
+
+def _slug(value):
+    value = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '-', value.lower()).strip('-')
+
+
+def manifest_path(root=PARTITION_ROOT):
+    return os.path.join(root, MANIFEST_NAME)
+
+
+def manifest_version(root=PARTITION_ROOT):
+    """Chave da versão do manifesto para os caches do Streamlit (``None`` sem manifesto)."""
+    path = manifest_path(root)
+    if not os.path.exists(path):
+        return None
+    sig = file_signature(path)
+    return f"{sig['size']}-{sig['mtime_ns']}"
+
+
+def read_manifest(root=PARTITION_ROOT):
+    try:
+        with open(manifest_path(root)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_partition(df, season, competition, root=PARTITION_ROOT, validation=None):
+    """Grava a partição da temporada/competição e atualiza o manifesto."""
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(f'season={_slug(season)}', f'competition={_slug(competition)}')
+    target = os.path.join(root, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    staging = tempfile.mkdtemp(dir=os.path.dirname(target), prefix='.build-')
+    try:
+        write_json(os.path.join(staging, 'meta.json'), {'rows': len(df), 'columns': write_columns(df, staging)})
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    entry = {
+        'season': str(season),
+        'competition': str(competition),
+        'path': path,
+        'rows': len(df),
+        'teams': sorted(str(t) for t in df['team'].dropna().unique()),
+    }
+    if validation is not None:
+        entry['validation'] = validation
+    manifest = read_manifest(root) or {'partitions': []}
+    partitions = [p for p in manifest['partitions'] if p['path'] != path] + [entry]
+    manifest['partitions'] = sorted(partitions, key=lambda p: (p['season'], p['competition']))
+    write_json(manifest_path(root), manifest)
+    return entry
+
+
+def import_csv(csv_path, season, competition, root=PARTITION_ROOT):
+    df, _, report = validate(read_csv_typed(csv_path))
+    return write_partition(df, season, competition, root, validation=report)
+
+
+def partition_options(manifest, key, within=None):
+    """Valores distintos de ``key`` (``season``/``competition``) nas partições selecionadas."""
+    partitions = select_partitions(manifest, **(within or {}))
+    return sorted({p[key] for p in partitions})
+
+
+def select_partitions(manifest, seasons=None, competitions=None):
+    """Partições do manifesto que atendem à seleção (lista vazia = sem filtro)."""
+    selected = []
+    for entry in manifest['partitions']:
+        if seasons and entry['season'] not in seasons:
+            continue
+        if competitions and entry['competition'] not in competitions:
+            continue
+        selected.append(entry)
+    return selected
+
+
+def load_partitions(paths, root=PARTITION_ROOT):
+    """Concatena as partições indicadas.
+
+    Uma única partição é devolvida sem cópia (colunas mapeadas do disco); com
+    várias, só as selecionadas são copiadas para a memória.
+    """
+    frames = []
+    for path in paths:
+        target = os.path.join(root, path)
+        with open(os.path.join(target, 'meta.json')) as f:
+            meta = json.load(f)
+        frames.append(read_columns(target, meta))
+    if len(frames) == 1:
+        return frames[0]
+    if not frames:
+        return pd.DataFrame()
+    # Categorias de partições diferentes são unificadas antes de concatenar
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            categories = sorted(set().union(*(frame[col].cat.categories for frame in frames)))
+            for frame in frames:
+                frame[col] = frame[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importa um CSV de ações como partição do dataset.')
+    parser.add_argument('csv')
+    parser.add_argument('--season', required=True)
+    parser.add_argument('--competition', required=True)
+    parser.add_argument('--root', default=PARTITION_ROOT)
+    args = parser.parse_args()
+    entry = import_csv(args.csv, args.season, args.competition, args.root)
+    print(f"{entry['rows']} linhas em {os.path.join(args.root, entry['path'])} "
+          f"({entry['validation']['quarantined']} em quarentena)")
+
+
+if __name__ == '__main__':
+    main()
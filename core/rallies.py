@@ -0,0 +1,235 @@
+"""Índice de ralis e tabela-resumo por rali.
+
+As linhas chegam agrupadas por rali, com ``round`` crescente: cada rali é um
+intervalo contíguo ``[start, stop)``. O índice guarda esses intervalos, um
+resumo por rali e somas parciais por (rali, time), de modo que seleções de
+rali são fatias e os gráficos por rali não varrem as ações.
+
+O número do rali recomeça a cada partida; ``matches`` guarda a partida de
+cada rali do índice (``core.matches.match_ids`` sobre os números).
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from core.buffers import GrowableArray
+from core.filters import encode_column, value_key
+from core.matches import match_ids
+
+# Campos agregáveis por rali: valor numérico por linha (NaN = sem registro)
+RALLY_FIELDS = {
+    'actions': lambda df: np.ones(len(df)),
+    'round': lambda df: df['round'].to_numpy(dtype='float64', na_value=np.nan),
+    'kills': lambda df: (df['win_reason'] == 'kill').to_numpy(dtype='float64'),
+    'errors': lambda df: (df['lose_reason'] == 'hit_error').to_numpy(dtype='float64'),
+    'num_blockers': lambda df: df['num_blockers'].to_numpy(dtype='float64', na_value=np.nan),
+    'block_touch': lambda df: df['block_touch'].map({'yes': 1.0, 'no': 0.0}).to_numpy(dtype='float64', na_value=np.nan),
+}
+
+
+def _pad_columns(table, width):
+    # Times novos (categorias novas) acrescentam colunas zeradas
+    missing = width - table.shape[1]
+    return np.pad(table, ((0, 0), (0, missing))) if missing > 0 else table
+
+
+SUMMARY_CATEGORIES = ['winning_team', 'serving_team', 'serve_type', 'win_reason', 'lose_reason']
+
+
+def _concat_summary(old, new):
+    # Categóricas de trechos diferentes podem ter categorias diferentes
+    if old.empty:
+        return new
+    data = {}
+    for col in new.columns:
+        if col in SUMMARY_CATEGORIES:
+            data[col] = union_categoricals([old[col].array, new[col].array])
+        else:
+            data[col] = np.concatenate([old[col].to_numpy(), new[col].to_numpy()])
+    return pd.DataFrame(data)
+
+
+class RallyIndex:
+    def __init__(self, df):
+        self.n_rows = 0
+        self.starts = np.zeros(0, dtype=np.int64)
+        self.stops = np.zeros(0, dtype=np.int64)
+        self.numbers = np.zeros(0, dtype=np.int64)
+        self.matches = np.zeros(0, dtype=np.int64)
+        self.summary = pd.DataFrame()
+        self.team_labels = []
+        self._run_of_row = GrowableArray(np.zeros(0, dtype=np.int64))
+        self._values = {name: GrowableArray(np.zeros(0)) for name in RALLY_FIELDS}
+        self._team_sums = {name: np.zeros((0, 1)) for name in RALLY_FIELDS}
+        self._team_counts = {name: np.zeros((0, 1), dtype=np.int64) for name in RALLY_FIELDS}
+        self._append(df, 0)
+
+    def extended(self, df, start):
+        """Novo índice incluindo as linhas ``df[start:]``.
+
+        Se o trecho novo continua o último rali, só esse rali é refeito; o custo
+        é o das linhas novas mais as do último rali. Este índice não muda: o
+        novo tem seus próprios dicionários e vetores por linha (que compartilham
+        os dados já escritos e só anexam depois deles).
+        """
+        new = copy.copy(self)
+        new._run_of_row = self._run_of_row.fork()
+        new._values = {name: buffer.fork() for name, buffer in self._values.items()}
+        new._team_sums = dict(self._team_sums)
+        new._team_counts = dict(self._team_counts)
+        new._append(df, start)
+        return new
+
+    def _append(self, df, start):
+        rally = df['rally'].to_numpy()
+        kept = len(self.starts)
+        if kept and start < len(df) and rally[start] == self.numbers[-1]:
+            kept -= 1
+        segment_start = self.starts[kept] if kept < len(self.starts) else start
+        # Linhas do último rali já gravadas nos vetores por linha têm o mesmo
+        # valor: só as linhas novas são anexadas
+        written = self.n_rows - segment_start
+        part = df.iloc[segment_start:]
+        n = len(part)
+
+        boundary = np.ones(n, dtype=bool)
+        boundary[1:] = rally[segment_start + 1:] != rally[segment_start:-1]
+        starts = np.flatnonzero(boundary)
+        stops = np.append(starts[1:], n)
+        last = stops - 1
+        first_team = part['team'].take(starts)
+        summary = pd.DataFrame({
+            'rally': rally[segment_start + starts],
+            'start': segment_start + starts,
+            'stop': segment_start + stops,
+            'actions': stops - starts,
+            'winning_team': part['winning_team'].take(last).array,
+            # A ação 1 é registrada para o time que recebe: quem saca é o outro
+            'serving_team': first_team.map({'a': 'b', 'b': 'a'}).astype('category').array,
+            'serve_type': part['serve_type'].take(starts).array,
+            'win_reason': part['win_reason'].take(last).array,
+            'lose_reason': part['lose_reason'].take(last).array,
+        })
+        self.summary = _concat_summary(self.summary.iloc[:kept], summary)
+        self.starts = self.summary['start'].to_numpy()
+        self.stops = self.summary['stop'].to_numpy()
+        self.numbers = self.summary['rally'].to_numpy()
+        self.matches = match_ids(self.numbers)
+        self.n_rows = len(df)
+
+        # Rali de cada linha, para agregar seleções arbitrárias de linhas
+        local_run = np.cumsum(boundary, dtype=np.int64) - 1
+        self._run_of_row.append(local_run[written:] + kept)
+        self.run_of_row = self._run_of_row.view()
+
+        # Somas e contagens parciais por (rali, time)
+        team_codes, self.team_labels = encode_column(part['team_pt'])
+        width = len(self.team_labels) + 1
+        key = local_run * width + (team_codes + 1)
+        size = len(starts) * width
+        self.values = {}
+        for name, extract in RALLY_FIELDS.items():
+            values = extract(part)
+            self._values[name].append(values[written:])
+            self.values[name] = self._values[name].view()
+            valid = ~np.isnan(values)
+            sums = np.bincount(key[valid], weights=values[valid], minlength=size).reshape(-1, width)
+            counts = np.bincount(key[valid], minlength=size).reshape(-1, width)
+            self._team_sums[name] = np.vstack([_pad_columns(self._team_sums[name][:kept], width), sums])
+            self._team_counts[name] = np.vstack([_pad_columns(self._team_counts[name][:kept], width), counts])
+
+    def __len__(self):
+        return len(self.starts)
+
+    def runs(self, number=None, low=None, high=None):
+        """Ralis (posições no índice) com o número dado ou dentro do intervalo."""
+        if number is not None:
+            low = high = number
+        mask = np.ones(len(self.starts), dtype=bool)
+        if low is not None:
+            mask &= self.numbers >= low
+        if high is not None:
+            mask &= self.numbers <= high
+        return np.flatnonzero(mask)
+
+    def rows(self, runs, rows=None, limit=None):
+        """Linhas dos ralis indicados, opcionalmente restritas a uma seleção ordenada."""
+        chunks, total = [], 0
+        for run in runs:
+            start, stop = self.starts[run], self.stops[run]
+            if rows is None:
+                chunk = np.arange(start, stop)
+            else:
+                chunk = rows[np.searchsorted(rows, start):np.searchsorted(rows, stop)]
+            chunks.append(chunk)
+            total += len(chunk)
+            if limit is not None and total >= limit:
+                break
+        result = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+        return result[:limit] if limit is not None else result
+
+    def _team_columns(self, teams):
+        if teams is None or len(teams) == 0:
+            return slice(None)
+        keys = {value_key(t) for t in teams}
+        return [i + 1 for i, label in enumerate(self.team_labels) if label in keys]
+
+    def runs_present(self, teams=None):
+        """Ralis (posições no índice) com ações dos times indicados."""
+        return np.flatnonzero(self._team_counts['actions'][:, self._team_columns(teams)].sum(axis=1) > 0)
+
+    def numbers_present(self, teams=None):
+        """Números de rali (ordenados, sem repetição) com ações dos times indicados."""
+        return np.unique(self.numbers[self.runs_present(teams)])
+
+    def per_run(self, fields, teams=None, rows=None):
+        """Soma e contagem de cada campo por rali.
+
+        Sem ``rows`` usa as somas parciais por time (custo proporcional ao número
+        de ralis); com ``rows`` agrega apenas as linhas selecionadas.
+        """
+        data = {}
+        if rows is None:
+            columns = self._team_columns(teams)
+            for name in fields:
+                data[f'{name}_sum'] = self._team_sums[name][:, columns].sum(axis=1)
+                data[f'{name}_n'] = self._team_counts[name][:, columns].sum(axis=1)
+        else:
+            run = self.run_of_row[rows]
+            for name in fields:
+                values = self.values[name][rows]
+                valid = ~np.isnan(values)
+                data[f'{name}_sum'] = np.bincount(run[valid], weights=values[valid], minlength=len(self))
+                data[f'{name}_n'] = np.bincount(run[valid], minlength=len(self))
+        return pd.DataFrame(data)
+
+    def per_rally(self, fields, selections, filter_index, low=None, high=None):
+        """Médias e contagens por rali para a seleção de filtros.
+
+        Cada linha do resultado é um rali de uma partida (o mesmo número em
+        partidas diferentes não é somado): ``match`` e ``rally`` o identificam
+        e ``sequence`` é a posição do rali no arquivo, o eixo dos gráficos.
+        Quando só o filtro de times está ativo, lê a tabela-resumo; com filtros
+        de página, agrega as linhas selecionadas pelo índice de bitmaps.
+        """
+        fields = ['actions'] + [f for f in fields if f != 'actions']
+        others = {k: v for k, v in selections.items() if k != 'team_pt'}
+        if filter_index.mask(others) is None:
+            table = self.per_run(fields, teams=selections.get('team_pt'))
+        else:
+            table = self.per_run(fields, rows=filter_index.rows(selections))
+        runs = self.runs(low=low, high=high)
+        runs = runs[table['actions_n'].to_numpy()[runs] > 0]
+        table = table.iloc[runs]
+        result = pd.DataFrame({'sequence': runs + 1, 'match': self.matches[runs] + 1, 'rally': self.numbers[runs]})
+        for name in fields:
+            counts = table[f'{name}_n'].to_numpy()
+            sums = table[f'{name}_sum'].to_numpy()
+            result[name] = counts
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result[f'{name}_mean'] = np.where(counts > 0, sums / counts, np.nan)
+            result[f'{name}_sum'] = sums
+        return result
@@ -0,0 +1,228 @@
+"""Backend SQL embarcado (SQLite) para as agregações do dashboard.
+
+Alternativa ao cubo em memória para as contagens: o CSV é importado em
+blocos (sem carregar o arquivo inteiro) para ``.cache/<nome>.sqlite``
+(tabela ``acoes`` com as colunas originais e as traduzidas, índices nas
+colunas de filtro). Na mesma
+importação o banco agrega ``acoes`` nas dimensões do cubo (``acoes_cubo``: uma
+linha por combinação presente, com a contagem ``n``), de modo que as
+consultas das páginas varrem milhares de linhas, não milhões. Só as linhas
+válidas entram (``core.validation``, mesmo critério do cache colunar).
+
+O ``SqlCube`` responde às mesmas consultas do ``CountCube`` (``count``,
+``table``, ``reduce``) com ``SELECT ... SUM(n) ... GROUP BY``. Só os totais
+agrupados voltam para o pandas; as páginas e o ``IncrementalSum`` funcionam
+sem mudança (um delta vira uma consulta restrita ao valor alterado).
+Contagens com condições sobre colunas fora do cubo (``count_rows``) varrem
+``acoes``. Com esse backend o app não carrega as linhas em memória: as
+páginas que dependem dos índices por linha (filtros de página, ralis,
+momentos, fluxos, partidas) ficam indisponíveis, e o banco não acompanha o
+modo ao vivo.
+
+O banco é reconstruído quando o CSV muda, como o cache colunar::
+
+    python -m core.sqlstore dataset_full.csv
+"""
+
+import argparse
+import contextlib
+import os
+import sqlite3
+import tempfile
+import threading
+
+import numpy as np
+
+from core.cube import CUBE_DIMENSIONS, CountCube
+from core.filters import value_key
+from core.storage import CACHE_DIR, file_hash, file_signature, read_csv_chunks
+from core.translation import MISSING_LABEL, TRANSLATED_COLUMNS, add_translations, translated_dtype
+from core.validation import validate, whole_rallies
+
+TABLE = 'acoes'
+CUBE_TABLE = 'acoes_cubo'
+CHUNK_ROWS = 200_000
+# Muda quando o conteúdo do banco muda para o mesmo CSV (2: linhas validadas;
+# 3: ralis inteiros em cada bloco validado)
+DB_FORMAT = 3
+# Colunas dos filtros das páginas e da sidebar
+INDEXED_COLUMNS = ['team_pt', 'hit_type_pt', 'serve_type_pt', 'num_blockers']
+
+
+def database_path(csv_path, cache_dir=CACHE_DIR):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f'{stem}.sqlite')
+
+
+def write_database(frames, db_path, indexed=INDEXED_COLUMNS, dimensions=CUBE_DIMENSIONS, meta=None):
+    """Grava os blocos de ``frames`` (já traduzidos) em um banco novo, trocado no fim.
+
+    O arquivo é montado ao lado do destino e movido com ``os.replace``:
+    conexões abertas no banco anterior continuam lendo a versão antiga.
+    """
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    fd, staging = tempfile.mkstemp(dir=os.path.dirname(db_path) or '.', prefix='.build-', suffix='.sqlite')
+    os.close(fd)
+    try:
+        with sqlite3.connect(staging) as con:
+            con.execute('PRAGMA journal_mode = OFF')
+            con.execute('PRAGMA synchronous = OFF')
+            rows = 0
+            for frame in frames:
+                frame.to_sql(TABLE, con, if_exists='append' if rows else 'replace', index=False)
+                rows += len(frame)
+            columns = ', '.join(f'"{d}"' for d in dimensions)
+            con.execute(f'CREATE TABLE {CUBE_TABLE} AS SELECT {columns}, COUNT(*) AS n '
+                        f'FROM {TABLE} GROUP BY {columns}')
+            for col in indexed:
+                con.execute(f'CREATE INDEX "idx_{col}" ON {TABLE} ("{col}")')
+                con.execute(f'CREATE INDEX "idx_cubo_{col}" ON {CUBE_TABLE} ("{col}")')
+            con.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+            con.executemany('INSERT INTO meta VALUES (?, ?)',
+                            [(k, str(v)) for k, v in {**(meta or {}), 'rows': rows}.items()])
+            con.execute('ANALYZE')
+        con.close()
+        os.replace(staging, db_path)
+    except BaseException:
+        os.remove(staging)
+        raise
+    return db_path
+
+
+def build_database(csv_path, cache_dir=CACHE_DIR, digest=None, chunksize=CHUNK_ROWS):
+    """Importa o CSV em blocos (com as colunas traduzidas) para o banco do cache."""
+    meta = {**file_signature(csv_path), 'sha256': digest or file_hash(csv_path), 'format': DB_FORMAT, 'quarantined': 0}
+
+    def frames():
+        # Só as linhas válidas entram; o mapeamento de colunas detectado no
+        # primeiro bloco vale para os seguintes. ``meta`` é gravado no fim
+        mapping = None
+        for chunk in whole_rallies(read_csv_chunks(csv_path, chunksize)):
+            valid, quarantine, report = validate(chunk, mapping)
+            mapping = meta['mapping'] = report['mapping']
+            meta['quarantined'] += len(quarantine)
+            yield add_translations(valid)
+
+    return write_database(frames(), database_path(csv_path, cache_dir), meta=meta)
+
+
+def _read_meta(db_path):
+    try:
+        with contextlib.closing(sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)) as con:
+            return dict(con.execute('SELECT key, value FROM meta'))
+    except sqlite3.Error:
+        return None
+
+
+def sql_database(csv_path, cache_dir=CACHE_DIR):
+    """Banco válido para o CSV atual, reconstruindo se necessário."""
+    db_path = database_path(csv_path, cache_dir)
+    meta = _read_meta(db_path)
+    signature = file_signature(csv_path)
+    if meta is not None and meta.get('format') == str(DB_FORMAT) and meta.get('size') == str(signature['size']):
+        if meta.get('mtime_ns') == str(signature['mtime_ns']):
+            return db_path
+        # mtime mudou (checkout, cópia): confere o conteúdo antes de reconstruir
+        digest = file_hash(csv_path)
+        if digest == meta.get('sha256'):
+            return db_path
+        return build_database(csv_path, cache_dir, digest)
+    return build_database(csv_path, cache_dir)
+
+
+class SqlCube(CountCube):
+    """``CountCube`` cujas somas vêm de consultas a ``acoes_cubo``, sem contagens em memória.
+
+    Os rótulos de cada dimensão são lidos uma vez, na ordem das categorias do
+    backend pandas. Cada thread do servidor usa a própria conexão somente
+    leitura.
+    """
+
+    def __init__(self, db_path, dimensions=CUBE_DIMENSIONS):
+        self.path = db_path
+        self.dimensions = list(dimensions)
+        self._local = threading.local()
+        self.labels = {}
+        self._positions_by_label = {}
+        for dim in self.dimensions:
+            values = [value_key(v) for (v,) in self._execute(f'SELECT DISTINCT "{dim}" FROM {CUBE_TABLE} ORDER BY 1')]
+            if dim in TRANSLATED_COLUMNS.values():
+                # Colunas traduzidas seguem o dtype comum (traduções, demais valores, ausente)
+                order = list(translated_dtype([v for v in values if v not in (None, MISSING_LABEL)]).categories)
+                values.sort(key=lambda v: order.index(v) if v in order else -1)
+            self.labels[dim] = values
+            self._positions_by_label[dim] = {v: i for i, v in enumerate(values)}
+
+    @property
+    def shape(self):
+        return tuple(len(self.labels[dim]) for dim in self.dimensions)
+
+    def _execute(self, sql, params=()):
+        con = getattr(self._local, 'connection', None)
+        if con is None:
+            con = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+            self._local.connection = con
+        return con.execute(sql, params)
+
+    def _where(self, index):
+        # Só entram as dimensões restritas; ``None`` vira ``IS NULL``.
+        # Devolve None quando alguma dimensão não tem posição selecionada
+        clauses, params = [], []
+        for dim, positions in zip(self.dimensions, index):
+            if len(positions) == len(self.labels[dim]):
+                continue
+            if len(positions) == 0:
+                return None, None
+            values = [self.labels[dim][p] for p in positions]
+            known = [v for v in values if v is not None]
+            parts = [f'"{dim}" IN ({", ".join("?" * len(known))})'] if known else []
+            if len(known) < len(values):
+                parts.append(f'"{dim}" IS NULL')
+            clauses.append('(' + ' OR '.join(parts) + ')')
+            params.extend(known)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def _reduce(self, dims, index):
+        result = np.zeros([len(self.labels[d]) for d in dims], dtype=np.int64)
+        where, params = self._where(index)
+        if where is None:
+            return result
+        columns = ', '.join(f'"{d}"' for d in dims)
+        if dims:
+            sql = f'SELECT {columns}, SUM(n) FROM {CUBE_TABLE}{where} GROUP BY {columns}'
+        else:
+            sql = f'SELECT SUM(n) FROM {CUBE_TABLE}{where}'
+        lookups = [self._positions_by_label[d] for d in dims]
+        for row in self._execute(sql, params):
+            # SUM de nenhuma linha é NULL
+            result[tuple(lookup[value_key(v)] for lookup, v in zip(lookups, row[:-1]))] += row[-1] or 0
+        return result
+
+    def count(self, *selections):
+        """Número de ações que satisfazem todas as seleções."""
+        return int(self.reduce([], *selections))
+
+    def count_rows(self, condition, *selections):
+        """Ações que satisfazem as seleções e a condição SQL ``condition`` sobre colunas fora do cubo.
+
+        Varre a tabela ``acoes`` (os filtros usam os índices); só a contagem volta.
+        """
+        where, params = self._where([self._positions(dim, selections) for dim in self.dimensions])
+        if where is None:
+            return 0
+        where = f'{where} AND ({condition})' if where else f' WHERE {condition}'
+        (count,) = self._execute(f'SELECT COUNT(*) FROM {TABLE}{where}', params).fetchone()
+        return int(count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importa um CSV de ações para o banco SQLite do cache.')
+    parser.add_argument('csv')
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    args = parser.parse_args()
+    db_path = build_database(args.csv, args.cache_dir)
+    print(f"{_read_meta(db_path)['rows']} linhas em {db_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""Cache colunar em disco para o CSV de ações.
+
+O CSV é convertido uma única vez para um diretório com um arquivo ``.npy``
+por coluna (códigos no caso das categóricas). As execuções seguintes apenas
+mapeiam esses arquivos em memória (``mmap``) e só reconstroem o cache quando
+o CSV muda de tamanho, data de modificação ou conteúdo.
+
+Na conversão o dataset passa pela validação (``core.validation``): o cache
+guarda só as linhas válidas, já com o mapeamento de colunas aplicado, e as
+linhas em quarentena ficam em ``quarentena/`` no mesmo formato. O relatório
+(mapeamento e contagens por regra) vai no ``meta.json``.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from core.validation import validate
+
+CACHE_DIR = '.cache'
+CACHE_FORMAT = 2
+QUARANTINE_DIR = 'quarentena'
+
+# Esquema explícito: inteiros pequenos sem sinal e categóricas
+UINT_COLUMNS = {
+    'rally': np.uint16,
+    'round': np.uint8,
+    'receive_location': np.uint8,
+    'digger_location': np.uint8,
+    'pass_land_location': np.uint8,
+    'hitter_location': np.uint8,
+    'hit_land_location': np.uint8,
+    'num_blockers': np.uint8,
+}
+
+CATEGORY_COLUMNS = [
+    'team', 'pass_rating', 'set_type', 'set_location', 'hit_type',
+    'block_touch', 'serve_type', 'win_reason', 'lose_reason', 'winning_team',
+]
+
+_UINT_LADDER = [np.uint8, np.uint16, np.uint32, np.uint64]
+
+
+def file_signature(path):
+    """Tamanho e mtime do arquivo: identifica a versão sem ler o conteúdo."""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def dataset_version(path):
+    """Chave barata da versão do dataset, usada nos caches do Streamlit."""
+    sig = file_signature(path)
+    return f"{sig['size']}-{sig['mtime_ns']}"
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fit_uint(values, preferred):
+    # Sobe para um inteiro maior caso o valor máximo não caiba no tipo do esquema
+    top = values.max() if len(values) else 0
+    ladder = _UINT_LADDER[_UINT_LADDER.index(preferred):]
+    for dtype in ladder:
+        if top <= np.iinfo(dtype).max:
+            return dtype
+    raise ValueError(f"Valor {top} fora do intervalo de inteiros sem sinal")
+
+
+def _csv_dtypes():
+    dtypes = {col: 'float64' for col in UINT_COLUMNS}
+    dtypes.update({col: 'category' for col in CATEGORY_COLUMNS})
+    return dtypes
+
+
+def read_csv_typed(source, **kwargs):
+    """Lê o CSV aplicando o esquema, sem inferência de tipos."""
+    raw = pd.read_csv(source, dtype=_csv_dtypes(), **kwargs)
+    return apply_schema(raw)
+
+
+def read_csv_chunks(source, chunksize, **kwargs):
+    """``read_csv_typed`` em blocos de ``chunksize`` linhas, sem carregar o arquivo inteiro."""
+    with pd.read_csv(source, dtype=_csv_dtypes(), chunksize=chunksize, **kwargs) as reader:
+        for raw in reader:
+            yield apply_schema(raw)
+
+
+def apply_schema(raw):
+    """Converte as colunas numéricas para inteiros sem sinal (nulos viram máscara)."""
+    columns = {}
+    for col in raw.columns:
+        values = raw[col]
+        if col in UINT_COLUMNS:
+            data = values.to_numpy(dtype='float64', na_value=np.nan)
+            mask = np.isnan(data)
+            if (data[~mask] < 0).any():
+                raise ValueError(f"Coluna {col} contém valores negativos")
+            filled = np.where(mask, 0, data)
+            dtype = _fit_uint(filled, UINT_COLUMNS[col])
+            filled = filled.astype(dtype)
+            if mask.any():
+                columns[col] = pd.arrays.IntegerArray(filled, mask)
+            else:
+                columns[col] = filled
+        elif col in CATEGORY_COLUMNS:
+            columns[col] = values.astype('category')
+        else:
+            columns[col] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def write_columns(df, target):
+    """Grava ``df`` em ``target`` no formato colunar (um ``.npy`` por coluna); devolve o meta das colunas."""
+    meta = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(target, f'{col}.npy'), series.cat.codes.to_numpy())
+            meta[col] = {'kind': 'category', 'categories': [str(c) for c in series.cat.categories]}
+        elif isinstance(series.array, pd.arrays.IntegerArray):
+            data, mask = series.array._data, series.array._mask
+            np.save(os.path.join(target, f'{col}.npy'), data)
+            np.save(os.path.join(target, f'{col}.mask.npy'), mask)
+            meta[col] = {'kind': 'masked', 'dtype': str(data.dtype)}
+        else:
+            data = series.to_numpy()
+            if data.dtype == object:
+                raise TypeError(f"Coluna {col} sem tipo no esquema")
+            np.save(os.path.join(target, f'{col}.npy'), data)
+            meta[col] = {'kind': 'plain', 'dtype': str(data.dtype)}
+    return meta
+
+
+def read_columns(target, meta, columns=None):
+    """DataFrame com as colunas de ``target`` mapeadas do disco (todas, ou só ``columns``)."""
+    data = {}
+    for col, info in meta['columns'].items():
+        if columns is not None and col not in columns:
+            continue
+        values = np.asarray(np.load(os.path.join(target, f'{col}.npy'), mmap_mode='r'))
+        if info['kind'] == 'category':
+            data[col] = pd.Categorical.from_codes(values, info['categories'], validate=False)
+        elif info['kind'] == 'masked':
+            mask = np.asarray(np.load(os.path.join(target, f'{col}.mask.npy'), mmap_mode='r'))
+            data[col] = pd.arrays.IntegerArray(values, mask)
+        else:
+            data[col] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def _cache_root(csv_path, cache_dir):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, stem)
+
+
+def _read_pointer(root):
+    try:
+        with open(os.path.join(root, 'latest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path, payload):
+    """Grava JSON por arquivo temporário renomeado (leitores nunca veem o arquivo pela metade)."""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def build_cache(csv_path, cache_dir=CACHE_DIR, digest=None):
+    """Converte o CSV para o formato colunar e atualiza o ponteiro ``latest.json``."""
+    root = _cache_root(csv_path, cache_dir)
+    os.makedirs(root, exist_ok=True)
+    signature = file_signature(csv_path)
+    digest = digest or file_hash(csv_path)
+
+    # Cada conteúdo ganha seu próprio diretório: arquivos já mapeados por
+    # outro processo nunca são sobrescritos
+    name = _dir_name(digest)
+    target = os.path.join(root, name)
+    if not os.path.isdir(target):
+        df, quarantine, report = validate(read_csv_typed(csv_path))
+        staging = tempfile.mkdtemp(dir=root, prefix='.build-')
+        try:
+            meta = {'rows': len(df), 'columns': write_columns(df, staging), 'validation': report}
+            write_json(os.path.join(staging, 'meta.json'), meta)
+            quarantine_dir = os.path.join(staging, QUARANTINE_DIR)
+            os.makedirs(quarantine_dir)
+            write_json(os.path.join(quarantine_dir, 'meta.json'),
+                        {'rows': len(quarantine), 'columns': write_columns(quarantine, quarantine_dir)})
+            os.replace(staging, target)
+        except OSError:
+            # Outro processo terminou o mesmo diretório antes
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.isdir(target):
+                raise
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+    write_json(os.path.join(root, 'latest.json'), {**signature, 'sha256': digest, 'dir': name})
+    _cleanup(root, keep=name)
+    return target
+
+
+def _dir_name(digest):
+    return f'v{CACHE_FORMAT}-{digest[:16]}'
+
+
+def _cleanup(root, keep):
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if name != keep and os.path.isdir(path) and not name.startswith('.build-'):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def cached_dir(csv_path, cache_dir=CACHE_DIR):
+    """Diretório colunar válido para o CSV atual, reconstruindo se necessário."""
+    root = _cache_root(csv_path, cache_dir)
+    pointer = _read_pointer(root)
+    signature = file_signature(csv_path)
+    if pointer is not None:
+        target = os.path.join(root, pointer['dir'])
+        meta_ok = (pointer['dir'] == _dir_name(pointer['sha256'])
+                   and os.path.exists(os.path.join(target, 'meta.json')))
+        if meta_ok and pointer['size'] == signature['size'] and pointer['mtime_ns'] == signature['mtime_ns']:
+            return target
+        if meta_ok and pointer['size'] == signature['size']:
+            # mtime mudou (checkout, cópia): confere o conteúdo antes de reconstruir
+            digest = file_hash(csv_path)
+            if digest == pointer['sha256']:
+                write_json(os.path.join(root, 'latest.json'), {**pointer, **signature})
+                return target
+            return build_cache(csv_path, cache_dir, digest)
+    return build_cache(csv_path, cache_dir)
+
+
+def _read_meta(target):
+    with open(os.path.join(target, 'meta.json')) as f:
+        return json.load(f)
+
+
+def load_columnar(csv_path, cache_dir=CACHE_DIR, columns=None):
+    """Carrega o dataset (linhas válidas) a partir do cache colunar mapeado em memória."""
+    target = cached_dir(csv_path, cache_dir)
+    return read_columns(target, _read_meta(target), columns)
+
+
+def validation_report(csv_path, cache_dir=CACHE_DIR):
+    """Relatório da validação do CSV: mapeamento aplicado, linhas lidas e em quarentena por regra."""
+    return _read_meta(cached_dir(csv_path, cache_dir))['validation']
+
+
+def load_quarantine(csv_path, cache_dir=CACHE_DIR):
+    """Linhas em quarentena do CSV, com a posição no arquivo (``linha``) e o ``motivo``."""
+    target = os.path.join(cached_dir(csv_path, cache_dir), QUARANTINE_DIR)
+    return read_columns(target, _read_meta(target), None)
@@ -0,0 +1,274 @@
+"""Gerador de ralis sintéticos com as distribuições do CSV real.
+
+O modelo é ajustado no CSV bruto (as mesmas colunas e rótulos do arquivo,
+inclusive as colunas deslocadas e os valores fora do domínio, que a validação
+continua a encontrar na mesma proporção) e gera ações rali a rali:
+
+- por rali: número de ações, time que saca, se o sacador vence (dados o
+  time e o tamanho do rali) e o número de ralis por partida (o número do rali volta a
+  1 a cada partida, como no arquivo real);
+- por transição entre ações do rali: troca de time (dada a posição) e a zona
+  de recepção dada a zona onde caiu o ataque anterior; dentro da ação, cada
+  zona dada a anterior (recepção, defesa, passe, atacante, queda do ataque);
+- por ação, dado o papel no rali (primeira, intermediária, última ou única):
+  tipo de saque; resultado (``win_reason`` e ``lose_reason`` juntos), dado
+  também se o time da ação vence o rali; tipo de ataque, bloqueadores e toque
+  no bloqueio juntos, por time e resultado; avaliação do passe e levantamento
+  juntos, por time.
+
+Cada distribuição condicional é uma tabela de frequências; contextos com
+menos de ``MIN_COUNT`` observações usam a distribuição do contexto mais geral.
+A geração é vetorizada por bloco de ``chunk_rows`` linhas (só as zonas
+percorrem as posições do rali, uma vez por posição) e gravada em streaming:
+a memória não depende do total de linhas. Mesma semente e mesmo
+``chunk_rows`` reproduzem o mesmo arquivo. O total de linhas é exato; a
+última ação pode ficar no meio de um rali.
+
+Gerar 50 milhões de linhas::
+
+    python -m core.synthetic sintetico.csv --rows 50000000 --seed 7
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+SOURCE_PATH = 'dataset_full.csv'
+CHUNK_ROWS = 1_000_000
+MIN_COUNT = 5
+
+# Papel da ação no rali
+MIDDLE, FIRST, LAST, SINGLE = 0, 1, 2, 3
+
+ZONE_CHAIN = ['receive_location', 'digger_location', 'pass_land_location', 'hitter_location', 'hit_land_location']
+RESULT_BLOCK = ['win_reason', 'lose_reason']
+HIT_BLOCK = ['hit_type', 'num_blockers', 'block_touch']
+PASS_BLOCK = ['pass_rating', 'set_type', 'set_location']
+SERVE_BLOCK = ['serve_type']
+
+# Posições a partir das quais a troca de time tem a mesma distribuição
+SWITCH_POSITIONS = 3
+LENGTH_BUCKETS = 5
+
+
+class Conditional:
+    """Distribuição de um código (``0..n_values-1``) dado um contexto discreto.
+
+    ``contexts`` é uma lista ``[(códigos, níveis), ...]`` do mais geral para o
+    mais específico. A tabela é densa sobre todas as combinações; o sorteio é
+    uma única busca binária sobre as CDFs empilhadas (a de cada contexto
+    deslocada pelo seu índice).
+    """
+
+    def __init__(self, values, n_values, contexts=(), min_count=MIN_COUNT):
+        probs = np.bincount(values, minlength=n_values)[None, :].astype(float)
+        probs /= max(probs.sum(), 1)
+        key, size = np.zeros(len(values), dtype=np.int64), 1
+        for codes, levels in contexts:
+            key, size = key * levels + codes, size * levels
+            counts = np.bincount(key * n_values + values, minlength=size * n_values).reshape(size, n_values)
+            totals = counts.sum(axis=1, keepdims=True)
+            # O contexto filho k*levels + c herda a linha do pai k
+            parent = np.repeat(probs, levels, axis=0)
+            probs = np.where(totals >= min_count, counts / np.maximum(totals, 1), parent)
+        cdf = np.cumsum(probs, axis=1)
+        cdf[:, -1] = 1.0
+        self.n_values = n_values
+        self.levels = [levels for _, levels in contexts]
+        self._flat = (cdf + np.arange(size)[:, None]).ravel()
+
+    def sample(self, rng, *codes, size=None):
+        key = np.zeros(len(codes[0]) if codes else size, dtype=np.int64)
+        for code, levels in zip(codes, self.levels):
+            key = key * levels + code
+        position = np.searchsorted(self._flat, key + rng.random(len(key)), side='right')
+        return position - key * self.n_values
+
+
+def _codes(values):
+    # Códigos com 0 para ausente e os rótulos do arquivo (como texto)
+    codes, labels = pd.factorize(values, sort=True)
+    return codes.astype(np.int64) + 1, np.asarray(labels, dtype=object)
+
+
+def _joint(frame, columns):
+    # Cada combinação observada das colunas vira um código; a tabela de
+    # combinações devolve os códigos de cada coluna
+    coded = [_codes(frame[col]) for col in columns]
+    stacked = np.column_stack([codes for codes, _ in coded])
+    combos, inverse = np.unique(stacked, axis=0, return_inverse=True)
+    return inverse.reshape(-1), combos, [labels for _, labels in coded]
+
+
+class RallyModel:
+    """Distribuições aprendidas de um CSV de ações (ver o docstring do módulo)."""
+
+    def __init__(self, raw):
+        raw = raw.reset_index(drop=True)
+        self.columns = list(raw.columns)
+        rally = raw['rally'].to_numpy()
+        first = np.append(True, rally[1:] != rally[:-1])
+        starts = np.flatnonzero(first)
+        lengths = np.diff(np.append(starts, len(raw)))
+        run = np.repeat(np.arange(len(starts)), lengths)
+        position = np.arange(len(raw)) - starts[run]
+        last = position == (lengths - 1)[run]
+        role = first + 2 * last
+
+        # Estrutura: times como lados 0/1 (os dois rótulos mais frequentes)
+        self.teams = raw['team'].value_counts().index[:2].to_numpy(dtype=object)
+        side = (raw['team'] == self.teams[1]).to_numpy().astype(np.int64)
+        winner = (raw['winning_team'] == self.teams[1]).to_numpy().astype(np.int64)
+        self.max_length = int(lengths.max())
+        self.mean_length = float(lengths.mean())
+        self.length = Conditional(lengths - 1, self.max_length)
+        self.serve_side = Conditional(side[starts], 2)
+        self.server_wins = Conditional((side[starts] == winner[starts]).astype(np.int64), 2,
+                                       [(side[starts], 2), (_length_bucket(lengths), LENGTH_BUCKETS)])
+        rest = ~first
+        switched = (side[rest] != side[np.flatnonzero(rest) - 1]).astype(np.int64)
+        self.switch = Conditional(switched, 2, [(_switch_position(position[rest]), SWITCH_POSITIONS)])
+        rally_starts = rally[starts]
+        match_starts = np.flatnonzero(np.append(True, rally_starts[1:] < rally_starts[:-1]))
+        self.match_rallies = np.diff(np.append(match_starts, len(starts)))
+
+        wins = (side == winner[starts][run]).astype(np.int64)
+        self.blocks = {}
+        result, combos, labels = _joint(raw, RESULT_BLOCK)
+        self.blocks['result'] = (RESULT_BLOCK, combos, labels, Conditional(result, len(combos), [(role, 4), (wins, 2)]))
+        serve, combos, labels = _joint(raw, SERVE_BLOCK)
+        self.blocks['serve'] = (SERVE_BLOCK, combos, labels, Conditional(serve, len(combos), [(role, 4)]))
+        hit, combos, labels = _joint(raw, HIT_BLOCK)
+        self.blocks['hit'] = (HIT_BLOCK, combos, labels, Conditional(
+            hit, len(combos), [(role, 4), (side, 2), (result, len(self.blocks['result'][1]))]))
+        passing, combos, labels = _joint(raw, PASS_BLOCK)
+        self.blocks['pass'] = (PASS_BLOCK, combos, labels, Conditional(passing, len(combos), [(role, 4), (side, 2)]))
+
+        # Zonas: a primeira depende da queda do ataque da ação anterior
+        # (ausente na primeira ação do rali); as demais, da zona anterior
+        zones = [_codes(raw[col]) for col in ZONE_CHAIN]
+        self.zone_labels = [labels for _, labels in zones]
+        landing, landing_levels = zones[-1][0], len(zones[-1][1]) + 1
+        previous = np.where(first, 0, np.roll(landing, 1))
+        self.zones = []
+        for codes, labels in zones:
+            levels = len(labels) + 1
+            self.zones.append(Conditional(codes, levels, [(role, 4), (previous, landing_levels)]))
+            previous, landing_levels = codes, levels
+
+    @classmethod
+    def from_csv(cls, path=SOURCE_PATH):
+        return cls(pd.read_csv(path, dtype=str, keep_default_na=True).assign(
+            rally=lambda df: pd.to_numeric(df['rally'])))
+
+    def generate(self, rows, seed=0, chunk_rows=CHUNK_ROWS):
+        """DataFrames de até ``chunk_rows`` linhas somando ``rows``, com as colunas do CSV de origem."""
+        rng = np.random.default_rng(seed)
+        match_left, next_rally = 0, 1
+        produced = 0
+        while produced < rows:
+            target = min(chunk_rows, rows - produced)
+            lengths = np.empty(0, dtype=np.int64)
+            while lengths.sum() < target:
+                extra = int((target - lengths.sum()) / self.mean_length * 1.05) + 16
+                lengths = np.append(lengths, self.length.sample(rng, size=extra) + 1)
+            ends = np.cumsum(lengths)
+            lengths = lengths[:np.searchsorted(ends, target) + 1]
+            rally, match_left, next_rally = self._rally_numbers(rng, len(lengths), match_left, next_rally)
+            chunk = self._actions(rng, lengths, rally)
+            if len(chunk) > target:
+                chunk = chunk.iloc[:target]
+            produced += len(chunk)
+            yield chunk
+
+    def _rally_numbers(self, rng, count, match_left, next_rally):
+        # Número do rali dentro da partida; a partida em curso continua no bloco seguinte
+        numbers = np.empty(count, dtype=np.int64)
+        filled = 0
+        while filled < count:
+            if match_left == 0:
+                match_left, next_rally = int(rng.choice(self.match_rallies)), 1
+            take = min(match_left, count - filled)
+            numbers[filled:filled + take] = np.arange(next_rally, next_rally + take)
+            filled, match_left, next_rally = filled + take, match_left - take, next_rally + take
+        return numbers, match_left, next_rally
+
+    def _actions(self, rng, lengths, rally):
+        n_rallies, rows = len(lengths), int(lengths.sum())
+        starts = np.cumsum(lengths) - lengths
+        run = np.repeat(np.arange(n_rallies), lengths)
+        position = np.arange(rows) - starts[run]
+        first = position == 0
+        last = position == (lengths - 1)[run]
+        role = first + 2 * last
+
+        serve_side = self.serve_side.sample(rng, size=n_rallies)
+        winner_side = np.where(self.server_wins.sample(rng, serve_side, _length_bucket(lengths)) == 1, serve_side, 1 - serve_side)
+        switched = np.where(first, 0, self.switch.sample(rng, _switch_position(position)))
+        flips = np.cumsum(switched)
+        side = serve_side[run] ^ ((flips - flips[starts][run]) & 1)
+        wins = (side == winner_side[run]).astype(np.int64)
+
+        sampled = {}
+        sampled['result'] = self.blocks['result'][3].sample(rng, role, wins)
+        sampled['serve'] = self.blocks['serve'][3].sample(rng, role)
+        sampled['hit'] = self.blocks['hit'][3].sample(rng, role, side, sampled['result'])
+        sampled['pass'] = self.blocks['pass'][3].sample(rng, role, side)
+
+        zones = [np.zeros(rows, dtype=np.int64) for _ in ZONE_CHAIN]
+        for k in range(int(lengths.max())):
+            at = starts[lengths > k] + k
+            previous = zones[-1][at - 1] if k else np.zeros(len(at), dtype=np.int64)
+            for codes, model in zip(zones, self.zones):
+                codes[at] = model.sample(rng, role[at], previous)
+                previous = codes[at]
+
+        columns = {
+            'rally': np.repeat(rally, lengths),
+            'round': position + 1,
+            'team': self.teams[side],
+            'winning_team': self.teams[winner_side[run]],
+        }
+        for name, (block_columns, combos, labels, _) in self.blocks.items():
+            for j, col in enumerate(block_columns):
+                columns[col] = pd.Categorical.from_codes(combos[sampled[name], j] - 1, labels[j])
+        for col, codes, labels in zip(ZONE_CHAIN, zones, self.zone_labels):
+            columns[col] = pd.Categorical.from_codes(codes - 1, labels)
+        return pd.DataFrame({col: columns[col] for col in self.columns if col in columns})
+
+
+def _length_bucket(lengths):
+    return np.minimum(lengths, LENGTH_BUCKETS) - 1
+
+
+def _switch_position(position):
+    # A primeira ação não tem troca; ela cai no contexto da segunda
+    return np.clip(position, 1, SWITCH_POSITIONS) - 1
+
+
+def write_csv(path, rows, seed=0, source=SOURCE_PATH, chunk_rows=CHUNK_ROWS):
+    """Grava ``rows`` ações sintéticas em ``path`` bloco a bloco (arquivo temporário renomeado no fim)."""
+    model = RallyModel.from_csv(source)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', newline='') as f:
+        for i, chunk in enumerate(model.generate(rows, seed, chunk_rows)):
+            chunk.to_csv(f, header=i == 0, index=False)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera um CSV de ações sintéticas com as distribuições do dataset real.')
+    parser.add_argument('csv')
+    parser.add_argument('--rows', type=int, required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--source', default=SOURCE_PATH)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+    write_csv(args.csv, args.rows, args.seed, args.source, args.chunk_rows)
+    print(f"{args.rows} linhas em {args.csv}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Tradução dos códigos do dataset para rótulos em português.
+
+As colunas traduzidas são categóricas que compartilham um único dtype: o
+dicionário ``TRANSLATIONS`` é aplicado às categorias (poucas dezenas), nunca
+linha a linha, e os códigos são remapeados com uma tabela de consulta.
+"""
+
+import numpy as np
+import pandas as pd
+
+MISSING_LABEL = 'Não informado'
+
+# Dicionário de tradução
+TRANSLATIONS = {
+    'a': 'Time A', 'b': 'Time B',
+    'jump': 'Saque com Salto', 'float': 'Saque Flutuante', 'hybrid': 'Saque Híbrido',
+    'hit': 'Ataque Forte', 'off_speed': 'Ataque Controlado', 'tip': 'Largada',
+    'roll_shot': 'Roll Shot', 'free_ball': 'Bola Livre', 'overpass': 'Sobrepasse',
+    'kill': 'Kill', 'ace': 'Ace', 'tool': 'Tool', 'blocked': 'Ponto de Bloqueio',
+    'hit_error': 'Erro de Ataque', 'serve_error': 'Erro de Saque', 'net': 'Rede',
+    'in': 'Dentro', 'out': 'Fora'
+}
+
+# Coluna original -> coluna traduzida
+TRANSLATED_COLUMNS = {
+    'team': 'team_pt',
+    'serve_type': 'serve_type_pt',
+    'hit_type': 'hit_type_pt',
+    'win_reason': 'win_reason_pt',
+}
+
+
+def translate_value(value):
+    if pd.isna(value): return MISSING_LABEL
+    return TRANSLATIONS.get(str(value), str(value))
+
+
+def translated_dtype(raw_values=()):
+    """Dtype categórico comum: rótulos traduzidos, valores sem tradução e o rótulo de ausente."""
+    labels = list(dict.fromkeys(TRANSLATIONS.values()))
+    for value in sorted({str(v) for v in raw_values}):
+        label = translate_value(value)
+        if label not in labels:
+            labels.append(label)
+    labels.append(MISSING_LABEL)
+    return pd.CategoricalDtype(labels)
+
+
+def translate_column(values, dtype):
+    """Traduz uma coluna categórica (ou convertível) sem ``.apply`` por linha."""
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype('category')
+    categories = values.cat.categories
+    lut = dtype.categories.get_indexer([translate_value(c) for c in categories])
+    if (lut < 0).any():
+        raise KeyError("Categoria sem rótulo no dtype traduzido")
+    # O código -1 (NaN) indexa o último elemento: o rótulo de ausente
+    lut = np.append(lut, dtype.categories.get_loc(MISSING_LABEL))
+    lut = lut.astype(np.int8 if len(dtype.categories) < 128 else np.int16)
+    codes = lut[values.cat.codes.to_numpy()]
+    return pd.Categorical.from_codes(codes, dtype=dtype, validate=False)
+
+
+def add_translations(df):
+    """Novo DataFrame com as colunas ``*_pt`` acrescentadas (as originais são compartilhadas)."""
+    raw_values = set()
+    for col in TRANSLATED_COLUMNS:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            raw_values.update(values.cat.categories)
+        else:
+            raw_values.update(values.dropna().unique())
+    dtype = translated_dtype(raw_values)
+    columns = {col: df[col] for col in df.columns}
+    for col, pt in TRANSLATED_COLUMNS.items():
+        columns[pt] = translate_column(df[col], dtype)
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,296 @@
+"""Validação vetorizada do dataset de ações, com quarentena.
+
+Etapas, todas sobre colunas inteiras (nenhuma regra percorre linhas em Python):
+
+1. Mapeamento de colunas: para cada coluna com domínio conhecido, mede a
+   fração dos valores de cada coluna do arquivo que cai nesse domínio (a
+   partir das categorias e suas contagens). Se a própria coluna não bate com
+   o domínio e outra bate, os valores vêm da outra. No ``dataset_full.csv``,
+   por exemplo, ``set_location`` traz os tipos de levantamento e ``set_type``
+   repete a avaliação do passe; o mapeamento aplicado fica no relatório.
+2. Regras de domínio (categorias), intervalo (colunas numéricas) e entre
+   colunas (resultado só na última ação do rali, saque só na primeira...).
+   Cada regra marca um bit por linha.
+3. Linhas com algum bit marcado vão para a tabela de quarentena, com o motivo;
+   as demais seguem para o dashboard.
+"""
+
+import numpy as np
+import pandas as pd
+
+REASONS = ['kill', 'ace', 'tool', 'blocked', 'hit_error', 'serve_error', 'net', 'error']
+
+# Coluna -> valores aceitos (ausente é aceito, exceto em REQUIRED_COLUMNS)
+DOMAINS = {
+    'team': ['a', 'b'],
+    'winning_team': ['a', 'b'],
+    'pass_rating': ['in', 'out'],
+    'set_type': ['outside', 'oppo', 'quick', 'bic', 'd-ball', 'dump'],
+    'hit_type': ['hit', 'off_speed', 'tip', 'free_ball', 'roll_shot', 'overpass', 'dump', 'blocked'],
+    'block_touch': ['yes', 'no'],
+    'serve_type': ['jump', 'float', 'hybrid', 'tape'],
+    'win_reason': REASONS,
+    'lose_reason': REASONS,
+}
+
+# Coluna -> (mínimo, máximo)
+RANGES = {
+    'rally': (1, 65535),
+    'round': (1, 255),
+    'receive_location': (1, 26),
+    'digger_location': (1, 26),
+    'pass_land_location': (1, 26),
+    'hitter_location': (1, 26),
+    'hit_land_location': (1, 26),
+    'num_blockers': (0, 3),
+}
+
+REQUIRED_COLUMNS = ['rally', 'round', 'team', 'winning_team']
+
+# Colunas do arquivo candidatas ao mapeamento (as categóricas do esquema)
+MAPPABLE_COLUMNS = [
+    'team', 'pass_rating', 'set_type', 'set_location', 'hit_type',
+    'block_touch', 'serve_type', 'win_reason', 'lose_reason', 'winning_team',
+]
+
+# Fração mínima dos valores presentes dentro do domínio para a coluna "bater"
+MIN_DOMAIN_SHARE = 0.95
+
+QUARANTINE_REASON = 'motivo'
+QUARANTINE_ROW = 'linha'
+
+
+def _category_counts(values):
+    # Contagem por categoria (um bincount dos códigos), sem ausentes
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype('category')
+    codes = values.cat.codes.to_numpy()
+    # Ausente (-1) vai para a posição 0, descartada
+    counts = np.bincount(codes.astype(np.intp) + 1, minlength=len(values.cat.categories) + 1)[1:]
+    return pd.Series(counts, index=values.cat.categories.astype(str))
+
+
+def _domain_share(counts, domain):
+    # Fração dos valores presentes dentro do domínio
+    total = counts.sum()
+    if total == 0:
+        return 0.0
+    return counts[counts.index.isin(domain)].sum() / total
+
+
+def detect_mapping(df):
+    """Colunas trocadas: ``{coluna do esquema: coluna do arquivo ou None}``.
+
+    Só as colunas que mudam aparecem; ``None`` indica que nenhuma coluna do
+    arquivo corresponde (a coluna fica vazia).
+    """
+    available = [c for c in MAPPABLE_COLUMNS if c in df.columns]
+    counts = {source: _category_counts(df[source]) for source in available}
+    shares = {(target, source): _domain_share(counts[source], domain)
+              for target, domain in DOMAINS.items() if target in df.columns
+              for source in available}
+    kept = {t for t in DOMAINS if t in df.columns and shares[(t, t)] >= MIN_DOMAIN_SHARE}
+    claimed, mapping = set(kept), {}
+    for target in DOMAINS:
+        if target not in df.columns or target in kept:
+            continue
+        candidates = [(shares[(target, s)], s) for s in available if s not in claimed]
+        share, source = max(candidates, default=(0.0, None))
+        if share >= MIN_DOMAIN_SHARE:
+            mapping[target] = source
+            claimed.add(source)
+    # Colunas sem domínio cujos valores foram para outra coluna ficam vazias
+    for source in list(mapping.values()):
+        if source not in mapping and source not in DOMAINS:
+            mapping[source] = None
+    return mapping
+
+
+def apply_mapping(df, mapping):
+    """Novo DataFrame com as colunas do mapeamento trocadas (as demais são compartilhadas)."""
+    columns = {col: df[col] for col in df.columns}
+    for target, source in mapping.items():
+        if source is None:
+            columns[target] = pd.Categorical.from_codes(np.full(len(df), -1, dtype=np.int8), categories=[])
+        else:
+            columns[target] = df[source]
+    return pd.DataFrame(columns, copy=False)
+
+
+def _outside_domain(values, domain):
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype('category')
+    allowed = np.append(values.cat.categories.astype(str).isin(domain), True)
+    # O código -1 (ausente) indexa o último elemento: aceito
+    return ~allowed[values.cat.codes.to_numpy()]
+
+
+def _numeric(values):
+    return values.to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _outside_range(values, low, high):
+    # Inteiros com máscara são comparados nos dados crus, sem converter para float
+    array = values.array
+    if isinstance(array, pd.arrays.IntegerArray):
+        data, mask = array._data, array._mask
+        return ((data < low) | (data > high)) & ~mask
+    values = _numeric(values)
+    return (values < low) | (values > high)
+
+
+def _rally_edges(df):
+    # Primeira e última ação de cada rali (mudança do número do rali)
+    rally = df['rally']
+    rally = _numeric(rally) if isinstance(rally.array, pd.arrays.IntegerArray) else rally.to_numpy()
+    change = rally[1:] != rally[:-1]
+    first = np.append(True, change)
+    last = np.append(change, True)
+    return first, last
+
+
+def _mirrored_result(df, edges):
+    # Compara códigos: as categorias de ``lose_reason`` são levadas às de ``win_reason``
+    win, lose = df['win_reason'].astype('category'), df['lose_reason'].astype('category')
+    lut = np.append(win.cat.categories.get_indexer(lose.cat.categories.astype(win.cat.categories.dtype)), -1)
+    lose_codes = lut[lose.cat.codes.to_numpy()]
+    win_codes = win.cat.codes.to_numpy()
+    # Categoria de ``lose_reason`` ausente em ``win_reason`` (-1) só iguala se ambas faltam
+    missing = lose.cat.codes.to_numpy() < 0
+    return (win_codes != lose_codes) | ((win_codes < 0) != missing)
+
+
+def _result_before_end(df, edges):
+    _, last = edges
+    return df['win_reason'].notna().to_numpy() & ~last
+
+
+def _serve_after_start(df, edges):
+    first, _ = edges
+    return df['serve_type'].notna().to_numpy() & ~first
+
+
+def _winner_changes(df, edges):
+    first, _ = edges
+    codes = df['winning_team'].astype('category').cat.codes.to_numpy()
+    run = np.cumsum(first) - 1
+    return codes != codes[np.flatnonzero(first)][run]
+
+
+def _touch_without_block(df, edges):
+    blockers = _numeric(df['num_blockers'])
+    return (df['block_touch'] == 'yes').to_numpy(dtype=bool) & ~(blockers >= 1)
+
+
+# Regras entre colunas: nome -> (colunas usadas, linhas que violam). As
+# funções recebem também a primeira e a última ação de cada rali
+CROSS_RULES = {
+    'resultado_espelhado': (['win_reason', 'lose_reason'], _mirrored_result),
+    'resultado_antes_do_fim': (['rally', 'win_reason'], _result_before_end),
+    'saque_fora_do_inicio': (['rally', 'serve_type'], _serve_after_start),
+    'vencedor_muda_no_rali': (['rally', 'winning_team'], _winner_changes),
+    'toque_sem_bloqueio': (['block_touch', 'num_blockers'], _touch_without_block),
+}
+
+
+def rule_masks(df):
+    """Linhas que violam cada regra: ``{nome: máscara booleana}``.
+
+    As regras entre linhas (início e fim do rali) olham só as linhas de ``df``.
+    """
+    masks = {}
+    for col in REQUIRED_COLUMNS:
+        if col in df.columns:
+            masks[f'obrigatorio:{col}'] = df[col].isna().to_numpy()
+    for col, domain in DOMAINS.items():
+        if col in df.columns:
+            masks[f'dominio:{col}'] = _outside_domain(df[col], domain)
+    for col, (low, high) in RANGES.items():
+        if col in df.columns:
+            masks[f'intervalo:{col}'] = _outside_range(df[col], low, high)
+    edges = _rally_edges(df) if 'rally' in df.columns else None
+    for name, (columns, rule) in CROSS_RULES.items():
+        if all(col in df.columns for col in columns):
+            masks[name] = rule(df, edges)
+    return masks
+
+
+def validate(df, mapping=None):
+    """Aplica mapeamento e regras; devolve ``(válidas, quarentena, relatório)``.
+
+    Sem ``mapping`` o mapeamento é detectado em ``df``; blocos seguintes do
+    mesmo arquivo devem reutilizar o do relatório. A quarentena tem as
+    colunas do esquema mais ``linha`` (posição em ``df``) e ``motivo``.
+    """
+    if mapping is None:
+        mapping = detect_mapping(df)
+    df = apply_mapping(df, mapping)
+    masks = rule_masks(df)
+    names = list(masks)
+    rejected = np.logical_or.reduce(list(masks.values())) if masks else np.zeros(len(df), dtype=bool)
+    bad = np.flatnonzero(rejected)
+    # Um bit por regra, só nas linhas rejeitadas; o motivo é montado uma vez
+    # por combinação de regras presente
+    flags = np.zeros(len(bad), dtype=np.uint64)
+    for bit, name in enumerate(names):
+        flags |= masks[name][bad].astype(np.uint64) << np.uint64(bit)
+    combos, inverse = np.unique(flags, return_inverse=True)
+    reasons = [', '.join(n for bit, n in enumerate(names) if int(combo) >> bit & 1) for combo in combos]
+
+    quarantine = df.take(bad).reset_index(drop=True)
+    quarantine[QUARANTINE_ROW] = bad
+    quarantine[QUARANTINE_REASON] = pd.Categorical.from_codes(inverse.reshape(-1), categories=reasons) \
+        if len(bad) else pd.Categorical([], categories=[])
+    valid = df.take(np.flatnonzero(~rejected)).reset_index(drop=True) if len(bad) else df
+    report = {
+        'mapping': mapping,
+        'rows': len(df),
+        'quarantined': int(len(bad)),
+        'rules': {name: int(mask.sum()) for name, mask in masks.items() if mask.any()},
+    }
+    return valid, quarantine, report
+
+
+def merge_reports(reports):
+    """Soma os relatórios dos blocos de um mesmo arquivo."""
+    merged = {'mapping': reports[0]['mapping'] if reports else {}, 'rows': 0, 'quarantined': 0, 'rules': {}}
+    for report in reports:
+        merged['rows'] += report['rows']
+        merged['quarantined'] += report['quarantined']
+        for name, count in report['rules'].items():
+            merged['rules'][name] = merged['rules'].get(name, 0) + count
+    return merged
+
+
+def concat_chunks(head, chunk):
+    """Junta dois blocos lidos do mesmo CSV (categorias diferentes voltam a ser categóricas)."""
+    joined = pd.concat([head, chunk], ignore_index=True)
+    for col in chunk.columns:
+        if isinstance(chunk[col].dtype, pd.CategoricalDtype) and not isinstance(joined[col].dtype, pd.CategoricalDtype):
+            joined[col] = joined[col].astype('category')
+    return joined
+
+
+def split_last_rally(df):
+    """``(ralis completos, último rali)``: o último pode continuar no bloco seguinte."""
+    rally = _numeric(df['rally']) if len(df) else np.empty(0)
+    starts = np.flatnonzero(rally[1:] != rally[:-1]) + 1
+    cut = starts[-1] if len(starts) else 0
+    return df.iloc[:cut].reset_index(drop=True), df.iloc[cut:].reset_index(drop=True)
+
+
+def whole_rallies(chunks):
+    """Blocos que terminam em fim de rali: o último rali de cada bloco passa para o seguinte.
+
+    As regras de borda de rali olham a primeira e a última ação de cada rali;
+    com os ralis inteiros, cada bloco é validado como no arquivo completo.
+    """
+    tail = None
+    for chunk in chunks:
+        if tail is not None:
+            chunk = concat_chunks(tail, chunk)
+        complete, tail = split_last_rally(chunk)
+        if len(complete):
+            yield complete
+    if tail is not None and len(tail):
+        yield tail
@@ -0,0 +1,74 @@
+"""Visualização paginada dos dados brutos.
+
+A ordenação usa permutações pré-computadas por coluna (uma por versão dos
+dados, calculada na primeira vez que a coluna é pedida). Filtros e busca
+viram posições de linha, e apenas a janela da página atual é recortada com
+``take`` e enviada ao navegador.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _sort_key(values):
+    # Chave numérica de ordenação e máscara de nulos (nulos sempre no fim)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        labels = values.cat.categories.astype(str).to_numpy()
+        rank = np.empty(len(labels) + 1, dtype=np.int64)
+        rank[np.argsort(labels, kind='stable')] = np.arange(len(labels))
+        rank[-1] = 0
+        return rank[codes], codes < 0
+    data = values.to_numpy(dtype='float64', na_value=np.nan)
+    missing = np.isnan(data)
+    return np.where(missing, 0, data), missing
+
+
+class SortIndex:
+    def __init__(self, df):
+        self._df = df
+        self._permutations = {}
+
+    def permutation(self, column):
+        """Permutação estável que ordena a coluna, com o número de valores não nulos."""
+        if column not in self._permutations:
+            key, missing = _sort_key(self._df[column])
+            self._permutations[column] = (np.lexsort((key, missing)), int((~missing).sum()))
+        return self._permutations[column]
+
+    def order(self, column, ascending=True, rows=None):
+        """Posições das linhas ordenadas pela coluna, restritas a ``rows`` se dado."""
+        perm, n_valid = self.permutation(column)
+        if not ascending:
+            perm = np.concatenate([perm[:n_valid][::-1], perm[n_valid:]])
+        if rows is not None:
+            selected = np.zeros(len(self._df), dtype=bool)
+            selected[rows] = True
+            perm = perm[selected[perm]]
+        return perm
+
+
+def search_rows(df, column, text, rows=None):
+    """Linhas cujo valor em ``column`` contém ``text`` (números: valor igual)."""
+    values = df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # A busca roda sobre as categorias; as linhas saem dos códigos
+        labels = values.cat.categories.astype(str)
+        hits = np.flatnonzero(labels.str.contains(text, case=False, regex=False))
+        mask = np.isin(values.cat.codes.to_numpy(), hits)
+    else:
+        try:
+            number = float(text)
+        except ValueError:
+            return np.zeros(0, dtype=np.int64)
+        mask = values.to_numpy(dtype='float64', na_value=np.nan) == number
+    found = np.flatnonzero(mask)
+    if rows is not None:
+        found = np.intersect1d(rows, found, assume_unique=True)
+    return found
+
+
+def page_window(df, order, page, page_size):
+    """Recorte da página ``page`` (começando em 1) sobre as posições ``order``."""
+    start = (page - 1) * page_size
+    return df.take(order[start:start + page_size])
@@ -0,0 +1,25 @@
+"""Pool de processos compartilhado pelos cálculos pesados (bootstrap, partidas)."""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def process_pool():
+    """Pool persistente, criado no primeiro uso.
+
+    "spawn" evita fork de um servidor com várias threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(MAX_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
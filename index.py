@@ -1,6 +1,30 @@
+import os
+
 import streamlit as st
 import pandas as pd
 
+from core.cube import CountCube
+from core.filters import FilterIndex
+from core.instrument import begin_run, block, cache_miss, panel
+from core.flows import FlowCube
+from core.markov import RallyMarkov
+from core.matches import MatchIndex, match_label
+from core.live import get_live_dataset, live_snapshot, watch
+from core.memo import memoized
+from core.moments import MomentCube
+from core.partitions import load_partitions, manifest_version, partition_options, read_manifest, select_partitions
+from core.rallies import RallyIndex
+from core.sqlstore import SqlCube, sql_database
+from core.storage import dataset_version, load_columnar, load_quarantine, validation_report
+from core.translation import add_translations, translate_value
+from core.validation import merge_reports
+
+DATA_PATH = 'dataset_full.csv'
+# Backend das agregações: 'pandas' (cubo em memória, padrão) ou 'sqlite'
+# (contagens respondidas por SQL no banco embarcado em .cache/, sem as
+# linhas do dataset em memória)
+DATA_BACKEND = os.environ.get('BACKEND_DADOS', 'pandas')
+
 st.set_page_config(
     page_title="Análise de Voleibol Universitário",
     page_icon="🏐",
@@ -8,54 +32,237 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Carregar dados uma vez para toda a aplicação
-@st.cache_data
-def load_data():
-    return pd.read_csv('dataset_full.csv')
-
-# Dicionário de tradução
-TRANSLATIONS = {
-    'a': 'Time A', 'b': 'Time B',
-    'jump': 'Saque com Salto', 'float': 'Saque Flutuante', 'hybrid': 'Saque Híbrido',
-    'hit': 'Ataque Forte', 'off_speed': 'Ataque Controlado', 'tip': 'Largada',
-    'roll_shot': 'Roll Shot', 'free_ball': 'Bola Livre', 'overpass': 'Sobrepasse',
-    'kill': 'Kill', 'ace': 'Ace', 'tool': 'Tool', 'blocked': 'Ponto de Bloqueio',
-    'hit_error': 'Erro de Ataque', 'serve_error': 'Erro de Saque', 'net': 'Rede',
-    'in': 'Dentro', 'out': 'Fora'
-}
-
-def translate_value(value):
-    if pd.isna(value): return 'Não informado'
-    return TRANSLATIONS.get(str(value), str(value))
+# Carregar dados uma vez para toda a aplicação (o cache colunar em disco
+# é reconstruído apenas quando o CSV muda; a versão invalida o cache do Streamlit).
+# Com o dataset particionado (dados/manifest.json), só as partições
+# selecionadas na sidebar são mapeadas.
+# As colunas traduzidas são montadas aqui, uma vez por versão, e o DataFrame
+# resultante é compartilhado: não deve ser modificado nas páginas
+@st.cache_resource(max_entries=1)
+def load_data(version, particoes=None):
+    cache_miss()
+    df = load_columnar(DATA_PATH) if particoes is None else load_partitions(particoes)
+    with block('dados/traducao', rows=len(df)):
+        return add_translations(df)
 
-# Carregar e preparar dados
-df = load_data()
-df['team_pt'] = df['team'].apply(translate_value)
-df['serve_type_pt'] = df['serve_type'].apply(translate_value)
-df['hit_type_pt'] = df['hit_type'].apply(translate_value)
-df['win_reason_pt'] = df['win_reason'].apply(translate_value)
+# Validação feita na conversão do CSV: relatório (mapeamento de colunas,
+# contagens por regra) e linhas em quarentena, que ficaram fora do dataset
+@st.cache_resource(max_entries=1)
+def load_validation(version):
+    cache_miss()
+    return validation_report(DATA_PATH), load_quarantine(DATA_PATH)
+
+# Bitmaps dos filtros, montados uma vez por versão do dataset
+@st.cache_resource(max_entries=1)
+def load_filter_index(version, particoes=None):
+    cache_miss()
+    return FilterIndex(load_data(version, particoes))
+
+# Cubo de contagens dos KPIs, também uma vez por versão
+@st.cache_resource(max_entries=1)
+def load_cube(version, particoes=None):
+    cache_miss()
+    return CountCube(load_data(version, particoes))
+
+# Mesmas consultas do cubo, empurradas para o SQLite (o banco é reconstruído
+# só quando o CSV muda)
+@st.cache_resource(max_entries=1)
+def load_sql_cube(version):
+    cache_miss()
+    return SqlCube(sql_database(DATA_PATH))
+
+# Intervalos de linhas e resumo por rali
+@st.cache_resource(max_entries=1)
+def load_rally_index(version, particoes=None):
+    cache_miss()
+    return RallyIndex(load_data(version, particoes))
+
+# Estatísticas suficientes das colunas numéricas (correlações e médias)
+@st.cache_resource(max_entries=1)
+def load_moments(version, particoes=None):
+    cache_miss()
+    return MomentCube(load_data(version, particoes))
+
+# Matrizes de transição entre zonas da quadra, por célula de filtros
+@st.cache_resource(max_entries=1)
+def load_flows(version, particoes=None):
+    cache_miss()
+    return FlowCube(load_data(version, particoes))
+
+# Modelo de Markov do rali (probabilidades de vitória por estado)
+@st.cache_resource(max_entries=1)
+def load_markov(version, particoes=None):
+    cache_miss()
+    return RallyMarkov(load_data(version, particoes))
+
+# Partidas: intervalos de linhas e métricas por (partida, time)
+@st.cache_resource(max_entries=1)
+def load_matches(version, particoes=None):
+    cache_miss()
+    return MatchIndex(load_data(version, particoes))
+
+# Uma partida: a fatia do seu intervalo de linhas e as estruturas montadas
+# só sobre ela (custo proporcional às linhas da partida, uma vez por partida)
+@st.cache_resource(max_entries=32)
+def load_match_view(version, particoes, partida):
+    cache_miss()
+    start, stop = load_matches(version, particoes).bounds(partida)
+    data = load_data(version, particoes).iloc[start:stop].reset_index(drop=True)
+    return (data, FilterIndex(data), CountCube(data), RallyIndex(data),
+            MomentCube(data), FlowCube(data), RallyMarkov(data))
 
 # Sidebar global
 st.sidebar.title("🏐 Navegação")
 st.sidebar.markdown("Selecione a página para análise:")
 
+# Modo ao vivo: acompanha ações anexadas ao CSV (ou deixadas em ao_vivo/)
+# sem reprocessar o dataset inteiro
+# O banco SQLite é montado a partir do CSV inteiro e não acompanha ações
+# anexadas: com esse backend o modo ao vivo fica desligado
+modo_ao_vivo = st.sidebar.toggle(
+    "📡 Modo ao vivo",
+    value=st.session_state.get('modo_ao_vivo', False) and DATA_BACKEND != 'sqlite',
+    disabled=DATA_BACKEND == 'sqlite',
+    help="Atualiza os painéis com as ações novas da partida em até um segundo"
+)
+if DATA_BACKEND == 'sqlite':
+    st.sidebar.caption(
+        "Backend SQLite: as linhas ficam só no banco e a página inicial é respondida por SQL. "
+        "As páginas que dependem das linhas, a escolha de partições e partidas "
+        "e o modo ao vivo não estão disponíveis."
+    )
+st.session_state.modo_ao_vivo = modo_ao_vivo
+st.session_state.caminho_dados = DATA_PATH
+
+# Instrumentação: tempo, linhas, cache e memória de cada bloco deste rerun
+st.session_state.instrumentacao = st.sidebar.toggle(
+    "🩺 Instrumentação",
+    value=st.session_state.get('instrumentacao', False),
+    help="Mede os blocos de preparo de dados e gráficos e mostra o painel no fim da sidebar"
+)
+begin_run('inicio')
+
 st.sidebar.markdown("---")
 st.sidebar.title("⚙️ Filtros Globais")
 
+# Temporadas e competições escolhem as partições lidas do disco
+manifesto = read_manifest()
+particoes = None
+if manifesto and not modo_ao_vivo and DATA_BACKEND != 'sqlite':
+    temporadas = partition_options(manifesto, 'season')
+    temporadas_selecionadas = st.sidebar.multiselect(
+        "Temporadas:",
+        options=temporadas,
+        default=temporadas[-1:]
+    )
+    competicoes = partition_options(manifesto, 'competition', within={'seasons': temporadas_selecionadas})
+    competicoes_selecionadas = st.sidebar.multiselect(
+        "Competições:",
+        options=competicoes,
+        default=competicoes
+    )
+    escolhidas = select_partitions(manifesto, temporadas_selecionadas, competicoes_selecionadas)
+    particoes = tuple(p['path'] for p in escolhidas)
+
+def carregar(nome, carga, *args, linhas=None):
+    # Bloco medido em volta de uma função em cache (a função marca a falta)
+    with block(nome, rows=linhas, cache='hit') as medido:
+        resultado = carga(*args)
+        if isinstance(resultado, pd.DataFrame):
+            medido.rows = len(resultado)
+        return resultado
+
+# Carregar e preparar dados
+if DATA_BACKEND == 'sqlite':
+    # Só o banco: nenhuma estrutura por linha é montada
+    versao = dataset_version(DATA_PATH)
+    cubo = carregar('cubo_sql', load_sql_cube, versao)
+    df = indice_filtros = indice_ralis = momentos = fluxos = modelo_ralis = None
+    partidas, partida, validacao = None, None, None
+    chave_dados = ('sqlite', versao)
+elif modo_ao_vivo:
+    with block('ao_vivo/snapshot') as medido:
+        snapshot = live_snapshot(DATA_PATH)
+        medido.rows = len(snapshot.data)
+    df, indice_filtros, cubo, indice_ralis = snapshot.data, snapshot.filters, snapshot.cube, snapshot.rallies
+    momentos, fluxos, modelo_ralis = snapshot.moments, snapshot.flows, snapshot.markov
+    partidas, partida = snapshot.matches, None
+    chave_dados = ('ao_vivo', snapshot.source, snapshot.version)
+    validacao = (get_live_dataset(DATA_PATH).validation, None)
+else:
+    versao = manifest_version() if particoes is not None else dataset_version(DATA_PATH)
+    if particoes is None:
+        validacao = carregar('validacao', load_validation, versao)
+    else:
+        # Partições validadas na importação: só o relatório fica no manifesto
+        relatorios = [p['validation'] for p in escolhidas if 'validation' in p]
+        validacao = (merge_reports(relatorios), None) if relatorios else None
+    partidas = carregar('partidas', load_matches, versao, particoes)
+    # Uma partida é um intervalo contíguo de linhas: selecioná-la é fatiar
+    opcoes_partida = [None] + list(range(len(partidas)))
+    partida_anterior = st.session_state.get('partida')
+    partida = st.sidebar.selectbox(
+        "Partida:",
+        options=opcoes_partida,
+        index=opcoes_partida.index(partida_anterior) if partida_anterior in opcoes_partida else 0,
+        format_func=lambda p: "Todas" if p is None else match_label(p)
+    )
+    if partida is None:
+        df = carregar('dados', load_data, versao, particoes)
+        linhas = len(df)
+        indice_filtros = carregar('indice_filtros', load_filter_index, versao, particoes, linhas=linhas)
+        cubo = carregar('cubo', load_cube, versao, particoes, linhas=linhas)
+        indice_ralis = carregar('indice_ralis', load_rally_index, versao, particoes, linhas=linhas)
+        momentos = carregar('momentos', load_moments, versao, particoes, linhas=linhas)
+        fluxos = carregar('fluxos', load_flows, versao, particoes, linhas=linhas)
+        modelo_ralis = carregar('markov', load_markov, versao, particoes, linhas=linhas)
+        chave_dados = (versao, particoes)
+    else:
+        df, indice_filtros, cubo, indice_ralis, momentos, fluxos, modelo_ralis = carregar(
+            'partida', load_match_view, versao, particoes, partida)
+        chave_dados = (versao, particoes, partida)
+
 # Filtros que se aplicam a todas as páginas
+if indice_filtros is None:
+    times = [t for t in cubo.labels['team_pt'] if t is not None]
+else:
+    times = indice_filtros.options('team_pt')
 times_selecionados = st.sidebar.multiselect(
     "Selecione os times:",
-    options=df['team_pt'].unique(),
-    default=df['team_pt'].unique()
+    options=times,
+    default=times
 )
 
-# Aplicar filtro global
-df_filtrado = df[df['team_pt'].isin(times_selecionados)] if times_selecionados else df
+# Aplicar filtro global pelo índice de bitmaps
+filtros_globais = {'team_pt': times_selecionados}
+if df is None:
+    selecao = None
+else:
+    with block('filtros/selecao', rows=len(df)):
+        selecao = indice_filtros.select(df, filtros_globais)
 
-# Armazenar dados filtrados na session state para usar em outras páginas
-st.session_state.df_filtrado = df_filtrado
+# A session state guarda só referências ao dataset compartilhado (o mesmo
+# objeto para todas as sessões) e o bitmap da seleção desta sessão;
+# as páginas com filtros próprios partem do dataset completo e do índice
+st.session_state.selecao = selecao
+st.session_state.dados = df
+st.session_state.chave_dados = chave_dados
+st.session_state.indice_filtros = indice_filtros
+st.session_state.filtros_globais = filtros_globais
+st.session_state.cubo = cubo
+st.session_state.indice_ralis = indice_ralis
+st.session_state.momentos = momentos
+st.session_state.fluxos = fluxos
+st.session_state.modelo_ralis = modelo_ralis
+st.session_state.partidas = partidas
+st.session_state.partida = partida
+st.session_state.validacao = validacao
+st.session_state.particoes = particoes
 st.session_state.translate_value = translate_value
 
+if modo_ao_vivo:
+    watch(DATA_PATH, snapshot.version)
+
 # Página Principal
 st.title("🏐 Análise Tática de Voleibol Universitário")
 st.markdown("---")
@@ -103,20 +310,29 @@ st.subheader("📈 Visão Geral dos Dados Filtrados")
 
 col1, col2, col3, col4 = st.columns(4)
 
+with block('inicio/kpis'):
+    total_rallys = cubo.count(filtros_globais)
+    aces = cubo.count(filtros_globais, {'win_reason': 'ace'})
+    kills = cubo.count(filtros_globais, {'win_reason': 'kill'})
+
 with col1:
-    total_rallys = len(df_filtrado)
     st.metric("Total de Ralis", total_rallys)
 
 with col2:
-    aces = len(df_filtrado[df_filtrado['win_reason'] == 'ace'])
     st.metric("Aces", aces)
 
 with col3:
-    kills = len(df_filtrado[df_filtrado['win_reason'] == 'kill'])
     st.metric("Kills", kills)
 
 with col4:
-    rallies_complexos = len(df_filtrado[df_filtrado['round'] > 2])
+    if selecao is None:
+        # ``round`` não é dimensão do cubo: a contagem varre a tabela do banco
+        rallies_complexos = memoized('inicio/ralis_complexos', {},
+                                     lambda: cubo.count_rows('"round" > 2', filtros_globais))
+    else:
+        rallies_complexos = memoized('inicio/ralis_complexos', {}, lambda: int((selecao.frame()['round'] > 2).sum()))
     st.metric("Ralis Complexos", rallies_complexos)
 
-st.info("💡 **Dica**: Use os filtros na sidebar para refinar sua análise. As seleções se aplicam a todas as páginas!")
\ No newline at end of file
+st.info("💡 **Dica**: Use os filtros na sidebar para refinar sua análise. As seleções se aplicam a todas as páginas!")
+
+panel()
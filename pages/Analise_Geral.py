@@ -4,16 +4,43 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 
+from core.charts import chart, slim_figure
+from core.memo import memoized
+from core.translation import MISSING_LABEL
+from core.live import sync_session
+from core.instrument import begin_run, panel, plotly_chart
+
 st.set_page_config(page_title="Análise Geral", layout="wide")
 
 st.title("📊 Análise Geral Integrada")
 st.markdown("Visão completa do desempenho das equipes")
 
-if 'df_filtrado' not in st.session_state:
+if 'selecao' not in st.session_state:
     st.error("Por favor, volte à página inicial para carregar os dados.")
     st.stop()
 
-df = st.session_state.df_filtrado
+# Backend SQLite: as linhas não estão em memória e esta página depende delas
+if st.session_state.selecao is None:
+    st.warning("Esta página usa as linhas do dataset, que não são carregadas com o backend SQLite "
+               "(BACKEND_DADOS=sqlite). A página inicial mostra as contagens do banco.")
+    st.stop()
+
+begin_run('analise_geral')
+
+# No modo ao vivo, troca os dados pelo snapshot mais recente
+sync_session()
+
+selecao = st.session_state.selecao
+filtros_globais = st.session_state.filtros_globais
+cubo = st.session_state.cubo
+indice_filtros = st.session_state.indice_filtros
+indice_ralis = st.session_state.indice_ralis
+momentos = st.session_state.momentos
+
+def taxa_vitoria(time, codigo):
+    jogadas = cubo.count(filtros_globais, {'team_pt': time})
+    vitorias = cubo.count(filtros_globais, {'team_pt': time, 'winning_team': codigo})
+    return vitorias / jogadas * 100 if jogadas else 0.0
 
 # Métricas consolidadas
 st.subheader("🏆 Performance Consolidada")
@@ -21,73 +48,100 @@ st.subheader("🏆 Performance Consolidada")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    win_rate_a = len(df[(df['winning_team'] == 'a') & (df['team_pt'] == 'Time A')]) / len(df[df['team_pt'] == 'Time A']) * 100
+    win_rate_a = taxa_vitoria('Time A', 'a')
     st.metric("Time A - Taxa de Vitória", f"{win_rate_a:.1f}%")
 
 with col2:
-    win_rate_b = len(df[(df['winning_team'] == 'b') & (df['team_pt'] == 'Time B')]) / len(df[df['team_pt'] == 'Time B']) * 100
+    win_rate_b = taxa_vitoria('Time B', 'b')
     st.metric("Time B - Taxa de Vitória", f"{win_rate_b:.1f}%")
 
 with col3:
-    avg_rally_length = df['round'].mean()
+    avg_rally_length = memoized('geral/duracao_media', {}, lambda: selecao.frame()['round'].mean())
     st.metric("Duração Média do Rally", f"{avg_rally_length:.1f} ações")
 
 with col4:
     efficiency_diff = abs(win_rate_a - win_rate_b)
     st.metric("Diferença de Eficiência", f"{efficiency_diff:.1f}%")
 
-# Dashboard interativo
-st.subheader("📈 Dashboard de Performance")
-
-# Seleção de métrica para análise comparativa
-metric_option = st.selectbox(
-    "Selecione a métrica para análise:",
-    ['win_reason', 'hit_type', 'serve_type', 'num_blockers']
-)
-
-col5, col6 = st.columns(2)
-
-with col5:
-    # Heatmap de performance
-    st.markdown("**Mapa de Calor de Performance**")
+# Seções com widgets próprios rodam como fragmentos: trocar a métrica ou o
+# intervalo reexecuta só a seção, que recebe explicitamente suas dependências
+@st.fragment
+def secao_mapa_calor(cubo, filtros_globais):
+    # Seleção de métrica para análise comparativa
+    metric_option = st.selectbox(
+        "Selecione a métrica para análise:",
+        ['win_reason', 'hit_type', 'serve_type', 'num_blockers']
+    )
     
-    performance_data = df.groupby(['team_pt', metric_option]).size().unstack(fill_value=0)
-    if not performance_data.empty:
-        fig1 = px.imshow(
+    # Tipos de ataque e saque vêm das colunas traduzidas do cubo de contagens
+    def grafico_mapa_calor():
+        dimensao = {'hit_type': 'hit_type_pt', 'serve_type': 'serve_type_pt'}.get(metric_option, metric_option)
+        performance_data = cubo.table(['team_pt', dimensao], filtros_globais)
+        performance_data = performance_data.drop(columns=MISSING_LABEL, errors='ignore')
+        performance_data = performance_data[performance_data.sum(axis=1) > 0]
+        if performance_data.empty:
+            return None
+        return px.imshow(
             performance_data,
             title=f"Performance por Time - {metric_option}",
             aspect="auto",
             color_continuous_scale="viridis"
         )
-        st.plotly_chart(fig1, use_container_width=True)
 
-with col6:
-    # Evolução temporal
-    st.markdown("**Evolução por Rally**")
-    
+    fig1 = memoized('geral/mapa_calor', {'metric_option': metric_option}, grafico_mapa_calor)
+    if fig1 is not None:
+        plotly_chart(fig1, 'geral/mapa_calor')
+
+@st.fragment
+def secao_evolucao(indice_ralis, indice_filtros, filtros_globais):
     rally_range = st.slider("Intervalo de rallys:", 1, 50, (1, 10))
-    rally_data = df[(df['rally'] >= rally_range[0]) & (df['rally'] <= rally_range[1])]
-    
-    rally_stats = rally_data.groupby('rally').agg({
-        'winning_team': 'count',
-        'round': 'mean'
-    }).reset_index()
-    
-    if not rally_stats.empty:
-        fig2 = make_subplots(specs=[[{"secondary_y": True}]])
+
+    def grafico_evolucao():
+        # Lido da tabela-resumo por rali, sem varrer as ações
+        rally_stats = indice_ralis.per_rally(['round'], filtros_globais, indice_filtros, *rally_range)
+        if rally_stats.empty:
+            return None
+        fig = make_subplots(specs=[[{"secondary_y": True}]])
         
-        fig2.add_trace(
-            go.Scatter(x=rally_stats['rally'], y=rally_stats['winning_team'], name="Ralis"),
+        # Um ponto por rali de cada partida, na ordem do arquivo; o intervalo
+        # vale para o número do rali dentro de cada partida
+        partida_rali = rally_stats[['match', 'rally']].to_numpy()
+        hover = "Partida %{customdata[0]} · Rali %{customdata[1]}<br>%{y}"
+        fig.add_trace(
+            go.Scatter(x=rally_stats['sequence'], y=rally_stats['actions'], name="Ações",
+                       customdata=partida_rali, hovertemplate=hover),
             secondary_y=False,
         )
         
-        fig2.add_trace(
-            go.Scatter(x=rally_stats['rally'], y=rally_stats['round'], name="Duração Média"),
+        fig.add_trace(
+            go.Scatter(x=rally_stats['sequence'], y=rally_stats['round_mean'], name="Duração Média",
+                       customdata=partida_rali, hovertemplate=hover),
             secondary_y=True,
         )
         
-        fig2.update_layout(title_text="Evolução do Jogo por Rally")
-        st.plotly_chart(fig2, use_container_width=True)
+        fig.update_layout(title_text="Evolução do Jogo por Rally")
+        fig.update_xaxes(title_text="Rali (sequência)")
+        # Um ponto por rali: reduzido à largura do gráfico em arquivos grandes
+        return slim_figure(fig)
+
+    fig2 = memoized('geral/evolucao', {'rally_range': rally_range}, grafico_evolucao)
+    if fig2 is not None:
+        chart(fig2, 'geral/evolucao')
+
+# Dashboard interativo
+st.subheader("📈 Dashboard de Performance")
+
+col5, col6 = st.columns(2)
+
+with col5:
+    # Heatmap de performance
+    st.markdown("**Mapa de Calor de Performance**")
+    secao_mapa_calor(cubo, filtros_globais)
+
+with col6:
+    # Evolução temporal
+    st.markdown("**Evolução por Rally**")
+    secao_evolucao(indice_ralis, indice_filtros, filtros_globais)
 
 # Análise de correlação
 st.subheader("🔗 Análise de Correlações")
@@ -97,29 +151,36 @@ col7, col8 = st.columns(2)
 with col7:
     st.markdown("**Relação entre Variáveis**")
     
-    # Criar matriz numérica para correlação
-    numeric_df = df.select_dtypes(include=['number'])
-    if not numeric_df.empty:
-        fig3 = px.imshow(
-            numeric_df.corr(),
+    def grafico_correlacao():
+        # Matriz de correlação das colunas numéricas, montada das estatísticas
+        # suficientes pré-calculadas (sem percorrer as linhas)
+        if not momentos.columns or momentos.count(filtros_globais) == 0:
+            return None
+        return px.imshow(
+            momentos.corr(filtros_globais),
             title="Matriz de Correlação",
             color_continuous_scale="RdBu",
             aspect="auto"
         )
-        st.plotly_chart(fig3, use_container_width=True)
+
+    fig3 = memoized('geral/correlacao', {}, grafico_correlacao)
+    if fig3 is not None:
+        plotly_chart(fig3, 'geral/correlacao')
 
 with col8:
     st.markdown("**Fatores de Sucesso**")
     
-    success_factors = []
-    for col in ['num_blockers', 'round']:
-        if col in df.columns:
-            correlation = df[df['win_reason'] == 'kill'][col].mean() - df[df['lose_reason'] == 'hit_error'][col].mean()
-            success_factors.append({'Fator': col, 'Impacto': correlation})
-    
-    if success_factors:
+    def grafico_fatores():
+        success_factors = []
+        for col in ['num_blockers', 'round']:
+            if col in momentos.columns:
+                correlation = (momentos.mean(col, filtros_globais, {'win_reason': 'kill'})
+                               - momentos.mean(col, filtros_globais, {'lose_reason': 'hit_error'}))
+                success_factors.append({'Fator': col, 'Impacto': correlation})
+        if not success_factors:
+            return None
         factors_df = pd.DataFrame(success_factors)
-        fig4 = px.bar(
+        return px.bar(
             factors_df,
             x='Fator',
             y='Impacto',
@@ -127,24 +188,39 @@ with col8:
             color='Impacto',
             color_continuous_scale='balance'
         )
-        st.plotly_chart(fig4, use_container_width=True)
+
+    fig4 = memoized('geral/fatores', {}, grafico_fatores)
+    if fig4 is not None:
+        plotly_chart(fig4, 'geral/fatores')
 
 # Insights automáticos
 st.markdown("---")
 st.subheader("💡 Insights Automáticos")
 
+def calcular_insights():
+    df = selecao.frame()
+    kills = df[df['win_reason'] == 'kill']
+    return {
+        'best_attack': kills['hit_type_pt'].mode(),
+        'dangerous_serve': df[df['win_reason'] == 'ace']['serve_type_pt'].mode(),
+        'common_block': df['num_blockers'].mode(),
+        'optimal_rally': kills['round'].median(),
+    }
+
+insights = memoized('geral/insights', {}, calcular_insights)
+
 col9, col10 = st.columns(2)
 
 with col9:
     st.info("**🎯 Padrões Ofensivos**")
     
     # Insight 1: Tipo de ataque mais efetivo
-    best_attack = df[df['win_reason'] == 'kill']['hit_type_pt'].mode()
+    best_attack = insights['best_attack']
     if not best_attack.empty:
         st.write(f"- Ataque mais efetivo: **{best_attack.iloc[0]}**")
     
     # Insight 2: Saque mais perigoso
-    dangerous_serve = df[df['win_reason'] == 'ace']['serve_type_pt'].mode()
+    dangerous_serve = insights['dangerous_serve']
     if not dangerous_serve.empty:
         st.write(f"- Saque mais perigoso: **{dangerous_serve.iloc[0]}**")
 
@@ -152,12 +228,12 @@ with col10:
     st.info("**🛡️ Padrões Defensivos**")
     
     # Insight 3: Estratégia de bloqueio
-    common_block = df['num_blockers'].mode()
+    common_block = insights['common_block']
     if not common_block.empty:
         st.write(f"- Bloqueio mais comum: **{int(common_block.iloc[0])} bloqueadores**")
     
     # Insight 4: Rally ideal
-    optimal_rally = df[df['win_reason'] == 'kill']['round'].median()
+    optimal_rally = insights['optimal_rally']
     st.write(f"- Duração ideal do rally: **{optimal_rally:.0f} ações**")
 
 st.markdown("---")
@@ -166,4 +242,6 @@ st.success("""
 Esta análise revela os padrões fundamentais que diferenciam equipes de alto desempenho. 
 Os dados mostram que a eficiência não está apenas nas ações individuais, mas na 
 integração coerente entre saque, ataque e defesa.
-""")
\ No newline at end of file
+""")
+
+panel()
@@ -3,59 +3,86 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 
+from core.charts import chart, slim_figure
+from core.memo import memoized, incremental
+from core.metrics import cube_metrics, CUBE_AXES
+from core.bootstrap import bootstrap_ci
+from core.live import sync_session
+from core.instrument import begin_run, panel, plotly_chart
+
 st.set_page_config(page_title="Análise de Ataque", layout="wide")
 
 st.title("⚡ Análise de Ataque")
 st.markdown("Eficiência e padrões ofensivos das equipes")
 
-if 'df_filtrado' not in st.session_state:
+if 'selecao' not in st.session_state:
     st.error("Por favor, volte à página inicial para carregar os dados.")
     st.stop()
 
-df = st.session_state.df_filtrado
+# Backend SQLite: as linhas não estão em memória e esta página depende delas
+if st.session_state.selecao is None:
+    st.warning("Esta página usa as linhas do dataset, que não são carregadas com o backend SQLite "
+               "(BACKEND_DADOS=sqlite). A página inicial mostra as contagens do banco.")
+    st.stop()
+
+begin_run('ataque')
+
+# No modo ao vivo, troca os dados pelo snapshot mais recente
+sync_session()
+
+indice = st.session_state.indice_filtros
+filtros_globais = st.session_state.filtros_globais
+cubo = st.session_state.cubo
+indice_ralis = st.session_state.indice_ralis
 
 # Filtros específicos para ataque
 st.sidebar.markdown("---")
 st.sidebar.subheader("⚡ Filtros de Ataque")
 
-tipos_ataque = df['hit_type_pt'].dropna().unique()
+tipos_ataque = indice.options('hit_type_pt', within=filtros_globais)
 tipos_ataque_selecionados = st.sidebar.multiselect(
     "Tipos de ataque:",
     options=tipos_ataque,
     default=tipos_ataque
 )
 
-df_ataque = df[df['hit_type_pt'].isin(tipos_ataque_selecionados)] if tipos_ataque_selecionados else df
+filtros_ataque = {**filtros_globais, 'hit_type_pt': tipos_ataque_selecionados}
+
+def dados_ataque():
+    return indice.filter(st.session_state.dados, filtros_ataque)
+
+# Métricas de ataque (lidas do cubo de contagens)
+total_ataque = cubo.count(filtros_ataque)
+
+def taxa(condicao):
+    return cubo.count(filtros_ataque, condicao) / total_ataque * 100 if total_ataque else 0.0
 
-# Métricas de ataque
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    kill_rate = len(df_ataque[df_ataque['win_reason'] == 'kill']) / len(df_ataque) * 100
+    kill_rate = taxa({'win_reason': 'kill'})
     st.metric("Taxa de Kill", f"{kill_rate:.1f}%")
 
 with col2:
-    erro_rate = len(df_ataque[df_ataque['lose_reason'] == 'hit_error']) / len(df_ataque) * 100
+    erro_rate = taxa({'lose_reason': 'hit_error'})
     st.metric("Taxa de Erro", f"{erro_rate:.1f}%")
 
 with col3:
-    tool_rate = len(df_ataque[df_ataque['win_reason'] == 'tool']) / len(df_ataque) * 100
+    tool_rate = taxa({'win_reason': 'tool'})
     st.metric("Taxa de Tool", f"{tool_rate:.1f}%")
 
-# Gráficos principais
-col4, col5 = st.columns(2)
-
-with col4:
-    st.subheader("Preferências de Ataque por Time")
-    
+# A seção com o seletor de time roda como fragmento: trocar o time reexecuta
+# só esse gráfico, que recebe explicitamente o cubo e os filtros
+@st.fragment
+def secao_preferencias(cubo, filtros_ataque):
     # Gráfico interativo com seleção de time
-    team_attack = st.selectbox("Selecione o time:", df_ataque['team_pt'].unique())
+    team_attack = st.selectbox("Selecione o time:", cubo.table('team_pt', filtros_ataque).index)
     
-    team_data = df_ataque[df_ataque['team_pt'] == team_attack]
-    attack_dist = team_data['hit_type_pt'].value_counts()
-    
-    if not attack_dist.empty:
-        fig1 = px.bar(
+    def grafico_preferencias():
+        attack_dist = cubo.table('hit_type_pt', filtros_ataque, {'team_pt': team_attack}).sort_values(ascending=False)
+        if attack_dist.empty:
+            return None
+        return px.bar(
             x=attack_dist.values,
             y=attack_dist.index,
             orientation='h',
@@ -63,41 +90,63 @@ with col4:
             color=attack_dist.values,
             color_continuous_scale='viridis'
         )
-        st.plotly_chart(fig1, use_container_width=True)
+
+    fig1 = memoized('ataque/preferencias', {**filtros_ataque, 'time': team_attack}, grafico_preferencias)
+    if fig1 is not None:
+        plotly_chart(fig1, 'ataque/preferencias')
+
+# Gráficos principais
+col4, col5 = st.columns(2)
+
+with col4:
+    st.subheader("Preferências de Ataque por Time")
+    
+    secao_preferencias(cubo, filtros_ataque)
 
 with col5:
     st.subheader("Eficácia por Tipo de Ataque")
     
-    # Calcular eficácia por tipo de ataque
-    attack_stats = []
-    for attack_type in df_ataque['hit_type_pt'].unique():
-        subset = df_ataque[df_ataque['hit_type_pt'] == attack_type]
-        kills = len(subset[subset['win_reason'] == 'kill'])
-        errors = len(subset[subset['lose_reason'] == 'hit_error'])
-        total = len(subset)
-        efficiency = (kills - errors) / total * 100 if total > 0 else 0
-        
-        attack_stats.append({
-            'Tipo': attack_type,
-            'Eficiência': efficiency,
-            'Total': total
+    def grafico_eficacia():
+        # Eficácia por tipo de ataque a partir do cubo; marcar/desmarcar um
+        # filtro só soma ou subtrai a fatia do valor alterado
+        attack_stats = cube_metrics(
+            incremental('ataque/tipos', cubo, ['hit_type_pt'] + CUBE_AXES, filtros_ataque),
+            cubo.labels, 'hit_type_pt'
+        )
+        # Intervalo de 95% por bootstrap de ralis (contagens agregadas, sem reamostrar linhas)
+        ic = bootstrap_ci(st.session_state.dados, 'hit_type_pt', 'efficiency',
+                          indice_ralis.run_of_row, indice.rows(filtros_ataque)).reindex(attack_stats.index)
+        attack_df = pd.DataFrame({
+            'Tipo': attack_stats.index,
+            'Eficiência': attack_stats['efficiency'].to_numpy(),
+            'Total': attack_stats['total'].to_numpy(),
+            'IC inferior': ic['low'].to_numpy(),
+            'IC superior': ic['high'].to_numpy()
         })
-    
-    attack_df = pd.DataFrame(attack_stats)
-    attack_df = attack_df[attack_df['Total'] > 5]  # Filtrar tipos com amostra significativa
-    
-    if not attack_df.empty:
-        fig2 = px.scatter(
+        attack_df = attack_df[attack_df['Total'] > 5]  # Filtrar tipos com amostra significativa
+        if attack_df.empty:
+            return None
+        fig = px.scatter(
             attack_df, 
             x='Total', 
             y='Eficiência',
             size='Total',
             color='Eficiência',
             hover_name='Tipo',
-            title="Eficiência vs Frequência dos Tipos de Ataque",
+            hover_data=['IC inferior', 'IC superior'],
+            title="Eficiência vs Frequência dos Tipos de Ataque (IC 95%)",
             size_max=50
         )
-        st.plotly_chart(fig2, use_container_width=True)
+        fig.update_traces(error_y=dict(
+            type='data', symmetric=False,
+            array=attack_df['IC superior'] - attack_df['Eficiência'],
+            arrayminus=attack_df['Eficiência'] - attack_df['IC inferior']
+        ))
+        return fig
+
+    fig2 = memoized('ataque/eficacia', filtros_ataque, grafico_eficacia)
+    if fig2 is not None:
+        plotly_chart(fig2, 'ataque/eficacia')
 
 # Análise de localização
 st.subheader("🎯 Padrões de Finalização")
@@ -106,31 +155,42 @@ col6, col7 = st.columns(2)
 
 with col6:
     st.markdown("**Zonas de Aterrissagem**")
-    location_data = df_ataque['hit_land_location'].value_counts().head(15)
-    if not location_data.empty:
-        fig3 = px.bar(
+    def grafico_zonas():
+        location_data = dados_ataque()['hit_land_location'].value_counts().head(15)
+        if location_data.empty:
+            return None
+        return px.bar(
             x=location_data.index.astype(str),
             y=location_data.values,
             title="Zonas Preferidas para Finalização"
         )
-        st.plotly_chart(fig3, use_container_width=True)
+
+    fig3 = memoized('ataque/zonas', filtros_ataque, grafico_zonas)
+    if fig3 is not None:
+        plotly_chart(fig3, 'ataque/zonas')
 
 with col7:
     st.markdown("**Evolução do Ataque por Set**")
-    set_data = df_ataque.groupby('rally').agg({
-        'win_reason': lambda x: (x == 'kill').sum(),
-        'lose_reason': lambda x: (x == 'hit_error').sum()
-    }).reset_index()
-    
-    if not set_data.empty:
-        fig4 = px.line(
+    def grafico_evolucao():
+        set_data = indice_ralis.per_rally(['kills', 'errors'], filtros_ataque, indice)
+        set_data = set_data.rename(columns={'kills_sum': 'Kills', 'errors_sum': 'Erros'})
+        if set_data.empty:
+            return None
+        # Um ponto por rali: reduzido à largura do gráfico em arquivos grandes
+        # Eixo x: ralis na ordem do arquivo (o número do rali recomeça a cada partida)
+        return slim_figure(px.line(
             set_data, 
-            x='rally', 
-            y=['win_reason', 'lose_reason'],
+            x='sequence', 
+            y=['Kills', 'Erros'],
+            hover_data=['match', 'rally'],
             title="Kills e Erros por Rally",
-            labels={'value': 'Quantidade', 'variable': 'Tipo'}
-        )
-        st.plotly_chart(fig4, use_container_width=True)
+            labels={'value': 'Quantidade', 'variable': 'Tipo', 'sequence': 'Rali (sequência)',
+                    'match': 'Partida', 'rally': 'Rali'}
+        ))
+
+    fig4 = memoized('ataque/evolucao', filtros_ataque, grafico_evolucao)
+    if fig4 is not None:
+        chart(fig4, 'ataque/evolucao')
 
 st.markdown("---")
 st.info("""
@@ -139,4 +199,6 @@ st.info("""
 - Times diferentes mostram preferências por tipos específicos de ataque
 - Zonas 4 e 1 são as mais utilizadas para finalização
 - A eficiência tende a cair em rallies mais longos
-""")
\ No newline at end of file
+""")
+
+panel()
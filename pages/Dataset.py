@@ -1,16 +1,41 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 
+from core.exports import EXPORT_FORMATS, export_reader, export_signature
+from core.live import sync_session
+from core.memo import memoized
+from core.partitions import load_partitions, manifest_version
+from core.storage import file_signature
+from core.viewer import SortIndex, page_window, search_rows
+from core.instrument import begin_run, panel
+
 st.set_page_config(page_title="Dataset e Metadados", layout="wide")
 
 st.title("📁 Dataset e Metadados")
 st.markdown("Informações completas sobre a base de dados utilizada")
 
-if 'df_filtrado' not in st.session_state:
+if 'selecao' not in st.session_state:
     st.error("Por favor, volte à página inicial para carregar os dados.")
     st.stop()
 
-df = st.session_state.df_filtrado
+# Backend SQLite: as linhas não estão em memória e esta página depende delas
+if st.session_state.selecao is None:
+    st.warning("Esta página usa as linhas do dataset, que não são carregadas com o backend SQLite "
+               "(BACKEND_DADOS=sqlite). A página inicial mostra as contagens do banco.")
+    st.stop()
+
+begin_run('dataset')
+
+# No modo ao vivo, troca os dados pelo snapshot mais recente
+sync_session()
+
+selecao = st.session_state.selecao
+dados = st.session_state.dados
+indice_ralis = st.session_state.indice_ralis
+# O número do rali recomeça a cada partida: os ralis são contados por partida
+ralis = indice_ralis.runs_present(st.session_state.filtros_globais['team_pt'])
+partidas = np.unique(indice_ralis.matches[ralis])
 
 # Informações do dataset
 col1, col2 = st.columns(2)
@@ -18,23 +43,64 @@ col1, col2 = st.columns(2)
 with col1:
     st.subheader("📊 Estatísticas do Dataset")
     
-    st.metric("Total de Registros", len(df))
-    st.metric("Total de Colunas", len(df.columns))
-    st.metric("Ralis Únicos", df['rally'].nunique())
-    st.metric("Período Coberto", f"{df['rally'].min()} a {df['rally'].max()}")
+    st.metric("Total de Registros", len(selecao))
+    st.metric("Total de Colunas", len(dados.columns))
+    st.metric("Ralis Únicos", len(ralis))
+    st.metric("Período Coberto",
+              f"{len(partidas)} partida{'s' if len(partidas) != 1 else ''} (até {indice_ralis.numbers[ralis].max()} ralis)"
+              if len(ralis) else "-")
 
 with col2:
     st.subheader("🔍 Qualidade dos Dados")
     
-    complete_records = df.notna().all(axis=1).sum()
-    st.metric("Registros Completos", f"{(complete_records/len(df)*100):.1f}%")
+    # Colunas sem dados (sem correspondência no arquivo, ver validação) não contam
+    def registros_completos():
+        quadro = selecao.frame()
+        return quadro.loc[:, quadro.notna().any()].notna().all(axis=1).sum()
+
+    complete_records = memoized('dataset/completos', {}, registros_completos)
+    st.metric("Registros Completos", f"{(complete_records/len(selecao)*100):.1f}%")
     
-    numeric_columns = len(df.select_dtypes(include=['number']).columns)
+    numeric_columns = len(dados.select_dtypes(include=['number']).columns)
     st.metric("Colunas Numéricas", numeric_columns)
     
-    categorical_columns = len(df.select_dtypes(include=['object']).columns)
+    categorical_columns = len(dados.select_dtypes(include=['object', 'category']).columns)
     st.metric("Colunas Categóricas", categorical_columns)
 
+# Validação feita na carga: colunas remapeadas e linhas em quarentena
+# (sem relatório para partições importadas antes da validação)
+if st.session_state.validacao is not None:
+    st.subheader("🧪 Validação na Carga")
+
+    relatorio, quarentena = st.session_state.validacao
+
+    col3, col4 = st.columns(2)
+
+    with col3:
+        st.metric("Linhas Lidas", relatorio['rows'])
+        st.metric("Linhas em Quarentena", relatorio['quarantined'],
+                  help="Linhas que violam alguma regra: ficam fora de todos os gráficos")
+        if relatorio['mapping']:
+            st.markdown("**Mapeamento de colunas aplicado:**")
+            for coluna, origem in relatorio['mapping'].items():
+                if origem is None:
+                    st.markdown(f"- `{coluna}`: nenhuma coluna do arquivo corresponde (vazia)")
+                else:
+                    st.markdown(f"- `{coluna}` ← valores da coluna `{origem}` do arquivo")
+        else:
+            st.markdown("Colunas do arquivo conferem com o esquema.")
+
+    with col4:
+        if relatorio['rules']:
+            regras = pd.DataFrame(list(relatorio['rules'].items()), columns=['Regra', 'Linhas'])
+            st.dataframe(regras, use_container_width=True, hide_index=True)
+        else:
+            st.success("Nenhuma linha violou as regras de validação.")
+
+    if quarentena is not None and len(quarentena):
+        with st.expander(f"Ver as {len(quarentena)} linhas em quarentena"):
+            st.dataframe(quarentena, use_container_width=True, hide_index=True)
+
 # Dicionário de variáveis
 st.subheader("📖 Dicionário de Variáveis")
 
@@ -65,6 +131,16 @@ st.dataframe(var_df, use_container_width=True, hide_index=True)
 # Dados brutos
 st.subheader("📋 Dados Brutos")
 
+# Índice de ordenação por versão dos dados: permutações calculadas uma vez por coluna
+@st.cache_resource(max_entries=2)
+def indice_ordenacao(chave_dados, _dados):
+    return SortIndex(_dados)
+
+# Estatísticas descritivas por versão dos dados e filtros
+@st.cache_data(max_entries=16)
+def estatisticas_descritivas(chave_dados, filtros, _selecao):
+    return _selecao.frame().describe()
+
 # Opções de visualização
 view_option = st.radio(
     "Tipo de visualização:",
@@ -72,33 +148,90 @@ view_option = st.radio(
 )
 
 if view_option == "Amostra dos dados":
-    st.dataframe(df.head(100), use_container_width=True)
+    st.dataframe(selecao.head(100), use_container_width=True)
     
 elif view_option == "Dados completos":
-    st.dataframe(df, use_container_width=True)
+    # Só a página atual é recortada e enviada ao navegador
+    colunas = list(dados.columns)
+
+    col_a, col_b, col_c, col_d = st.columns(4)
+    with col_a:
+        coluna_ordem = st.selectbox("Ordenar por:", ["(ordem original)"] + colunas)
+    with col_b:
+        crescente = st.radio("Ordem:", ["Crescente", "Decrescente"], horizontal=True) == "Crescente"
+    with col_c:
+        coluna_busca = st.selectbox("Buscar na coluna:", colunas)
+    with col_d:
+        termo_busca = st.text_input("Contém:")
+
+    linhas = selecao.rows()
+    if termo_busca:
+        linhas = search_rows(dados, coluna_busca, termo_busca, linhas)
+    if coluna_ordem != "(ordem original)":
+        ordem = indice_ordenacao(st.session_state.chave_dados, dados).order(coluna_ordem, crescente, linhas)
+    else:
+        ordem = np.arange(len(dados)) if linhas is None else linhas
+        if not crescente:
+            ordem = ordem[::-1]
+
+    col_e, col_f = st.columns(2)
+    with col_e:
+        tamanho_pagina = st.selectbox("Linhas por página:", [25, 50, 100, 250, 500], index=2)
+    total_paginas = max(1, -(-len(ordem) // tamanho_pagina))
+    with col_f:
+        pagina = st.number_input("Página:", min_value=1, max_value=total_paginas, value=1, step=1)
+
+    inicio = (pagina - 1) * tamanho_pagina
+    st.caption(f"Linhas {min(inicio + 1, len(ordem))}–{min(inicio + tamanho_pagina, len(ordem))} "
+               f"de {len(ordem)} (página {pagina} de {total_paginas})")
+    st.dataframe(page_window(dados, ordem, pagina, tamanho_pagina), use_container_width=True)
     
 else:
-    st.dataframe(df.describe(), use_container_width=True)
+    st.dataframe(
+        estatisticas_descritivas(st.session_state.chave_dados, st.session_state.filtros_globais, selecao),
+        use_container_width=True
+    )
 
-# Download dos dados
+# Download dos dados: os arquivos só são gerados no clique, em blocos,
+# e ficam em cache por versão dos dados + filtros
 st.subheader("📥 Download dos Dados")
 
+def botoes_download(fonte, nome_arquivo, *assinatura):
+    for formato, info in EXPORT_FORMATS.items():
+        st.download_button(
+            label=f"📊 Baixar {info['label']}",
+            data=export_reader(fonte, formato, export_signature(*assinatura, formato)),
+            file_name=f"{nome_arquivo}.{info['extension']}",
+            mime=info['mime'],
+            key=f"download_{nome_arquivo}_{formato}",
+            on_click='ignore'
+        )
+
+chave_dados = st.session_state.chave_dados
+particoes = st.session_state.get('particoes')
+
 col3, col4 = st.columns(2)
 
 with col3:
     st.markdown("**Download dos Dados Filtrados**")
-    csv = df.to_csv(index=False)
-    st.download_button(
-        label="📊 Baixar CSV Filtrado",
-        data=csv,
-        file_name="dados_voleibol_filtrado.csv",
-        mime="text/csv"
-    )
+    # As linhas só são copiadas se o arquivo ainda não estiver em cache
+    botoes_download(selecao.frame, "dados_voleibol_filtrado", chave_dados, st.session_state.filtros_globais)
 
 with col4:
-    st.markdown("**Download do Dataset Original**")
-    # Aqui você pode adicionar o download do dataset original se necessário
-    st.info("Dataset completo disponível no repositório do projeto")
+    if particoes is None:
+        # O CSV de origem como está: todas as partidas, sem validação nem traduções
+        caminho = st.session_state.caminho_dados
+        st.markdown("**Download do Arquivo Original**")
+        st.caption("O CSV de origem completo, sem validação, mapeamento de colunas, traduções ou filtros.")
+        botoes_download(caminho, "dados_voleibol_original", caminho, file_signature(caminho))
+    else:
+        # Partições: o CSV de origem não é guardado; exporta as temporadas e
+        # competições escolhidas, já validadas, sem os demais filtros
+        st.markdown("**Download das Partições Selecionadas**")
+        st.caption("Linhas validadas de todas as partidas das temporadas e competições escolhidas, "
+                   "sem traduções e sem os demais filtros.")
+        botoes_download(lambda: load_partitions(particoes), "dados_voleibol_particoes",
+                        manifest_version(), particoes)
 
 # Informações técnicas
 st.subheader("🔧 Informações Técnicas")
@@ -129,4 +262,6 @@ st.success("""
 Esta base de dados representa uma amostra significativa do voleibol universitário feminino,
 capturando mais de 2.000 ações de jogo com 15+ variáveis por registro. Ideal para análise
 tática, scouting de equipes e estudo de padrões de jogo.
-""")
\ No newline at end of file
+""")
+
+panel()
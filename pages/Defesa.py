@@ -3,29 +3,120 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 
+from core.charts import chart, slim_figure
+from core.memo import memoized, incremental
+from core.metrics import cube_metrics, CUBE_AXES
+from core.bootstrap import bootstrap_ci
+from core.live import sync_session
+from core.instrument import begin_run, panel, plotly_chart
+
 st.set_page_config(page_title="Análise de Defesa", layout="wide")
 
 st.title("🛡️ Análise de Defesa")
 st.markdown("Estratégias defensivas e eficácia no bloqueio")
 
-if 'df_filtrado' not in st.session_state:
+if 'selecao' not in st.session_state:
     st.error("Por favor, volte à página inicial para carregar os dados.")
     st.stop()
 
-df = st.session_state.df_filtrado
+# Backend SQLite: as linhas não estão em memória e esta página depende delas
+if st.session_state.selecao is None:
+    st.warning("Esta página usa as linhas do dataset, que não são carregadas com o backend SQLite "
+               "(BACKEND_DADOS=sqlite). A página inicial mostra as contagens do banco.")
+    st.stop()
+
+begin_run('defesa')
+
+# No modo ao vivo, troca os dados pelo snapshot mais recente
+sync_session()
+
+indice = st.session_state.indice_filtros
+filtros_globais = st.session_state.filtros_globais
+cubo = st.session_state.cubo
+indice_ralis = st.session_state.indice_ralis
 
 # Filtros específicos para defesa
 st.sidebar.markdown("---")
 st.sidebar.subheader("🛡️ Filtros de Defesa")
 
-num_blockers_options = df['num_blockers'].dropna().unique()
+num_blockers_options = indice.options('num_blockers', within=filtros_globais)
 blockers_selecionados = st.sidebar.multiselect(
     "Número de bloqueadores:",
     options=num_blockers_options,
     default=num_blockers_options
 )
 
-df_defesa = df[df['num_blockers'].isin(blockers_selecionados)] if blockers_selecionados else df
+filtros_defesa = {**filtros_globais, 'num_blockers': blockers_selecionados}
+
+def dados_defesa():
+    return indice.filter(st.session_state.dados, filtros_defesa)
+
+# Seções com widgets próprios rodam como fragmentos: mexer no slider ou na
+# métrica reexecuta só a seção, que recebe explicitamente suas dependências
+@st.fragment
+def secao_eficiencia(dados, indice, cubo, indice_ralis, filtros_defesa):
+    # Slider interativo para análise
+    min_actions = st.slider("Mínimo de ações defensivas:", 1, 50, 10)
+    
+    # O agregado por time e o intervalo de 95% (bootstrap de ralis) não
+    # dependem do slider: ficam em cache separado da figura
+    def grafico_eficiencia():
+        defense_stats = memoized('defesa/times', filtros_defesa, lambda: cube_metrics(
+            incremental('defesa/times', cubo, ['team_pt'] + CUBE_AXES, filtros_defesa), cubo.labels, 'team_pt'
+        ).reset_index())
+        defense_stats = defense_stats[defense_stats['defensive_actions'] >= min_actions]
+        if defense_stats.empty:
+            return None
+        ic = memoized('defesa/ic', filtros_defesa, lambda: bootstrap_ci(
+            dados, 'team_pt', 'block_efficiency', indice_ralis.run_of_row, indice.rows(filtros_defesa)
+        )).reindex(defense_stats['team_pt'])
+        defense_stats = defense_stats.assign(
+            Eficiência=defense_stats['blocks'] / defense_stats['defensive_actions'] * 100,
+            erro_sup=ic['high'].to_numpy() - ic['estimate'].to_numpy(),
+            erro_inf=ic['estimate'].to_numpy() - ic['low'].to_numpy()
+        )
+        return px.scatter(
+            defense_stats,
+            x='defensive_actions',
+            y='Eficiência',
+            size='blocks',
+            color='team_pt',
+            hover_name='team_pt',
+            error_y='erro_sup',
+            error_y_minus='erro_inf',
+            title="Eficiência do Bloqueio vs Volume Defensivo (IC 95%)",
+            size_max=30
+        )
+
+    fig4 = memoized('defesa/eficiencia', {**filtros_defesa, 'min_actions': min_actions}, grafico_eficiencia)
+    if fig4 is not None:
+        plotly_chart(fig4, 'defesa/eficiencia')
+
+@st.fragment
+def secao_evolucao(indice, indice_ralis, filtros_defesa):
+    # Seleção interativa de métrica
+    metric = st.selectbox("Selecione a métrica:", ['num_blockers', 'block_touch'])
+    
+    # Média por rali a partir das somas parciais (block_touch vira fração de toques)
+    def grafico_evolucao():
+        rally_evolution = indice_ralis.per_rally([metric], filtros_defesa, indice)
+        rally_evolution = rally_evolution.dropna(subset=[f'{metric}_mean'])
+        if rally_evolution.empty:
+            return None
+        # Um ponto por rali: reduzido à largura do gráfico em arquivos grandes
+        # Eixo x: ralis na ordem do arquivo (o número do rali recomeça a cada partida)
+        return slim_figure(px.area(
+            rally_evolution,
+            x='sequence',
+            y=f'{metric}_mean',
+            hover_data=['match', 'rally'],
+            title=f"Evolução de {metric} por Rally",
+            labels={f'{metric}_mean': metric, 'sequence': 'Rali (sequência)', 'match': 'Partida', 'rally': 'Rali'}
+        ))
+
+    fig6 = memoized('defesa/evolucao', {**filtros_defesa, 'metric': metric}, grafico_evolucao)
+    if fig6 is not None:
+        chart(fig6, 'defesa/evolucao')
 
 # Layout principal
 col1, col2 = st.columns(2)
@@ -33,27 +124,34 @@ col1, col2 = st.columns(2)
 with col1:
     st.subheader("Estratégias de Bloqueio")
     
-    blockers_dist = df_defesa['num_blockers'].value_counts().sort_index()
-    fig1 = px.bar(
-        x=blockers_dist.index.astype(str),
-        y=blockers_dist.values,
-        title="Distribuição de Bloqueadores por Ataque",
-        color=blockers_dist.values,
-        color_continuous_scale='blues'
-    )
-    st.plotly_chart(fig1, use_container_width=True)
+    def grafico_bloqueadores():
+        blockers_dist = cubo.table('num_blockers', filtros_defesa).sort_index()
+        return px.bar(
+            x=blockers_dist.index.astype(str),
+            y=blockers_dist.values,
+            title="Distribuição de Bloqueadores por Ataque",
+            color=blockers_dist.values,
+            color_continuous_scale='blues'
+        )
+
+    fig1 = memoized('defesa/bloqueadores', filtros_defesa, grafico_bloqueadores)
+    plotly_chart(fig1, 'defesa/bloqueadores')
 
 with col2:
     st.subheader("Toques no Bloqueio")
     
-    block_touch_dist = df_defesa['block_touch'].value_counts()
-    fig2 = px.pie(
-        values=block_touch_dist.values,
-        names=block_touch_dist.index,
-        title="Frequência de Toques no Bloqueio",
-        hole=0.3
-    )
-    st.plotly_chart(fig2, use_container_width=True)
+    def grafico_toques():
+        block_touch_dist = dados_defesa()['block_touch'].value_counts()
+        block_touch_dist = block_touch_dist[block_touch_dist > 0]
+        return px.pie(
+            values=block_touch_dist.values,
+            names=block_touch_dist.index,
+            title="Frequência de Toques no Bloqueio",
+            hole=0.3
+        )
+
+    fig2 = memoized('defesa/toques', filtros_defesa, grafico_toques)
+    plotly_chart(fig2, 'defesa/toques')
 
 # Análise de eficácia
 st.subheader("📊 Eficácia Defensiva por Time")
@@ -63,43 +161,26 @@ col3, col4 = st.columns(2)
 with col3:
     st.markdown("**Pontos de Bloqueio por Time**")
     
-    block_points = df_defesa[df_defesa['win_reason'] == 'blocked']['team_pt'].value_counts()
-    if not block_points.empty:
-        fig3 = px.bar(
+    def grafico_pontos():
+        block_points = cubo.table('team_pt', filtros_defesa, {'win_reason': 'blocked'}).sort_values(ascending=False)
+        if block_points.empty:
+            return None
+        return px.bar(
             x=block_points.values,
             y=block_points.index,
             orientation='h',
             title="Pontos Diretos de Bloqueio",
             color=block_points.values
         )
-        st.plotly_chart(fig3, use_container_width=True)
+
+    fig3 = memoized('defesa/pontos', filtros_defesa, grafico_pontos)
+    if fig3 is not None:
+        plotly_chart(fig3, 'defesa/pontos')
 
 with col4:
     st.markdown("**Relação Bloqueio vs Ataque**")
     
-    # Slider interativo para análise
-    min_actions = st.slider("Mínimo de ações defensivas:", 1, 50, 10)
-    
-    defense_stats = df_defesa.groupby('team_pt').agg({
-        'win_reason': lambda x: (x == 'blocked').sum(),
-        'num_blockers': 'count'
-    }).reset_index()
-    
-    defense_stats = defense_stats[defense_stats['num_blockers'] >= min_actions]
-    defense_stats['Eficiência'] = defense_stats['win_reason'] / defense_stats['num_blockers'] * 100
-    
-    if not defense_stats.empty:
-        fig4 = px.scatter(
-            defense_stats,
-            x='num_blockers',
-            y='Eficiência',
-            size='win_reason',
-            color='team_pt',
-            hover_name='team_pt',
-            title="Eficiência do Bloqueio vs Volume Defensivo",
-            size_max=30
-        )
-        st.plotly_chart(fig4, use_container_width=True)
+    secao_eficiencia(st.session_state.dados, indice, cubo, indice_ralis, filtros_defesa)
 
 # Análise de rallys defensivos
 st.subheader("🔄 Comportamento em Rallys Longos")
@@ -108,33 +189,27 @@ col5, col6 = st.columns(2)
 
 with col5:
     st.markdown("**Defesa em Rallys Complexos**")
-    complex_rallies = df_defesa[df_defesa['round'] > 2]
-    
-    if not complex_rallies.empty:
+    def grafico_complexos():
+        df_defesa = dados_defesa()
+        complex_rallies = df_defesa[df_defesa['round'] > 2]
+        if complex_rallies.empty:
+            return None
         block_complex = complex_rallies['num_blockers'].value_counts().sort_index()
-        fig5 = px.line(
+        return px.line(
             x=block_complex.index.astype(str),
             y=block_complex.values,
             title="Estratégia de Bloqueio em Rallys Longos",
             markers=True
         )
-        st.plotly_chart(fig5, use_container_width=True)
+
+    fig5 = memoized('defesa/complexos', filtros_defesa, grafico_complexos)
+    if fig5 is not None:
+        plotly_chart(fig5, 'defesa/complexos')
 
 with col6:
     st.markdown("**Evolução Defensiva**")
     
-    # Seleção interativa de métrica
-    metric = st.selectbox("Selecione a métrica:", ['num_blockers', 'block_touch'])
-    
-    rally_evolution = df_defesa.groupby('rally')[metric].mean().reset_index()
-    if not rally_evolution.empty:
-        fig6 = px.area(
-            rally_evolution,
-            x='rally',
-            y=metric,
-            title=f"Evolução de {metric} por Rally"
-        )
-        st.plotly_chart(fig6, use_container_width=True)
+    secao_evolucao(indice, indice_ralis, filtros_defesa)
 
 st.markdown("---")
 st.info("""
@@ -143,4 +218,6 @@ st.info("""
 - Times com maior volume defensivo nem sempre são os mais eficientes
 - Rallys longos tendem a ter estratégias de bloqueio mais conservadoras
 - Toques no bloqueio frequentemente resultam em transição ofensiva
-""")
\ No newline at end of file
+""")
+
+panel()
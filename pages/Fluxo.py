@@ -0,0 +1,158 @@
+import streamlit as st
+import plotly.express as px
+import plotly.graph_objects as go
+import numpy as np
+
+from core.flows import STAGE_LABELS, ZONE_COLUMNS, court_grid, matrix_frame, sankey_links, stage_totals
+from core.memo import memoized
+from core.live import sync_session
+from core.instrument import begin_run, panel, plotly_chart
+
+st.set_page_config(page_title="Fluxo por Zonas", layout="wide")
+
+st.title("🧭 Fluxo por Zonas da Quadra")
+st.markdown("Caminho da bola entre as zonas: recepção, passe, ataque e aterrissagem")
+
+if 'selecao' not in st.session_state:
+    st.error("Por favor, volte à página inicial para carregar os dados.")
+    st.stop()
+
+# Backend SQLite: as linhas não estão em memória e esta página depende delas
+if st.session_state.selecao is None:
+    st.warning("Esta página usa as linhas do dataset, que não são carregadas com o backend SQLite "
+               "(BACKEND_DADOS=sqlite). A página inicial mostra as contagens do banco.")
+    st.stop()
+
+begin_run('fluxo')
+
+# No modo ao vivo, troca os dados pelo snapshot mais recente
+sync_session()
+
+indice = st.session_state.indice_filtros
+filtros_globais = st.session_state.filtros_globais
+fluxos = st.session_state.fluxos
+
+# Filtros específicos do fluxo
+st.sidebar.markdown("---")
+st.sidebar.subheader("🧭 Filtros de Fluxo")
+
+tipos_ataque = indice.options('hit_type_pt', within=filtros_globais)
+tipos_ataque_selecionados = st.sidebar.multiselect(
+    "Tipos de ataque:",
+    options=tipos_ataque,
+    default=tipos_ataque
+)
+
+filtros_fluxo = {**filtros_globais, 'hit_type_pt': tipos_ataque_selecionados}
+
+# Matrizes de transição da seleção (soma das células do cubo de fluxos)
+matrizes = fluxos.matrices(filtros_fluxo)
+
+def zona_mais_comum(etapa):
+    totais = stage_totals(matrizes, etapa)[1:]
+    return f"Zona {int(np.argmax(totais)) + 1}" if totais.sum() else "-"
+
+col1, col2, col3 = st.columns(3)
+
+with col1:
+    st.metric("Passe mais frequente", zona_mais_comum('pass_land_location'))
+
+with col2:
+    st.metric("Posição de ataque mais frequente", zona_mais_comum('hitter_location'))
+
+with col3:
+    st.metric("Aterrissagem mais frequente", zona_mais_comum('hit_land_location'))
+
+# Seções com widgets próprios rodam como fragmentos: trocar a etapa, o par ou
+# o número de ligações reexecuta só a seção
+@st.fragment
+def secao_mapa(fluxos, filtros_fluxo):
+    etapa = st.selectbox("Etapa:", ZONE_COLUMNS, format_func=STAGE_LABELS.get)
+
+    def grafico_mapa():
+        grade, fora = court_grid(stage_totals(fluxos.matrices(filtros_fluxo), etapa))
+        if not grade.sum() and not fora:
+            return None
+        fig = px.imshow(
+            grade,
+            x=[str(c) for c in range(1, grade.shape[1] + 1)],
+            y=[str(r) for r in range(1, grade.shape[0] + 1)],
+            text_auto=True,
+            color_continuous_scale='YlOrRd',
+            labels={'x': 'Coluna', 'y': 'Linha', 'color': 'Ações'},
+            title=f"{STAGE_LABELS[etapa]} por zona (fora da grade: {fora})"
+        )
+        # Número da zona no hover (zonas numeradas por linha)
+        zonas = np.arange(1, grade.size + 1).reshape(grade.shape)
+        fig.update_traces(customdata=zonas, hovertemplate="Zona %{customdata}<br>Ações: %{z}<extra></extra>")
+        return fig
+
+    fig1 = memoized('fluxo/mapa', {**filtros_fluxo, 'etapa': etapa}, grafico_mapa)
+    if fig1 is not None:
+        plotly_chart(fig1, 'fluxo/mapa')
+
+@st.fragment
+def secao_transicoes(fluxos, filtros_fluxo):
+    par = st.selectbox("Transição:", fluxos.labels)
+
+    def grafico_transicoes():
+        origem, destino, _ = fluxos.pairs[fluxos.labels.index(par)]
+        tabela = matrix_frame(fluxos.matrices(filtros_fluxo)[par], origem, destino)
+        if tabela.empty:
+            return None
+        return px.imshow(
+            tabela,
+            x=tabela.columns.astype(str),
+            y=tabela.index.astype(str),
+            color_continuous_scale='Blues',
+            labels={'x': f"Zona de {STAGE_LABELS[destino].lower()}", 'y': f"Zona de {STAGE_LABELS[origem].lower()}",
+                    'color': 'Ações'},
+            title=par,
+            aspect='auto'
+        )
+
+    fig2 = memoized('fluxo/transicoes', {**filtros_fluxo, 'par': par}, grafico_transicoes)
+    if fig2 is not None:
+        plotly_chart(fig2, 'fluxo/transicoes')
+
+col4, col5 = st.columns(2)
+
+with col4:
+    st.subheader("🗺️ Mapa da Quadra")
+    secao_mapa(fluxos, filtros_fluxo)
+
+with col5:
+    st.subheader("🔀 Matriz de Transição")
+    secao_transicoes(fluxos, filtros_fluxo)
+
+@st.fragment
+def secao_fluxo(fluxos, filtros_fluxo):
+    ligacoes = st.slider("Ligações por etapa:", 3, 30, 12)
+
+    def grafico_fluxo():
+        rotulos, origens, destinos, valores = sankey_links(fluxos.matrices(filtros_fluxo), top=ligacoes)
+        if not valores:
+            return None
+        fig = go.Figure(go.Sankey(
+            node=dict(label=rotulos, pad=12, thickness=14),
+            link=dict(source=origens, target=destinos, value=valores)
+        ))
+        fig.update_layout(title="Recepção → Passe → Atacante → Aterrissagem", height=550)
+        return fig
+
+    fig3 = memoized('fluxo/sankey', {**filtros_fluxo, 'ligacoes': ligacoes}, grafico_fluxo)
+    if fig3 is not None:
+        plotly_chart(fig3, 'fluxo/sankey')
+
+st.subheader("🌊 Fluxo da Jogada")
+secao_fluxo(fluxos, filtros_fluxo)
+
+st.markdown("---")
+st.info("""
+**💡 Como ler:**
+- As zonas 1 a 25 formam uma grade 5×5 numerada por linhas; zonas acima de 25 aparecem só nas matrizes
+- Cada matriz conta ações que saíram de uma zona (linhas) e chegaram a outra (colunas)
+- "Aterrissagem → Recepção seguinte" liga o ataque à recepção da ação seguinte do mesmo rali
+""")
+
+panel()
@@ -0,0 +1,94 @@
+import streamlit as st
+import plotly.express as px
+
+from core.live import sync_session
+from core.matches import match_label
+from core.memo import memoized
+from core.instrument import begin_run, panel, plotly_chart
+
+st.set_page_config(page_title="Comparação entre Partidas", layout="wide")
+
+st.title("⚔️ Comparação entre Partidas")
+st.markdown("Desempenho de cada time partida a partida")
+
+if 'selecao' not in st.session_state:
+    st.error("Por favor, volte à página inicial para carregar os dados.")
+    st.stop()
+
+# Backend SQLite: as linhas não estão em memória e esta página depende delas
+if st.session_state.selecao is None:
+    st.warning("Esta página usa as linhas do dataset, que não são carregadas com o backend SQLite "
+               "(BACKEND_DADOS=sqlite). A página inicial mostra as contagens do banco.")
+    st.stop()
+
+begin_run('partidas')
+
+# No modo ao vivo, troca os dados pelo snapshot mais recente
+sync_session()
+
+# As métricas por (partida, time) são calculadas uma vez por versão dos dados;
+# aqui só são filtradas pelos times e reorganizadas
+partidas = st.session_state.partidas
+partida = st.session_state.get('partida')
+times = st.session_state.filtros_globais['team_pt']
+
+METRICAS = {
+    'efficiency': 'Eficiência de ataque (%)',
+    'kills': 'Kills',
+    'errors': 'Erros de ataque',
+    'aces': 'Aces',
+    'serve_errors': 'Erros de saque',
+    'blocks': 'Bloqueios',
+}
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Partidas", len(partidas))
+with col2:
+    st.metric("Ralis por Partida", f"{partidas.summary['rallies'].mean():.0f}" if len(partidas) else "-")
+with col3:
+    st.metric("Partida Selecionada", "Todas" if partida is None else match_label(partida))
+
+@st.fragment
+def secao_comparacao(partidas, times, partida):
+    metrica = st.selectbox("Métrica:", list(METRICAS), format_func=METRICAS.get)
+
+    def grafico_comparacao():
+        tabela = partidas.team_metrics(times)
+        if tabela.empty:
+            return None
+        tabela = tabela.assign(partida=tabela['match'] + 1)
+        fig = px.line(
+            tabela,
+            x='partida',
+            y=metrica,
+            color='team_pt',
+            markers=len(partidas) <= 50,
+            title=f"{METRICAS[metrica]} por Partida",
+            labels={'partida': 'Partida', metrica: METRICAS[metrica], 'team_pt': 'Time'}
+        )
+        if partida is not None:
+            fig.add_vline(x=partida + 1, line_dash='dash', line_color='gray')
+        return fig
+
+    fig1 = memoized('partidas/comparacao', {'metrica': metrica}, grafico_comparacao)
+    if fig1 is not None:
+        plotly_chart(fig1, 'partidas/comparacao')
+    else:
+        st.info("Nenhuma ação dos times selecionados.")
+
+secao_comparacao(partidas, times, partida)
+
+st.subheader("📋 Resumo por Partida")
+
+def tabela_resumo():
+    resumo = partidas.summary.assign(Partida=[match_label(m) for m in partidas.summary['match']])
+    resumo = resumo.set_index('Partida')[['rallies', 'actions']].rename(columns={'rallies': 'Ralis', 'actions': 'Ações'})
+    eficiencia = partidas.team_metrics(times).pivot(index='match', columns='team_pt', values='efficiency')
+    eficiencia.index = [match_label(m) for m in eficiencia.index]
+    eficiencia.columns = [f"Eficiência {time} (%)" for time in eficiencia.columns]
+    return resumo.join(eficiencia.round(1))
+
+st.dataframe(memoized('partidas/resumo', {}, tabela_resumo), use_container_width=True)
+
+panel()
@@ -0,0 +1,167 @@
+import streamlit as st
+import plotly.express as px
+import pandas as pd
+
+from core.markov import PHASES
+from core.matches import match_label
+from core.memo import memoized
+from core.live import sync_session
+from core.instrument import begin_run, panel, plotly_chart
+
+st.set_page_config(page_title="Probabilidade de Vitória", layout="wide")
+
+st.title("🎲 Probabilidade de Vitória no Rali")
+st.markdown("Modelo de Markov das sequências de ações: chance de o time com a bola fechar o ponto")
+
+if 'selecao' not in st.session_state:
+    st.error("Por favor, volte à página inicial para carregar os dados.")
+    st.stop()
+
+# Backend SQLite: as linhas não estão em memória e esta página depende delas
+if st.session_state.selecao is None:
+    st.warning("Esta página usa as linhas do dataset, que não são carregadas com o backend SQLite "
+               "(BACKEND_DADOS=sqlite). A página inicial mostra as contagens do banco.")
+    st.stop()
+
+begin_run('probabilidades')
+
+# No modo ao vivo, troca os dados pelo snapshot mais recente
+sync_session()
+
+filtros_globais = st.session_state.filtros_globais
+modelo = st.session_state.modelo_ralis
+times = filtros_globais['team_pt']
+
+# O modelo é ajustado sobre os dados carregados (partida ou partições); o
+# filtro de times só escolhe os estados mostrados, já que um rali alterna
+# ações dos dois times e cortá-lo por time quebraria as transições
+partida = st.session_state.get('partida')
+if st.session_state.get('modo_ao_vivo'):
+    escopo = "todas as ações recebidas até agora no modo ao vivo"
+elif partida is not None:
+    escopo = f"a {match_label(partida)}"
+elif st.session_state.get('particoes') is not None:
+    escopo = "as partidas das temporadas e competições escolhidas"
+else:
+    escopo = "todas as partidas do dataset"
+st.caption(
+    f"Transições contadas sobre {escopo}. O filtro de times escolhe os estados exibidos, "
+    "mas as probabilidades consideram as ações dos dois times em cada rali."
+)
+
+# Probabilidade por time e fase (médias ponderadas pelas ações de cada estado)
+por_fase = memoized('markov/fases', {}, lambda: modelo.by_choice('phase', times))
+
+st.subheader("🏆 Vitória por Fase")
+
+colunas = st.columns(max(len(por_fase), 1))
+for coluna, linha in zip(colunas, por_fase.itertuples()):
+    with coluna:
+        st.metric(f"{linha.team_pt} - {linha.phase}", f"{linha.win_probability * 100:.1f}%",
+                  help=f"{linha.visits} ações")
+
+# Seções com widgets próprios rodam como fragmentos: trocar a escolha tática,
+# a fase ou o time reexecuta só a seção
+@st.fragment
+def secao_escolhas(modelo, times):
+    col_a, col_b = st.columns(2)
+    with col_a:
+        escolha = st.selectbox(
+            "Escolha tática:",
+            ['hit_type_pt', 'num_blockers'],
+            format_func={'hit_type_pt': 'Tipo de ataque', 'num_blockers': 'Bloqueadores'}.get
+        )
+    with col_b:
+        fase = st.radio("Fase:", ["Todas"] + PHASES, horizontal=True)
+
+    def grafico_escolhas():
+        tabela = modelo.by_choice(escolha, times, None if fase == "Todas" else fase)
+        tabela = tabela[tabela['visits'] >= 5]
+        if tabela.empty:
+            return None
+        tabela = tabela.assign(**{escolha: tabela[escolha].astype(str)})
+        return px.bar(
+            tabela,
+            x=escolha,
+            y='win_probability',
+            color='team_pt',
+            barmode='group',
+            hover_data=['visits'],
+            title="Probabilidade de vitória por escolha (estados com 5+ ações)",
+            labels={'win_probability': 'Prob. de vitória', 'team_pt': 'Time', 'visits': 'Ações',
+                    escolha: 'Tipo de ataque' if escolha == 'hit_type_pt' else 'Bloqueadores'}
+        )
+
+    fig1 = memoized('markov/escolhas', {'escolha': escolha, 'fase': fase}, grafico_escolhas)
+    if fig1 is not None:
+        plotly_chart(fig1, 'markov/escolhas')
+
+@st.fragment
+def secao_estados(modelo, times):
+    opcoes = sorted(modelo.table(times)['team_pt'].unique())
+    col_a, col_b = st.columns(2)
+    with col_a:
+        time = st.selectbox("Time:", opcoes)
+    with col_b:
+        fase = st.radio("Fase do estado:", PHASES, horizontal=True)
+
+    def grafico_estados():
+        estados = modelo.table([time])
+        estados = estados[estados['phase'] == fase]
+        if estados.empty:
+            return None
+        grade = estados.pivot_table(index='hit_type_pt', columns='num_blockers', values='win_probability',
+                                    aggfunc='first', dropna=False)
+        grade.columns = [str(int(c)) if pd.notna(c) else '-' for c in grade.columns]
+        return px.imshow(
+            grade,
+            text_auto='.2f',
+            zmin=0,
+            zmax=1,
+            color_continuous_scale='RdYlGn',
+            aspect='auto',
+            labels={'x': 'Bloqueadores', 'y': 'Tipo de ataque', 'color': 'Prob. de vitória'},
+            title=f"{time} - {fase}"
+        )
+
+    fig2 = memoized('markov/estados', {'time': time, 'fase': fase}, grafico_estados)
+    if fig2 is not None:
+        plotly_chart(fig2, 'markov/estados')
+
+col1, col2 = st.columns(2)
+
+with col1:
+    st.subheader("🎯 Por Escolha Tática")
+    secao_escolhas(modelo, times)
+
+with col2:
+    st.subheader("🧩 Por Estado")
+    secao_estados(modelo, times)
+
+# Tabela completa de estados
+st.subheader("📋 Estados do Modelo")
+
+@st.fragment
+def secao_tabela(modelo, times):
+    min_acoes = st.slider("Mínimo de ações por estado:", 1, 100, 10)
+    tabela = modelo.table(times, min_visits=min_acoes).sort_values('visits', ascending=False)
+    st.dataframe(
+        tabela.rename(columns={
+            'team_pt': 'Time', 'phase': 'Fase', 'hit_type_pt': 'Tipo de ataque',
+            'num_blockers': 'Bloqueadores', 'visits': 'Ações', 'win_probability': 'Prob. de vitória'
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+
+secao_tabela(modelo, times)
+
+st.markdown("---")
+st.info("""
+**💡 Como ler:**
+- Cada estado é uma ação: time com a bola, fase (side-out na ação 1, transição depois), tipo de ataque e bloqueadores
+- A probabilidade considera todas as continuações possíveis do rali, não só o resultado imediato da ação
+- Estados com poucas ações têm estimativas instáveis: use o mínimo de ações para filtrá-los
+""")
+
+panel()
@@ -3,30 +3,110 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 
+from core.memo import memoized, incremental
+from core.metrics import cube_metrics, CUBE_AXES
+from core.bootstrap import bootstrap_ci
+from core.live import sync_session
+from core.instrument import begin_run, panel, plotly_chart
+
 st.set_page_config(page_title="Análise de Saque", layout="wide")
 
 st.title("🎯 Análise de Saque")
 st.markdown("Explore as estratégias e eficácia do primeiro ataque")
 
 # Recuperar dados da session state
-if 'df_filtrado' not in st.session_state:
+if 'selecao' not in st.session_state:
     st.error("Por favor, volte à página inicial para carregar os dados.")
     st.stop()
 
-df = st.session_state.df_filtrado
+# Backend SQLite: as linhas não estão em memória e esta página depende delas
+if st.session_state.selecao is None:
+    st.warning("Esta página usa as linhas do dataset, que não são carregadas com o backend SQLite "
+               "(BACKEND_DADOS=sqlite). A página inicial mostra as contagens do banco.")
+    st.stop()
+
+begin_run('saque')
+
+# No modo ao vivo, troca os dados pelo snapshot mais recente
+sync_session()
+
+indice = st.session_state.indice_filtros
+filtros_globais = st.session_state.filtros_globais
+cubo = st.session_state.cubo
+indice_ralis = st.session_state.indice_ralis
 
 # Filtros específicos para saque
 st.sidebar.markdown("---")
 st.sidebar.subheader("🎯 Filtros de Saque")
 
-tipos_saque = df['serve_type_pt'].dropna().unique()
+tipos_saque = indice.options('serve_type_pt', within=filtros_globais)
 tipos_selecionados = st.sidebar.multiselect(
     "Tipos de saque:",
     options=tipos_saque,
     default=tipos_saque
 )
 
-df_saque = df[df['serve_type_pt'].isin(tipos_selecionados)] if tipos_selecionados else df
+filtros_saque = {**filtros_globais, 'serve_type_pt': tipos_selecionados}
+
+def dados_saque():
+    return indice.filter(st.session_state.dados, filtros_saque)
+
+# Seções com widgets próprios rodam como fragmentos: mexer no slider reexecuta
+# só a seção, que recebe explicitamente os dados de que depende
+@st.fragment
+def secao_eficacia(dados, indice, cubo, indice_ralis, filtros_saque):
+    # Gráfico interativo com slider
+    min_rallys = st.slider("Mínimo de ralis por time:", 1, 100, 10)
+    
+    # Intervalos de 95% por bootstrap de ralis, um por contagem
+    def intervalos():
+        rows = indice.rows(filtros_saque)
+        return {
+            metrica: bootstrap_ci(dados, 'team_pt', metrica, indice_ralis.run_of_row, rows)
+            for metrica in ['aces', 'serve_errors']
+        }
+
+    def barras(nome, stats, ic, metrica):
+        ic = ic[metrica].reindex(stats['team_pt'])
+        return go.Bar(name=nome, x=stats['team_pt'], y=stats[metrica], error_y=dict(
+            type='data', symmetric=False,
+            array=ic['high'].to_numpy() - stats[metrica].to_numpy(),
+            arrayminus=stats[metrica].to_numpy() - ic['low'].to_numpy()
+        ))
+
+    # O agregado por time e os intervalos não dependem do slider: ficam em
+    # cache separado da figura
+    def grafico_eficacia():
+        team_serve_stats = memoized('saque/times', filtros_saque, lambda: cube_metrics(
+            incremental('saque/times', cubo, ['team_pt'] + CUBE_AXES, filtros_saque), cubo.labels, 'team_pt'
+        ).reset_index())
+        team_serve_stats = team_serve_stats[team_serve_stats['aces'] + team_serve_stats['serve_errors'] >= min_rallys]
+        if team_serve_stats.empty:
+            return None
+        ic = memoized('saque/ic', filtros_saque, intervalos)
+        fig = go.Figure()
+        fig.add_trace(barras('Aces', team_serve_stats, ic, 'aces'))
+        fig.add_trace(barras('Erros', team_serve_stats, ic, 'serve_errors'))
+        fig.update_layout(barmode='group', title=f"Desempenho no Saque (≥{min_rallys} ralis, IC 95%)")
+        return fig
+
+    fig2 = memoized('saque/eficacia', {**filtros_saque, 'min_rallys': min_rallys}, grafico_eficacia)
+    if fig2 is not None:
+        plotly_chart(fig2, 'saque/eficacia')
+    else:
+        st.info("Ajuste o filtro mínimo de ralis.")
+
+@st.fragment
+def secao_rally(dados, indice, indice_ralis, filtros_saque):
+    rally_slice = st.slider("Selecione o número do rally:", 1, 10, 1)
+    
+    # Fatia direta dos intervalos do rali, restrita às linhas do filtro
+    linhas = indice_ralis.rows(indice_ralis.runs(rally_slice), indice.rows(filtros_saque), limit=5)
+    rally_data = dados.take(linhas)
+    if not rally_data.empty:
+        st.dataframe(rally_data[['team_pt', 'serve_type_pt', 'win_reason_pt']])
+    else:
+        st.info(f"Nenhum dado para rally {rally_slice}")
 
 # Layout principal
 col1, col2 = st.columns(2)
@@ -34,39 +114,24 @@ col1, col2 = st.columns(2)
 with col1:
     st.subheader("Distribuição de Tipos de Saque")
     
-    if not df_saque.empty:
-        serve_dist = df_saque['serve_type_pt'].value_counts()
-        fig1 = px.pie(
-            values=serve_dist.values,
-            names=serve_dist.index,
-            title="Estratégias de Saque Utilizadas",
-            hole=0.4
-        )
-        st.plotly_chart(fig1, use_container_width=True)
+    if cubo.count(filtros_saque):
+        def grafico_distribuicao():
+            serve_dist = cubo.table('serve_type_pt', filtros_saque).sort_values(ascending=False)
+            return px.pie(
+                values=serve_dist.values,
+                names=serve_dist.index,
+                title="Estratégias de Saque Utilizadas",
+                hole=0.4
+            )
+
+        fig1 = memoized('saque/distribuicao', filtros_saque, grafico_distribuicao)
+        plotly_chart(fig1, 'saque/distribuicao')
     else:
         st.info("Nenhum dado disponível com os filtros atuais.")
 
 with col2:
     st.subheader("Eficácia do Saque por Time")
-    
-    # Gráfico interativo com slider
-    min_rallys = st.slider("Mínimo de ralis por time:", 1, 100, 10)
-    
-    team_serve_stats = df_saque.groupby('team_pt').agg({
-        'win_reason': lambda x: (x == 'ace').sum(),
-        'lose_reason': lambda x: (x == 'serve_error').sum()
-    }).reset_index()
-    
-    team_serve_stats = team_serve_stats[team_serve_stats['win_reason'] + team_serve_stats['lose_reason'] >= min_rallys]
-    
-    if not team_serve_stats.empty:
-        fig2 = go.Figure()
-        fig2.add_trace(go.Bar(name='Aces', x=team_serve_stats['team_pt'], y=team_serve_stats['win_reason']))
-        fig2.add_trace(go.Bar(name='Erros', x=team_serve_stats['team_pt'], y=team_serve_stats['lose_reason']))
-        fig2.update_layout(barmode='group', title=f"Desempenho no Saque (≥{min_rallys} ralis)")
-        st.plotly_chart(fig2, use_container_width=True)
-    else:
-        st.info("Ajuste o filtro mínimo de ralis.")
+    secao_eficacia(st.session_state.dados, indice, cubo, indice_ralis, filtros_saque)
 
 # Análise de localização de saque
 st.subheader("📍 Padrões de Localização")
@@ -75,25 +140,24 @@ col3, col4 = st.columns(2)
 
 with col3:
     st.markdown("**Zonas de Recepção Mais Frequentes**")
-    receive_heat = df_saque['receive_location'].value_counts().head(10)
-    if not receive_heat.empty:
-        fig3 = px.bar(
+    def grafico_recepcao():
+        receive_heat = dados_saque()['receive_location'].value_counts().head(10)
+        if receive_heat.empty:
+            return None
+        return px.bar(
             x=receive_heat.values,
             y=receive_heat.index.astype(str),
             orientation='h',
             title="Zonas de Recepção"
         )
-        st.plotly_chart(fig3, use_container_width=True)
+
+    fig3 = memoized('saque/recepcao', filtros_saque, grafico_recepcao)
+    if fig3 is not None:
+        plotly_chart(fig3, 'saque/recepcao')
 
 with col4:
     st.markdown("**Evolução por Rally**")
-    rally_slice = st.slider("Selecione o número do rally:", 1, 10, 1)
-    
-    rally_data = df_saque[df_saque['rally'] == rally_slice]
-    if not rally_data.empty:
-        st.dataframe(rally_data[['team_pt', 'serve_type_pt', 'win_reason_pt']].head())
-    else:
-        st.info(f"Nenhum dado para rally {rally_slice}")
+    secao_rally(st.session_state.dados, indice, indice_ralis, filtros_saque)
 
 st.markdown("---")
 st.info("""
@@ -101,4 +165,6 @@ st.info("""
 - Saques com salto tendem a gerar mais aces mas também mais erros
 - A escolha do tipo de saque varia conforme a equipe e o momento do jogo
 - Zonas específicas de recepção podem indicar estratégias de posicionamento
-""")
\ No newline at end of file
+""")
+
+panel()
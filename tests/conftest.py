@@ -0,0 +1,55 @@
+"""Dados compartilhados pelos testes: o CSV do repositório, lido como no app.
+
+Os testes rodam da raiz do repositório (``python -m pytest``); a raiz entra
+no ``sys.path`` para os imports de ``core``. Caches e arquivos gerados vão
+para ``tmp_path``, nunca para o ``.cache/`` do repositório.
+"""
+
+import io
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.storage import read_csv_typed  # noqa: E402
+from core.translation import add_translations  # noqa: E402
+from core.validation import validate  # noqa: E402
+
+DATASET = os.path.join(ROOT, 'dataset_full.csv')
+
+with open(DATASET) as _f:
+    HEADER = _f.readline().strip().split(',')
+
+
+@pytest.fixture(scope='session')
+def csv_path():
+    """O ``dataset_full.csv`` do repositório (só leitura)."""
+    return DATASET
+
+
+@pytest.fixture(scope='session')
+def raw():
+    """O CSV com o esquema aplicado, antes da validação."""
+    return read_csv_typed(DATASET)
+
+
+@pytest.fixture(scope='session')
+def data(raw):
+    """Linhas válidas com as colunas traduzidas: o DataFrame que as páginas recebem."""
+    valid, _, _ = validate(raw)
+    return add_translations(valid)
+
+
+@pytest.fixture
+def actions():
+    """Monta um DataFrame tipado a partir de dicionários de ações (colunas ausentes ficam vazias)."""
+    def build(rows):
+        lines = [','.join(HEADER)]
+        for row in rows:
+            lines.append(','.join('' if row.get(col) is None else str(row[col]) for col in HEADER))
+        return read_csv_typed(io.StringIO('\n'.join(lines) + '\n'))
+    return build
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.bootstrap import bootstrap_ci, bootstrap_replicates, rally_profiles
+from core.filters import FilterIndex
+from core.metrics import compute_metrics
+from core.rallies import RallyIndex
+
+
+@pytest.fixture(scope='module')
+def run_of_row(data):
+    return RallyIndex(data).run_of_row
+
+
+def test_profiles_reproduce_the_totals(data, run_of_row):
+    metrics = ['kills', 'errors', 'total']
+    profiles, freq, labels = rally_profiles(data, 'team_pt', metrics, run_of_row)
+    assert freq.sum() == run_of_row[-1] + 1
+    totals = (freq[:, None, None] * profiles).sum(axis=0)
+    expected = compute_metrics(data, 'team_pt').loc[labels, metrics]
+    assert np.array_equal(totals, expected.to_numpy())
+
+
+def test_estimate_matches_metrics_and_lies_in_interval(data, run_of_row):
+    result = bootstrap_ci(data, 'team_pt', 'efficiency', run_of_row, n_resamples=200)
+    expected = compute_metrics(data, 'team_pt')['efficiency']
+    assert np.allclose(result['estimate'], expected.loc[result.index])
+    assert ((result['low'] <= result['estimate']) & (result['estimate'] <= result['high'])).all()
+
+
+def test_rows_restrict_groups_and_rallies(data, run_of_row):
+    rows = FilterIndex(data).rows({'team_pt': ['Time B'], 'num_blockers': [1]})
+    result = bootstrap_ci(data, 'hit_type_pt', 'efficiency', run_of_row, rows, n_resamples=100)
+    present = data.iloc[rows]['hit_type_pt'].value_counts()
+    assert set(result.index) == set(present[present > 0].index)
+
+
+def test_group_with_zero_count_stays_in_result(data, run_of_row):
+    # Um time sem nenhum ace na seleção: estimativa 0 com intervalo [0, 0]
+    rows = np.flatnonzero(((data['team_pt'] == 'Time A') | (data['win_reason'] != 'ace')).to_numpy())
+    team_b_aces = data.iloc[rows].query("team_pt == 'Time B'")['win_reason'].eq('ace').sum()
+    assert team_b_aces == 0
+    result = bootstrap_ci(data, 'team_pt', 'aces', run_of_row, rows, n_resamples=100)
+    assert result.loc['Time B'].tolist() == [0, 0, 0]
+    assert result.loc['Time A', 'estimate'] > 0
+
+
+def test_replicates_are_reproducible_and_independent_of_the_pool(data, run_of_row):
+    profiles, freq, _ = rally_profiles(data, 'team_pt', ['aces'], run_of_row)
+    serial = bootstrap_replicates(profiles, freq, 'aces', n_resamples=600, seed=3, parallel=False)
+    pooled = bootstrap_replicates(profiles, freq, 'aces', n_resamples=600, seed=3, parallel=True)
+    assert serial.shape == (600, profiles.shape[1])
+    assert np.array_equal(serial, pooled)
+    # Cada réplica sorteia tantos ralis quantos existem
+    assert pd.Series(serial[:, 0]).between(0, freq.sum()).all()
@@ -0,0 +1,73 @@
+import numpy as np
+
+from core.buffers import GrowableArray
+
+
+def test_append_keeps_old_views():
+    buffer = GrowableArray(np.arange(3))
+    before = buffer.view()
+    for start in range(3, 3003, 10):
+        buffer.append(np.arange(start, start + 10))
+    assert np.array_equal(before, [0, 1, 2])
+    assert np.array_equal(buffer.view(), np.arange(3003))
+
+
+def test_fork_copies_on_conflicting_append():
+    base = GrowableArray(np.arange(4))
+    base.append([4])
+    first, second = base.fork(), base.fork()
+    first.append([10, 11])
+    second.append([20])
+    base.append([30])
+    assert np.array_equal(first.view(), [0, 1, 2, 3, 4, 10, 11])
+    assert np.array_equal(second.view(), [0, 1, 2, 3, 4, 20])
+    assert np.array_equal(base.view(), [0, 1, 2, 3, 4, 30])
+
+
+def test_fork_appends_in_place_without_conflict():
+    base = GrowableArray(np.zeros(0, dtype=np.int64))
+    base.append(np.arange(10))
+    twin = base.fork()
+    twin.append([99])
+    # Ninguém escreveu depois do fim do vetor: o anexo usa o espaço livre
+    assert np.shares_memory(twin.view(), base.view())
+    assert np.array_equal(base.view(), np.arange(10))
+
+
+def test_truncate_then_append_in_fork_leaves_original():
+    base = GrowableArray(np.zeros(0, dtype=np.uint8))
+    base.append([1, 2, 3])
+    twin = base.fork()
+    twin.truncate(2)
+    twin.append([9, 9])
+    assert np.array_equal(base.view(), [1, 2, 3])
+    assert np.array_equal(twin.view(), [1, 2, 9, 9])
+
+
+def test_fork_copy_does_not_inherit_capacity():
+    base = GrowableArray(np.zeros(0, dtype=np.int64))
+    base.append(np.arange(100_000))
+    current = base
+    for _ in range(30):
+        fork = current.fork()
+        current.append([0])
+        fork.append([1])
+        current = fork
+    assert len(current._data) < 1_000_000
+
+
+def test_read_only_buffer_is_copied_on_first_append():
+    data = np.arange(5)
+    data.flags.writeable = False
+    buffer = GrowableArray(data)
+    buffer.append([5])
+    assert np.array_equal(buffer.view(), np.arange(6))
+    assert np.array_equal(data, np.arange(5))
+
+
+def test_astype_widens_values():
+    buffer = GrowableArray(np.array([1, 2], dtype=np.int8))
+    buffer.astype(np.int32)
+    buffer.append([100_000])
+    assert buffer.dtype == np.int32
+    assert np.array_equal(buffer.view(), [1, 2, 100_000])
@@ -0,0 +1,62 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from core.charts import compact, lttb, payload_bytes, slim_figure
+
+
+def test_lttb_keeps_ends_and_extremes():
+    x = np.arange(10_000)
+    y = np.sin(x / 500.0)
+    y[4321] = 50.0
+    keep = lttb(x, y, 300)
+    assert len(keep) == 300
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert np.all(np.diff(keep) > 0)
+    assert 4321 in keep
+    assert np.array_equal(lttb(x[:100], y[:100], 300), np.arange(100))
+
+
+def test_lttb_skips_missing_values():
+    x = np.arange(1000, dtype=float)
+    y = np.cos(x / 50.0)
+    y[100:200] = np.nan
+    keep = lttb(x, y, 50)
+    assert len(keep) == 50
+    assert not np.isnan(y[keep[1:-1]]).all()
+
+
+def test_compact_is_lossless():
+    assert compact(np.array([1, 2, 300])).dtype == np.int16
+    assert compact(np.array([1, -2])).dtype == np.int8
+    assert compact(np.array([2**40])).dtype == np.int64
+    assert compact(np.array([0.5, 1.25, np.nan])).dtype == np.float32
+    assert compact(np.array([0.1])).dtype == np.float64
+    assert compact(np.array(['a'])).dtype.kind == 'U'
+
+
+def test_slim_figure_reduces_long_traces():
+    n = 20_000
+    x = np.arange(n)
+    fig = go.Figure([
+        go.Scatter(x=x, y=np.sin(x / 300.0), customdata=x * 2, stackgroup='a'),
+        go.Scatter(x=x[:100], y=x[:100] * 0.5),
+        go.Bar(x=['a', 'b'], y=[1, 2]),
+    ])
+    before = payload_bytes(go.Figure(fig))
+    slim_figure(fig, target_points=500, webgl_points=5000)
+    long, short, bar = fig.data
+    assert long.type == 'scattergl' and long.fill == 'tozeroy'
+    assert len(long.x) == 500
+    assert np.array_equal(np.asarray(long.customdata), np.asarray(long.x, dtype=np.int64) * 2)
+    assert short.type == 'scatter' and len(short.x) == 100
+    assert bar.type == 'bar'
+    assert fig._points == (600, n + 100)
+    assert payload_bytes(fig) < before / 10
+
+
+def test_stacked_traces_stay_scatter():
+    x = np.arange(6000)
+    fig = go.Figure([go.Scatter(x=x, y=x % 7, stackgroup='s'), go.Scatter(x=x, y=x % 5, stackgroup='s')])
+    slim_figure(fig, target_points=1000)
+    assert [trace.type for trace in fig.data] == ['scatter', 'scatter']
+    assert [len(trace.x) for trace in fig.data] == [1000, 1000]
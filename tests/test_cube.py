@@ -0,0 +1,108 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.cube import CellIndex, CountCube, IncrementalSum
+from core.filters import value_key
+from core.metrics import CUBE_AXES
+
+
+def selected_rows(df, *selections):
+    mask = np.ones(len(df), dtype=bool)
+    for selection in selections:
+        for column, selected in selection.items():
+            if isinstance(selected, (str, int)):
+                selected = [selected]
+            if len(selected) == 0:
+                continue
+            keys = {value_key(v) for v in selected}
+            mask &= np.array([value_key(v) in keys for v in df[column].tolist()])
+    return df[mask]
+
+
+@pytest.fixture(scope='module')
+def cube(data):
+    return CountCube(data)
+
+
+def test_counts_match_groupby(data, cube):
+    expected = data.groupby(['team_pt', 'hit_type_pt'], observed=True).size()
+    expected = expected[expected > 0]
+    table = cube.table(['team_pt', 'hit_type_pt']).stack()
+    table = table[table > 0]
+    assert table.sort_index().to_dict() == expected.sort_index().to_dict()
+    assert cube.counts.sum() == len(data)
+
+
+@pytest.mark.parametrize('selections', [
+    ({'team_pt': ['Time A']}, {'win_reason': 'kill'}),
+    ({'hit_type_pt': ['Ataque Forte', 'Largada'], 'num_blockers': [1, 2]},),
+    ({'team_pt': ['Time A', 'Time B']}, {'team_pt': ['Time B']}),
+    ({'num_blockers': [None]},),
+    ({'serve_type_pt': []},),
+])
+def test_count_and_table_match_pandas(data, cube, selections):
+    rows = selected_rows(data, *selections)
+    assert cube.count(*selections) == len(rows)
+    expected = rows['hit_type_pt'].value_counts()
+    expected = expected[expected > 0]
+    assert cube.table('hit_type_pt', *selections).sort_index().to_dict() == expected.sort_index().to_dict()
+
+
+def test_reduce_is_dense_over_all_labels(data, cube):
+    reduced = cube.reduce(['num_blockers', 'team_pt'], {'team_pt': ['Time A']})
+    assert reduced.shape == (len(cube.labels['num_blockers']), len(cube.labels['team_pt']))
+    b = cube.labels['team_pt'].index('Time B')
+    assert not reduced[:, b].any()
+    assert reduced.sum() == (data['team_pt'] == 'Time A').sum()
+
+
+def nonzero_counts(cube, dims):
+    # Contagens por rótulos, independentes da ordem dos eixos do cubo
+    table = cube.table(dims)
+    if isinstance(table, pd.DataFrame):
+        table = table.stack()
+    return {key: int(n) for key, n in table.items() if n}
+
+
+@pytest.mark.parametrize('split', [1, 1207, 2416])
+def test_extended_matches_rebuild(data, split):
+    base = CountCube(data.iloc[:split])
+    extended = base.extended(data, split)
+    rebuilt = CountCube(data)
+    for dims in (['team_pt'], ['hit_type_pt', 'num_blockers'], ['win_reason', 'serve_type_pt']):
+        assert nonzero_counts(extended, dims) == nonzero_counts(rebuilt, dims)
+    assert base.counts.sum() == split
+
+
+def test_incremental_sum_follows_reduce(cube):
+    dims = ['team_pt'] + CUBE_AXES
+    hit_types = [v for v in cube.labels['hit_type_pt'] if v is not None]
+    aggregate = IncrementalSum(cube, dims)
+    steps = [{'hit_type_pt': hit_types[:k]} for k in (4, 5, 3, 3, 6)]
+    steps += [{'hit_type_pt': hit_types[:2], 'team_pt': ['Time A']}, {'team_pt': ['Time A']}]
+    for selection in steps:
+        assert np.array_equal(aggregate.update(selection), cube.reduce(dims, selection))
+    assert aggregate.deltas > 0
+
+
+def test_cell_index_assigns_stable_ids(data):
+    cells = CellIndex(['team_pt', 'num_blockers'])
+    ids = cells.assign(data)
+    later = cells.copy().assign(data.iloc[::-1])
+    assert np.array_equal(later, ids[::-1])
+    for (team, blockers), group in itertools.islice(data.groupby(['team_pt', 'num_blockers'], observed=True), 5):
+        cell = cells.find(team, blockers)
+        assert set(ids[group.index]) == {cell}
+    mask = cells.selected([{'team_pt': ['Time A']}])
+    labels = cells.labels['team_pt']
+    assert all(labels[c[0]] == 'Time A' for c in cells.cells[mask])
+    assert cells.find('Time Z', 1) is None
+
+
+def test_empty_cube(data):
+    cube = CountCube(data.iloc[:0])
+    assert cube.count() == 0
+    assert cube.table('team_pt').empty
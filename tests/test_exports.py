@@ -0,0 +1,80 @@
+import gzip
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from core import exports
+from core.exports import export_file, export_reader, export_signature, write_csv
+
+
+@pytest.fixture
+def export_dir(tmp_path):
+    return str(tmp_path / 'exports')
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'csv.gz', 'parquet'])
+def test_dataframe_round_trip(data, export_dir, fmt):
+    df = data.iloc[:1234]
+    path = export_file(lambda: df, fmt, export_signature('v1', fmt), export_dir)
+    assert path.endswith(fmt)
+    if fmt == 'parquet':
+        back = pd.read_parquet(path)
+        assert list(back.columns) == list(df.columns)
+        # Colunas sem nenhum valor voltam com tipo nulo do Arrow
+        filled = [col for col in df.columns if df[col].notna().any()]
+        pd.testing.assert_frame_equal(back[filled], df[filled].reset_index(drop=True), check_dtype=False,
+                                      check_categorical=False)
+    else:
+        back = pd.read_csv(path)
+        assert len(back) == len(df)
+        assert list(back.columns) == list(df.columns)
+        assert list(back['team_pt']) == list(df['team_pt'])
+
+
+def test_csv_in_blocks_equals_one_block(data):
+    f = io.BytesIO()
+    write_csv(data.iloc[:1234], f, chunk_rows=500)
+    assert f.getvalue() == data.iloc[:1234].to_csv(index=False).encode()
+
+
+def test_source_csv_is_exported_as_is(csv_path, export_dir):
+    assert export_file(csv_path, 'csv', 'x', export_dir) == csv_path
+    assert not os.path.exists(export_dir)
+    with open(csv_path, 'rb') as f:
+        original = f.read()
+    path = export_file(csv_path, 'csv.gz', export_signature('fonte', 'csv.gz'), export_dir)
+    with gzip.open(path, 'rb') as f:
+        assert f.read() == original
+    parquet = pd.read_parquet(export_file(csv_path, 'parquet', 'fonte-parquet', export_dir))
+    assert len(parquet) == len(pd.read_csv(io.BytesIO(original)))
+
+
+def test_signature_reuses_the_file(data, export_dir):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return data.iloc[:10]
+
+    signature = export_signature('v1', {'team_pt': ['Time A']}, 'csv')
+    assert signature == export_signature('v1', {'team_pt': ['Time A']}, 'csv')
+    assert signature != export_signature('v2', {'team_pt': ['Time A']}, 'csv')
+    read = export_reader(build, 'csv', signature, export_dir)
+    assert calls == []
+    assert read() == read()
+    assert calls == [1]
+
+
+def test_old_exports_are_pruned(data, export_dir, monkeypatch):
+    monkeypatch.setattr(exports, 'MAX_EXPORTS', 3)
+    paths = []
+    for i in range(5):
+        paths.append(export_file(data.iloc[:5], 'csv', f'sig{i}', export_dir))
+        # Datas distintas mesmo em sistemas de arquivos com resolução grosseira
+        os.utime(paths[-1], (i, i))
+    export_file(data.iloc[:5], 'csv', 'sig5', export_dir)
+    assert sorted(os.listdir(export_dir)) == ['sig3.csv', 'sig4.csv', 'sig5.csv']
+    with pytest.raises(KeyError):
+        export_file(data.iloc[:5], 'xlsx', 'sig6', export_dir)
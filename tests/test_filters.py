@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.filters import FILTER_COLUMNS, FilterIndex, value_key
+
+SELECTIONS = [
+    {'team_pt': ['Time A']},
+    {'hit_type_pt': ['Ataque Forte', 'Largada'], 'num_blockers': [1, 2]},
+    {'team_pt': ['Time B'], 'serve_type_pt': ['Saque com Salto']},
+    {'num_blockers': [0.0]},
+    {'hit_type_pt': ['Não informado']},
+    {'team_pt': ['Inexistente']},
+]
+
+
+def expected_mask(df, selections):
+    mask = np.ones(len(df), dtype=bool)
+    for column, selected in selections.items():
+        keys = {value_key(v) for v in selected}
+        values = [value_key(v) for v in df[column].tolist()]
+        mask &= np.array([v in keys for v in values])
+    return mask
+
+
+@pytest.fixture(scope='module')
+def index(data):
+    return FilterIndex(data)
+
+
+@pytest.mark.parametrize('selections', SELECTIONS)
+def test_rows_match_boolean_masks(data, index, selections):
+    expected = expected_mask(data, selections)
+    assert np.array_equal(index.rows(selections), np.flatnonzero(expected))
+    assert index.count(selections) == expected.sum()
+    selection = index.select(data, selections)
+    assert len(selection) == expected.sum()
+    assert selection.frame().equals(data[expected])
+
+
+def test_empty_or_complete_selection_excludes_nothing(data, index):
+    assert index.mask({}) is None
+    assert index.mask({'team_pt': []}) is None
+    assert index.rows({'team_pt': index.options('team_pt') + [None]}) is None
+    assert index.filter(data, {'team_pt': []}) is data
+    assert index.count({}) == len(data)
+
+
+def test_options_within_selection(data, index):
+    within = {'team_pt': ['Time A'], 'num_blockers': [3]}
+    expected = set(data.loc[expected_mask(data, within), 'hit_type_pt'].dropna().unique())
+    assert set(index.options('hit_type_pt', within)) == expected
+    assert None not in index.options('num_blockers')
+
+
+def assert_same_index(index, rebuilt):
+    assert index.n_rows == rebuilt.n_rows
+    for col in FILTER_COLUMNS:
+        assert set(index.bitmaps[col]) == set(rebuilt.bitmaps[col])
+        for key, bits in rebuilt.bitmaps[col].items():
+            assert np.array_equal(index.bitmaps[col][key], bits), (col, key)
+
+
+@pytest.mark.parametrize('split', [11, 1000, 1003, 2417])
+def test_extended_matches_rebuild(data, split):
+    base = FilterIndex(data.iloc[:split])
+    assert_same_index(base.extended(data, split), FilterIndex(data))
+
+
+def test_extending_same_index_twice_keeps_each_result(data):
+    split = 1005
+    base = FilterIndex(data.iloc[:split])
+    before = {col: {k: v.copy() for k, v in bitmaps.items()} for col, bitmaps in base.bitmaps.items()}
+    selection = base.select(data.iloc[:split], {'team_pt': ['Time A']})
+    mask_before = selection.mask.copy()
+
+    # Outro trecho depois do mesmo início: as linhas restantes em ordem inversa
+    other = pd.concat([data.iloc[:split], data.iloc[split:].iloc[::-1]], ignore_index=True)
+    first = base.extended(other, split)
+    second = base.extended(data, split)
+
+    assert_same_index(second, FilterIndex(data))
+    assert_same_index(first, FilterIndex(other))
+    for col, bitmaps in before.items():
+        for key, bits in bitmaps.items():
+            assert np.array_equal(base.bitmaps[col][key], bits)
+    assert np.array_equal(selection.mask, mask_before)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.flows import FlowCube, STAGE_PAIRS, court_grid, matrix_frame, pair_label, sankey_links, stage_totals, zone_codes
+
+
+@pytest.fixture(scope='module')
+def cube(data):
+    return FlowCube(data)
+
+
+def expected_matrix(df, source, target, next_action, n_zones):
+    origin, destination = zone_codes(df[source]), zone_codes(df[target])
+    if next_action:
+        rally = df['rally'].to_numpy()
+        same = np.flatnonzero(rally[1:] == rally[:-1])
+        origin, destination = origin[same], destination[same + 1]
+    matrix = np.zeros((n_zones, n_zones), dtype=np.int64)
+    np.add.at(matrix, (origin, destination), 1)
+    return matrix
+
+
+def test_matrices_match_row_counts(data, cube):
+    rows = data[(data['team_pt'] == 'Time A').to_numpy()]
+    matrices = cube.matrices({'team_pt': ['Time A']})
+    for source, target, next_action in STAGE_PAIRS:
+        if next_action:
+            continue
+        expected = expected_matrix(rows, source, target, False, cube.n_zones)
+        assert np.array_equal(matrices[pair_label(source, target)], expected)
+
+
+def test_next_action_pair_follows_rally(data, cube):
+    source, target, next_action = STAGE_PAIRS[-1]
+    assert next_action
+    expected = expected_matrix(data, source, target, True, cube.n_zones)
+    assert np.array_equal(cube.matrices()[pair_label(source, target, True)], expected)
+
+
+def test_extended_matches_rebuild(data):
+    split = 1206
+    extended = FlowCube(data.iloc[:split]).extended(data, split)
+    rebuilt = FlowCube(data)
+    for selection in ({}, {'hit_type_pt': ['Ataque Forte']}):
+        for label, matrix in rebuilt.matrices(selection).items():
+            assert np.array_equal(extended.matrices(selection)[label], matrix), label
+
+
+def test_stage_totals_and_grid(data, cube):
+    matrices = cube.matrices()
+    totals = stage_totals(matrices, 'hitter_location')
+    expected = np.bincount(zone_codes(data['hitter_location']), minlength=cube.n_zones)
+    assert np.array_equal(totals, expected)
+    grid, outside = court_grid(totals)
+    assert grid.shape == (5, 5)
+    assert grid[2, 2] == totals[13]
+    assert grid.sum() + outside == totals[1:].sum()
+
+
+def test_matrix_frame_drops_missing_and_empty_zones(cube):
+    source, target, _ = STAGE_PAIRS[0]
+    frame = matrix_frame(cube.matrices()[pair_label(source, target)], source, target)
+    assert isinstance(frame, pd.DataFrame)
+    assert 0 not in frame.index and 0 not in frame.columns
+    assert (frame.sum(axis=1) > 0).all() and (frame.sum(axis=0) > 0).all()
+
+
+def test_sankey_links_are_largest_transitions(cube):
+    labels, sources, targets, values = sankey_links(cube.matrices(), top=3)
+    assert len(sources) == len(targets) == len(values) <= 9
+    assert all(v > 0 for v in values)
+    assert len(set(labels)) == len(labels)
@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.cube import CountCube
+from core.filters import FilterIndex
+from core.ingest import PROCESSED_DIR, ColumnStore, LiveDataset
+from core.rallies import RallyIndex
+from core.validation import QUARANTINE_ROW, validate
+
+# Linha 1000 do CSV começa um rali; a 1206 está no meio de um (1205-1206)
+START, MIDDLE = 1000, 1207
+
+
+@pytest.fixture
+def lines(csv_path):
+    with open(csv_path, newline='') as f:
+        return f.read().splitlines(keepends=True)
+
+
+@pytest.fixture
+def live(tmp_path, lines):
+    path = tmp_path / 'dataset.csv'
+    path.write_text(''.join(lines[:START + 1]))
+    return LiveDataset(str(path), drop_dir=str(tmp_path / 'ao_vivo'), cache_dir=str(tmp_path / 'cache'))
+
+
+def append(live, text):
+    with open(live.csv_path, 'a', newline='') as f:
+        f.write(text)
+
+
+def valid_before(raw, position):
+    _, quarantine, _ = validate(raw)
+    return position - int((quarantine[QUARANTINE_ROW] < position).sum())
+
+
+def test_tail_waits_for_whole_rallies_and_lines(live, lines, raw, data):
+    version = live.snapshot.version
+    assert len(live.snapshot.data) == valid_before(raw, START)
+
+    # Trecho terminando no meio de um rali, seguido de meia linha
+    half = lines[MIDDLE + 1][:20]
+    append(live, ''.join(lines[START + 1:MIDDLE + 1]) + half)
+    assert live.poll()
+    assert live.snapshot.version == version + 1
+    assert len(live.snapshot.data) == valid_before(raw, MIDDLE - 2)
+    assert len(live._carry) == 2
+
+    # O resto do arquivo (a última linha não termina em quebra de linha)
+    append(live, lines[MIDDLE + 1][20:] + ''.join(lines[MIDDLE + 2:]))
+    live.poll()
+    assert len(live.snapshot.data) < len(data)
+    # Nenhum byte novo: o último rali e a última linha entram
+    assert live.poll()
+    assert not live.poll()
+
+    snapshot = live.snapshot
+    pd.testing.assert_frame_equal(snapshot.data, data, check_dtype=False, check_categorical=False)
+    assert live.validation['rows'] == len(raw)
+    assert live.validation['quarantined'] == len(raw) - len(data)
+    assert snapshot.cube.count() == CountCube(data).count() == len(data)
+    selection = {'team_pt': ['Time A'], 'hit_type_pt': ['Largada']}
+    assert np.array_equal(snapshot.filters.rows(selection), FilterIndex(data).rows(selection))
+    pd.testing.assert_frame_equal(snapshot.rallies.summary, RallyIndex(data).summary, check_dtype=False)
+
+
+def test_drop_dir_files_are_ingested_and_kept(live, lines, tmp_path):
+    rows = len(live.snapshot.data)
+    os.makedirs(live.drop_dir)
+    path = os.path.join(live.drop_dir, 'scout.csv')
+    with open(path, 'w', newline='') as f:
+        f.write(lines[0] + ''.join(lines[START + 1:MIDDLE - 1]))
+    assert live.poll()
+    added = len(live.snapshot.data) - rows
+    assert 0 < added <= MIDDLE - 2 - START
+    assert not os.path.exists(path)
+    assert os.path.exists(os.path.join(live.drop_dir, PROCESSED_DIR, 'scout.csv'))
+
+    # Um novo processo recarrega o CSV e os arquivos já processados
+    again = LiveDataset(live.csv_path, drop_dir=live.drop_dir, cache_dir=live.cache_dir)
+    assert len(again.snapshot.data) == rows + added
+
+
+def test_rewritten_file_reloads(live, lines):
+    version = live.snapshot.version
+    with open(live.csv_path, 'w', newline='') as f:
+        f.write(''.join(lines[:501]))
+    assert live.poll()
+    assert live.snapshot.version == version + 1
+    assert len(live.snapshot.data) < 500
+    assert live.snapshot.filters.n_rows == len(live.snapshot.data)
+
+
+def test_column_store_appends_new_categories(data):
+    store = ColumnStore(data.iloc[:10])
+    chunk = data.iloc[10:20].copy()
+    chunk['team_pt'] = chunk['team_pt'].cat.add_categories(['Time C'])
+    chunk.loc[chunk.index[:3], 'team_pt'] = 'Time C'
+    chunk['round'] = chunk['round'].astype('Int64')
+    chunk.loc[chunk.index[5], 'round'] = pd.NA
+    store.append(chunk)
+    frame = store.frame()
+    assert len(frame) == store.n_rows == 20
+    assert list(frame['team_pt'].iloc[:10]) == list(data['team_pt'].iloc[:10])
+    assert list(frame['team_pt'].iloc[10:13]) == ['Time C'] * 3
+    assert frame['round'].isna().tolist() == [False] * 15 + [True] + [False] * 4
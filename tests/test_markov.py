@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.markov import MARKOV_DIMENSIONS, RallyMarkov
+
+
+@pytest.fixture(scope='module')
+def model(data):
+    return RallyMarkov(data)
+
+
+def test_counts_cover_every_action(data, model):
+    rally = data['rally'].to_numpy()
+    same = rally[1:] == rally[:-1]
+    assert model.transitions.sum() == same.sum()
+    ends = np.append(~same, True)
+    assert model.absorptions.sum() == (ends & data['winning_team'].notna().to_numpy()).sum()
+    assert model.visits.sum() == len(data)
+
+
+def test_absorption_probabilities_sum_to_one(model):
+    visited = model.visits > 0
+    assert np.allclose(model.absorption[visited].sum(axis=1), 1)
+    probabilities = model.win_probability[~np.isnan(model.win_probability)]
+    assert ((probabilities >= 0) & (probabilities <= 1)).all()
+
+
+def test_single_action_rally_state():
+    # Um rali de uma ação vencido pelo time da ação: probabilidade 1 nesse estado
+    df = pd.DataFrame({
+        'rally': [1, 2, 2],
+        'round': [1, 1, 2],
+        'team_pt': pd.Categorical(['Time A', 'Time A', 'Time B']),
+        'hit_type_pt': pd.Categorical(['Largada', 'Ataque Forte', 'Largada']),
+        'num_blockers': [0, 1, 2],
+        'winning_team': pd.Categorical(['a', 'b', 'b']),
+    })
+    model = RallyMarkov(df)
+    assert model.probability('Time A', 'Side-out', 'Largada', 0) == pytest.approx(1.0)
+    assert model.probability('Time A', 'Side-out', 'Ataque Forte', 1) == pytest.approx(0.0)
+    assert np.isnan(model.probability('Time B', 'Side-out', 'Largada', 0))
+
+
+def states(model):
+    return model.table().sort_values(MARKOV_DIMENSIONS).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('split', [1000, 1206, 2410])
+def test_extended_matches_rebuild(data, split):
+    base = RallyMarkov(data.iloc[:split])
+    extended = base.extended(data, split)
+    pd.testing.assert_frame_equal(states(extended), states(RallyMarkov(data)), check_exact=False, atol=1e-9)
+    # O modelo base continua com as suas contagens
+    assert base.visits.sum() == split
+
+
+def test_table_and_by_choice_filter_by_team(model):
+    table = model.table(['Time A'], min_visits=5)
+    assert set(table['team_pt']) == {'Time A'}
+    assert (table['visits'] >= 5).all()
+    choice = model.by_choice('hit_type_pt', ['Time A'], phase='Transição')
+    states = model.table(['Time A'])
+    states = states[states['phase'] == 'Transição']
+    for row in choice.itertuples():
+        group = states[states['hit_type_pt'] == row.hit_type_pt]
+        weighted = (group['visits'] * group['win_probability']).sum() / group['visits'].sum()
+        assert row.visits == group['visits'].sum()
+        assert row.win_probability == pytest.approx(weighted)
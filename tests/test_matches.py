@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.matches import MatchIndex, match_ids, match_label, match_metrics
+from core.metrics import compute_metrics
+
+
+def test_match_ids_start_when_rally_drops():
+    assert list(match_ids([1, 1, 2, 3, 1, 2, 2, 1])) == [0, 0, 0, 0, 1, 1, 1, 2]
+    assert list(match_ids([])) == []
+    assert match_label(0) == 'Partida 1'
+
+
+@pytest.fixture(scope='module')
+def index(data):
+    return MatchIndex(data, parallel=False)
+
+
+def test_bounds_cover_the_rows(data, index):
+    ids = match_ids(data['rally'].to_numpy())
+    assert len(index) == ids[-1] + 1
+    for match in range(len(index)):
+        start, stop = index.bounds(match)
+        assert (ids[start:stop] == match).all()
+    assert index.stops[-1] == len(data)
+    assert np.array_equal(index.match_of_rows(np.arange(len(data))), ids)
+
+
+def test_metrics_match_compute_metrics_per_match(data, index):
+    for match in range(len(index)):
+        start, stop = index.bounds(match)
+        expected = compute_metrics(data.iloc[start:stop], 'team_pt')
+        got = index.metrics[index.metrics['match'] == match].set_index('team_pt').drop(columns='match')
+        got.index.name = 'team_pt'
+        pd.testing.assert_frame_equal(got.loc[expected.index], expected, check_dtype=False)
+
+
+def test_chunked_metrics_match_single_chunk(data, index):
+    chunked = match_metrics(data, index.starts, index.stops, parallel=False, chunk_rows=100)
+    pd.testing.assert_frame_equal(chunked, index.metrics, check_dtype=False)
+    assert set(index.team_metrics(['Time A'])['team_pt']) == {'Time A'}
+
+
+@pytest.mark.parametrize('split', [300, 346, 1206])
+def test_extended_matches_rebuild(data, split):
+    extended = MatchIndex(data.iloc[:split], parallel=False).extended(data, split)
+    pd.testing.assert_frame_equal(extended.summary, MatchIndex(data, parallel=False).summary, check_dtype=False)
+    pd.testing.assert_frame_equal(extended.metrics, MatchIndex(data, parallel=False).metrics, check_dtype=False)
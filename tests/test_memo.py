@@ -0,0 +1,53 @@
+import pandas as pd
+
+from core.memo import MemoCache, freeze
+
+
+def test_freeze_ignores_order():
+    a = freeze({'team_pt': ['Time B', 'Time A'], 'num_blockers': [2, 1], 'win_reason': 'kill'})
+    b = freeze({'win_reason': 'kill', 'num_blockers': (1, 2), 'team_pt': {'Time A', 'Time B'}})
+    assert a == b
+    assert hash(a) == hash(b)
+    assert freeze(None) == freeze({}) == ()
+    assert freeze({'n': 3, 'x': None}) == (('n', 3), ('x', None))
+
+
+def test_hits_and_misses():
+    cache = MemoCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get('a', compute) == 1
+    assert cache.get('a', compute) == 1
+    assert cache.get('b', compute) == 2
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 2)
+    cache.clear()
+    assert len(cache) == 0 and cache.total_bytes == 0
+    assert cache.get('a', compute) == 3
+
+
+def test_evicts_least_recently_used():
+    frame = pd.DataFrame({'x': range(1000)})
+    size = int(frame.memory_usage(deep=True).sum())
+    cache = MemoCache(max_bytes=2 * size)
+    cache.get('a', lambda: frame)
+    cache.get('b', lambda: frame.copy())
+    cache.get('a', lambda: None)
+    cache.get('c', lambda: frame.copy())
+    assert len(cache) == 2
+    assert cache.total_bytes == 2 * size
+    # 'b' saiu (o menos usado); 'a' continua sem recalcular
+    assert cache.get('a', lambda: 'novo') is frame
+    assert cache.get('b', lambda: 'novo') == 'novo'
+
+
+def test_value_larger_than_limit_stays_alone():
+    cache = MemoCache(max_bytes=10)
+    cache.get('a', lambda: 1)
+    big = pd.DataFrame({'x': range(100)})
+    assert cache.get('b', lambda: big) is big
+    assert len(cache) == 1
+    assert cache.get('b', lambda: None) is big
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from core.cube import CountCube
+from core.metrics import CUBE_AXES, OUTCOMES, compute_metrics, cube_metrics, outcome_flags
+
+
+def test_compute_metrics_matches_groupby(data):
+    result = compute_metrics(data, 'team_pt')
+    for team, rows in data.groupby('team_pt', observed=True):
+        for name, (column, value) in OUTCOMES.items():
+            assert result.loc[team, name] == (rows[column] == value).sum()
+        assert result.loc[team, 'defensive_actions'] == rows['num_blockers'].notna().sum()
+        assert result.loc[team, 'total'] == len(rows)
+        kills, errors = (rows['win_reason'] == 'kill').sum(), (rows['lose_reason'] == 'hit_error').sum()
+        assert np.isclose(result.loc[team, 'efficiency'], (kills - errors) / len(rows) * 100)
+
+
+def test_groups_without_rows_are_dropped(data):
+    rows = data[(data['team_pt'] == 'Time A').to_numpy()]
+    assert list(compute_metrics(rows, 'team_pt').index) == ['Time A']
+
+
+def test_cube_metrics_match_compute_metrics(data):
+    cube = CountCube(data)
+    selection = {'hit_type_pt': ['Ataque Forte', 'Largada']}
+    rows = data[data['hit_type_pt'].isin(selection['hit_type_pt']).to_numpy()]
+    counts = cube.reduce(['team_pt'] + CUBE_AXES, selection)
+    expected = compute_metrics(rows, 'team_pt')
+    got = cube_metrics(counts, cube.labels, 'team_pt')
+    pd.testing.assert_frame_equal(got.loc[expected.index], expected, check_dtype=False)
+
+
+def test_outcome_flags(data):
+    assert outcome_flags(data, 'total').sum() == len(data)
+    assert outcome_flags(data, 'aces').sum() == (data['win_reason'] == 'ace').sum()
+    assert outcome_flags(data, 'defensive_actions').sum() == data['num_blockers'].notna().sum()
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.moments import MomentCube
+
+
+@pytest.fixture(scope='module')
+def cube(data):
+    return MomentCube(data)
+
+
+def numeric(df, columns):
+    return pd.DataFrame({col: df[col].to_numpy(dtype='float64', na_value=np.nan) for col in columns})
+
+
+@pytest.mark.parametrize('selections', [
+    (),
+    ({'team_pt': ['Time A']},),
+    ({'hit_type_pt': ['Ataque Forte'], 'num_blockers': [1, 2]},),
+])
+def test_corr_and_mean_match_pandas(data, cube, selections):
+    mask = np.ones(len(data), dtype=bool)
+    for selection in selections:
+        for column, selected in selection.items():
+            mask &= data[column].isin(selected).to_numpy()
+    rows = numeric(data[mask], cube.columns)
+    assert cube.count(*selections) == mask.sum()
+    expected = rows.corr()
+    pd.testing.assert_frame_equal(cube.corr(*selections), expected, check_exact=False, atol=1e-9)
+    for col in cube.columns:
+        assert cube.mean(col, *selections) == pytest.approx(rows[col].mean(), nan_ok=True)
+
+
+def test_extended_matches_rebuild(data):
+    split = 1206
+    extended = MomentCube(data.iloc[:split]).extended(data, split)
+    rebuilt = MomentCube(data)
+    selection = {'team_pt': ['Time B']}
+    assert extended.count(selection) == rebuilt.count(selection)
+    pd.testing.assert_frame_equal(extended.corr(selection), rebuilt.corr(selection), check_exact=False, atol=1e-9)
+    assert extended.mean('round') == pytest.approx(rebuilt.mean('round'))
+
+
+def test_empty_selection_gives_nan(cube):
+    selection = {'team_pt': ['Inexistente']}
+    assert cube.count(selection) == 0
+    assert np.isnan(cube.mean('round', selection))
+    assert cube.corr(selection).isna().all().all()
@@ -0,0 +1,70 @@
+import os
+
+import pandas as pd
+import pytest
+
+from core.partitions import (
+    import_csv, load_partitions, manifest_version, partition_options, read_manifest, select_partitions,
+    write_partition,
+)
+from core.validation import validate
+
+
+@pytest.fixture
+def root(tmp_path, csv_path, raw):
+    # Três partições: o CSV inteiro e duas metades escritas diretamente
+    root = str(tmp_path / 'dados')
+    import_csv(csv_path, '2023-2024', 'Liga Universitária Feminina', root)
+    valid, _, _ = validate(raw)
+    write_partition(valid.iloc[:1000], '2024-2025', 'Liga Universitária Feminina', root)
+    write_partition(valid.iloc[1000:].reset_index(drop=True), '2024-2025', 'Copa Regional', root)
+    return root
+
+
+def test_manifest_lists_partitions_with_validation(root, raw):
+    manifest = read_manifest(root)
+    entries = manifest['partitions']
+    assert [(p['season'], p['competition']) for p in entries] == [
+        ('2023-2024', 'Liga Universitária Feminina'),
+        ('2024-2025', 'Copa Regional'),
+        ('2024-2025', 'Liga Universitária Feminina'),
+    ]
+    assert entries[0]['path'] == os.path.join('season=2023-2024', 'competition=liga-universitaria-feminina')
+    assert entries[0]['validation']['rows'] == len(raw)
+    assert entries[0]['rows'] == len(raw) - entries[0]['validation']['quarantined']
+    assert entries[0]['teams'] == ['a', 'b']
+    assert 'validation' not in entries[1]
+
+
+def test_reimport_replaces_the_partition(root, csv_path):
+    version = manifest_version(root)
+    entry = import_csv(csv_path, '2023-2024', 'Liga Universitária Feminina', root)
+    assert len(read_manifest(root)['partitions']) == 3
+    assert manifest_version(root) != version
+    assert load_partitions([entry['path']], root).shape[0] == entry['rows']
+
+
+def test_selection_and_options(root):
+    manifest = read_manifest(root)
+    assert len(select_partitions(manifest)) == 3
+    assert len(select_partitions(manifest, seasons=['2024-2025'])) == 2
+    assert len(select_partitions(manifest, seasons=['2024-2025'], competitions=['Copa Regional'])) == 1
+    assert partition_options(manifest, 'season') == ['2023-2024', '2024-2025']
+    assert partition_options(manifest, 'competition', within={'seasons': ['2023-2024']}) == [
+        'Liga Universitária Feminina',
+    ]
+
+
+def test_load_concatenates_the_selected_partitions(root, raw):
+    valid, _, _ = validate(raw)
+    manifest = read_manifest(root)
+    paths = [p['path'] for p in select_partitions(manifest, seasons=['2024-2025'])]
+    # Manifesto em ordem alfabética: a Copa (segunda metade) vem primeiro
+    df = load_partitions(paths, root)
+    expected = pd.concat([valid.iloc[1000:], valid.iloc[:1000]], ignore_index=True)
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False, check_categorical=False)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            assert list(df[col].cat.categories) == sorted(df[col].cat.categories)
+    assert load_partitions([], root).empty
+    assert manifest_version(str(os.path.join(root, 'outro'))) is None
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.filters import FilterIndex
+from core.rallies import RALLY_FIELDS, RallyIndex
+
+
+@pytest.fixture(scope='module')
+def index(data):
+    return RallyIndex(data)
+
+
+def run_ids(df):
+    # Rali de cada linha: muda quando o número do rali muda
+    rally = df['rally'].to_numpy()
+    return np.cumsum(np.append(True, rally[1:] != rally[:-1])) - 1
+
+
+def test_runs_are_contiguous_row_ranges(data, index):
+    runs = run_ids(data)
+    assert len(index) == runs[-1] + 1
+    assert np.array_equal(index.run_of_row, runs)
+    assert np.array_equal(index.starts, np.flatnonzero(np.diff(runs, prepend=-1)))
+    assert np.array_equal(index.stops[:-1], index.starts[1:])
+    assert index.stops[-1] == len(data)
+    assert np.array_equal(index.numbers, data['rally'].to_numpy()[index.starts])
+    last = index.stops - 1
+    assert list(index.summary['winning_team']) == list(data['winning_team'].take(last))
+
+
+def test_per_run_matches_groupby(data, index):
+    runs = run_ids(data)
+    for teams in (None, ['Time A']):
+        rows = data if teams is None else data[data['team_pt'].isin(teams)]
+        table = index.per_run(['round', 'kills'], teams=teams)
+        expected = pd.DataFrame({
+            'round': rows['round'].astype('float64'),
+            'kills': (rows['win_reason'] == 'kill').astype('float64'),
+            'run': runs[rows.index],
+        }).groupby('run')
+        sums = expected.sum().reindex(range(len(index)), fill_value=0)
+        counts = expected.count().reindex(range(len(index)), fill_value=0)
+        assert np.allclose(table['round_sum'], sums['round'])
+        assert np.array_equal(table['round_n'], counts['round'])
+        assert np.allclose(table['kills_sum'], sums['kills'])
+
+
+def test_per_run_with_rows_matches_team_sums(data, index):
+    rows = FilterIndex(data).rows({'team_pt': ['Time B']})
+    by_rows = index.per_run(['round', 'num_blockers'], rows=rows)
+    by_team = index.per_run(['round', 'num_blockers'], teams=['Time B'])
+    pd.testing.assert_frame_equal(by_rows, by_team, check_dtype=False)
+
+
+def test_rows_of_runs(data, index):
+    runs = index.runs(low=3, high=4)
+    assert set(index.numbers[runs]) == {3, 4}
+    rows = index.rows(runs)
+    assert set(data['rally'].iloc[rows]) == {3, 4}
+    selection = np.flatnonzero((data['team_pt'] == 'Time A').to_numpy())
+    limited = index.rows(runs, selection, limit=5)
+    assert len(limited) == 5
+    assert set(limited) <= set(selection)
+
+
+def test_per_rally_with_page_filter(data, index):
+    filters = FilterIndex(data)
+    selections = {'team_pt': ['Time A'], 'num_blockers': [2]}
+    result = index.per_rally(['kills'], selections, filters)
+    rows = data.iloc[filters.rows(selections)]
+    expected = rows.groupby(run_ids(data)[rows.index]).size()
+    assert np.array_equal(result['actions'], expected.to_numpy())
+    assert np.array_equal(result['sequence'] - 1, expected.index.to_numpy())
+
+
+def assert_same_index(index, rebuilt):
+    assert np.array_equal(index.starts, rebuilt.starts)
+    assert np.array_equal(index.stops, rebuilt.stops)
+    assert np.array_equal(index.matches, rebuilt.matches)
+    assert np.array_equal(index.run_of_row, rebuilt.run_of_row)
+    for name in RALLY_FIELDS:
+        assert np.array_equal(index.values[name], rebuilt.values[name], equal_nan=True)
+    pd.testing.assert_frame_equal(index.per_run(list(RALLY_FIELDS)), rebuilt.per_run(list(RALLY_FIELDS)))
+    pd.testing.assert_frame_equal(index.summary.astype(str), rebuilt.summary.astype(str))
+
+
+@pytest.mark.parametrize('split', [1, 1000, 1206, 2410])
+def test_extended_matches_rebuild(data, split):
+    # 1206 e 2410 caem no meio de um rali: o último rali do índice base é refeito
+    base = RallyIndex(data.iloc[:split])
+    assert_same_index(base.extended(data, split), RallyIndex(data))
+
+
+def test_extending_same_index_twice(data):
+    split = 1206
+    base = RallyIndex(data.iloc[:split])
+    run_of_row = base.run_of_row.copy()
+    first = base.extended(data.iloc[:split + 30], split)
+    second = base.extended(data, split)
+    assert_same_index(first, RallyIndex(data.iloc[:split + 30]))
+    assert_same_index(second, RallyIndex(data))
+    assert np.array_equal(base.run_of_row, run_of_row)
+    assert base.n_rows == split
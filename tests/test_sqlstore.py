@@ -0,0 +1,88 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from core.cube import CountCube, IncrementalSum
+from core.metrics import CUBE_AXES
+from core.sqlstore import SqlCube, _read_meta, build_database, sql_database, write_database
+
+SELECTIONS = [
+    (),
+    ({'team_pt': ['Time A']}, {'win_reason': 'kill'}),
+    ({'hit_type_pt': ['Ataque Forte', 'Largada'], 'num_blockers': [1, 2]},),
+    ({'num_blockers': [None]},),
+    ({'serve_type_pt': ['Não informado']},),
+    ({'team_pt': ['Inexistente']},),
+]
+
+
+@pytest.fixture(scope='module')
+def cubes(tmp_path_factory, data):
+    # Banco gravado a partir do mesmo DataFrame do cubo em memória, em blocos
+    path = str(tmp_path_factory.mktemp('sql') / 'acoes.sqlite')
+    chunks = (data.iloc[start:start + 500] for start in range(0, len(data), 500))
+    return SqlCube(write_database(chunks, path)), CountCube(data)
+
+
+@pytest.mark.parametrize('selections', SELECTIONS)
+def test_queries_match_count_cube(cubes, selections):
+    sql, memory = cubes
+    assert sql.count(*selections) == memory.count(*selections)
+    for dims in (['team_pt'], ['hit_type_pt', 'num_blockers']):
+        assert sql.table(dims, *selections).equals(memory.table(dims, *selections))
+    dims = ['team_pt'] + CUBE_AXES
+    assert np.array_equal(sql.reduce(dims, *selections), memory.reduce(dims, *selections))
+
+
+def test_labels_follow_the_memory_cube(cubes):
+    sql, memory = cubes
+    assert sql.shape == memory.shape
+    for dim in memory.dimensions:
+        assert sql.labels[dim] == memory.labels[dim], dim
+
+
+def test_incremental_sum_over_sql(cubes):
+    sql, memory = cubes
+    dims = ['team_pt'] + CUBE_AXES
+    aggregate = IncrementalSum(sql, dims)
+    hit_types = [v for v in sql.labels['hit_type_pt'] if v is not None]
+    for k in (4, 5, 3):
+        selection = {'hit_type_pt': hit_types[:k]}
+        assert np.array_equal(aggregate.update(selection), memory.reduce(dims, selection))
+    assert aggregate.deltas == 2
+
+
+def test_count_rows_pushes_condition_to_the_table(cubes, data):
+    sql, _ = cubes
+    assert sql.count_rows('"round" > 2') == (data['round'] > 2).sum()
+    team_a = (data['team_pt'] == 'Time A').to_numpy()
+    assert sql.count_rows('"round" > 2', {'team_pt': ['Time A']}) == ((data['round'] > 2).to_numpy() & team_a).sum()
+    assert sql.count_rows('"round" > 2', {'team_pt': ['Inexistente']}) == 0
+
+
+def test_build_from_csv_validates_whole_rallies(tmp_path, csv_path, data):
+    copy = tmp_path / 'dataset.csv'
+    shutil.copyfile(csv_path, copy)
+    db_path = build_database(str(copy), str(tmp_path), chunksize=37)
+    meta = _read_meta(db_path)
+    assert int(meta['rows']) == len(data)
+    assert int(meta['quarantined']) == 5
+    assert SqlCube(db_path).count() == len(data)
+
+
+def test_database_is_reused_until_the_csv_changes(tmp_path, csv_path):
+    copy = str(tmp_path / 'dataset.csv')
+    shutil.copyfile(csv_path, copy)
+    cache = str(tmp_path / 'cache')
+    db_path = sql_database(copy, cache)
+    built = os.stat(db_path).st_mtime_ns
+    assert sql_database(copy, cache) == db_path
+    assert os.stat(db_path).st_mtime_ns == built
+    with open(copy) as f:
+        lines = f.readlines()
+    with open(copy, 'w') as f:
+        f.writelines(lines[:1001])
+    sql_database(copy, cache)
+    assert int(_read_meta(db_path)['rows']) < 1000
@@ -0,0 +1,71 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.storage import (
+    apply_schema, cached_dir, dataset_version, load_columnar, load_quarantine, read_csv_chunks, validation_report,
+)
+from core.validation import validate
+
+
+@pytest.fixture
+def csv_copy(tmp_path, csv_path):
+    path = tmp_path / 'dataset.csv'
+    shutil.copyfile(csv_path, path)
+    return str(path)
+
+
+def test_columnar_cache_holds_the_valid_rows(csv_copy, tmp_path, raw):
+    cache = str(tmp_path / 'cache')
+    df = load_columnar(csv_copy, cache)
+    valid, quarantine, report = validate(raw)
+    pd.testing.assert_frame_equal(df, valid, check_dtype=False, check_categorical=False)
+    assert df['rally'].dtype == np.uint16
+    assert validation_report(csv_copy, cache) == report
+    assert list(load_quarantine(csv_copy, cache)['linha']) == list(quarantine['linha'])
+
+
+def test_cache_is_reused_and_rebuilt_when_content_changes(csv_copy, tmp_path):
+    cache = str(tmp_path / 'cache')
+    first = cached_dir(csv_copy, cache)
+    assert cached_dir(csv_copy, cache) == first
+
+    # Mesmo conteúdo com outra data: confere o hash e mantém o diretório
+    stat = os.stat(csv_copy)
+    os.utime(csv_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert cached_dir(csv_copy, cache) == first
+
+    with open(csv_copy) as f:
+        lines = f.readlines()
+    with open(csv_copy, 'w') as f:
+        f.writelines(lines[:-100])
+    rebuilt = cached_dir(csv_copy, cache)
+    assert rebuilt != first
+    assert not os.path.exists(first)
+    assert len(load_columnar(csv_copy, cache)) < len(lines) - 100
+
+
+def test_dataset_version_changes_with_the_file(csv_copy):
+    version = dataset_version(csv_copy)
+    with open(csv_copy, 'a') as f:
+        f.write('\n')
+    assert dataset_version(csv_copy) != version
+
+
+def test_schema_widens_integers_and_masks_missing():
+    raw = pd.DataFrame({'rally': [1.0, 70000.0], 'round': [1.0, np.nan], 'team': ['a', 'b']})
+    df = apply_schema(raw)
+    assert df['rally'].dtype == np.uint32
+    assert df['round'].isna().tolist() == [False, True]
+    assert isinstance(df['team'].dtype, pd.CategoricalDtype)
+    with pytest.raises(ValueError):
+        apply_schema(pd.DataFrame({'round': [-1.0]}))
+
+
+def test_chunks_concatenate_to_the_whole_file(csv_path, raw):
+    chunks = list(read_csv_chunks(csv_path, 1000))
+    assert [len(c) for c in chunks] == [1000, 1000, len(raw) - 2000]
+    assert list(pd.concat(chunks, ignore_index=True)['rally']) == list(raw['rally'])
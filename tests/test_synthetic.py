@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from core.storage import read_csv_typed
+from core.synthetic import RallyModel, write_csv
+from core.validation import validate
+
+
+@pytest.fixture(scope='module')
+def model(csv_path):
+    return RallyModel.from_csv(csv_path)
+
+
+def test_exact_rows_with_the_source_columns(model, csv_path):
+    chunks = list(model.generate(2500, seed=1, chunk_rows=1000))
+    assert [len(c) for c in chunks] == [1000, 1000, 500]
+    header = pd.read_csv(csv_path, nrows=0).columns
+    assert all(list(c.columns) == list(header) for c in chunks)
+
+
+def test_same_seed_same_rows(model):
+    first = pd.concat(model.generate(1500, seed=4, chunk_rows=700), ignore_index=True)
+    again = pd.concat(model.generate(1500, seed=4, chunk_rows=700), ignore_index=True)
+    other = pd.concat(model.generate(1500, seed=5, chunk_rows=700), ignore_index=True)
+    pd.testing.assert_frame_equal(first, again)
+    assert not first.equals(other)
+
+
+def test_generated_rallies_are_mostly_valid(model, tmp_path, csv_path):
+    path = tmp_path / 'sintetico.csv'
+    write_csv(str(path), 5000, seed=2, source=csv_path, chunk_rows=2000)
+    df = pd.read_csv(path)
+    assert len(df) == 5000
+    rounds = df['round'].to_numpy()
+    # Cada rali começa na ação 1 e conta de um em um
+    assert ((rounds[1:] == rounds[:-1] + 1) | (rounds[1:] == 1)).all()
+    assert (df.groupby((df['round'] == 1).cumsum())['winning_team'].nunique() == 1).all()
+    _, quarantine, _ = validate(read_csv_typed(str(path)))
+    assert len(quarantine) < 0.05 * len(df)
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from core.translation import (
+    MISSING_LABEL, TRANSLATED_COLUMNS, TRANSLATIONS, add_translations, translate_column, translate_value,
+    translated_dtype,
+)
+
+
+def test_translate_value():
+    assert translate_value('tip') == 'Largada'
+    assert translate_value('tape') == 'tape'
+    assert translate_value(None) == MISSING_LABEL
+
+
+def test_columns_match_row_by_row_translation(raw):
+    df = add_translations(raw)
+    for col, pt in TRANSLATED_COLUMNS.items():
+        expected = [translate_value(v) for v in raw[col]]
+        assert list(df[pt]) == expected, col
+    # Um único dtype para todas as colunas traduzidas
+    assert len({df[pt].dtype for pt in TRANSLATED_COLUMNS.values()}) == 1
+    assert list(df.columns) == list(raw.columns) + list(TRANSLATED_COLUMNS.values())
+
+
+def test_dtype_keeps_untranslated_values():
+    dtype = translated_dtype(['tape', 'a'])
+    labels = list(dtype.categories)
+    assert labels[-1] == MISSING_LABEL
+    assert 'tape' in labels and labels.count('Time A') == 1
+    assert set(TRANSLATIONS.values()) <= set(labels)
+
+
+def test_category_without_label_raises():
+    values = pd.Series(['a', 'novo'], dtype='category')
+    with pytest.raises(KeyError):
+        translate_column(values, translated_dtype(['a']))
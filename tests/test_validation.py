@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.storage import read_csv_chunks
+from core.validation import (
+    QUARANTINE_REASON, QUARANTINE_ROW, concat_chunks, detect_mapping, merge_reports, split_last_rally,
+    validate, whole_rallies,
+)
+
+
+def rally(number, length=2, winner='a', reason='kill'):
+    # Rali válido: saque na primeira ação, resultado espelhado só na última
+    rows = []
+    for round_ in range(1, length + 1):
+        row = {'rally': number, 'round': round_, 'team': 'ab'[(round_ + 1) % 2], 'winning_team': winner,
+               'hit_type': 'hit', 'num_blockers': 1, 'block_touch': 'no'}
+        if round_ == 1:
+            row['serve_type'] = 'jump'
+        if round_ == length:
+            row['win_reason'] = row['lose_reason'] = reason
+        rows.append(row)
+    return rows
+
+
+def test_valid_rallies_pass(actions):
+    df = actions(rally(1) + rally(2, 3, 'b', 'hit_error') + rally(3, 1))
+    valid, quarantine, report = validate(df, mapping={})
+    assert len(valid) == len(df) and len(quarantine) == 0
+    assert report == {'mapping': {}, 'rows': len(df), 'quarantined': 0, 'rules': {}}
+
+
+@pytest.mark.parametrize('change, row, rule', [
+    ({'team': None}, 0, 'obrigatorio:team'),
+    ({'hit_type': 'smash'}, 1, 'dominio:hit_type'),
+    ({'receive_location': 30}, 0, 'intervalo:receive_location'),
+    ({'num_blockers': 4}, 1, 'intervalo:num_blockers'),
+    ({'lose_reason': 'net'}, 1, 'resultado_espelhado'),
+    ({'win_reason': 'kill', 'lose_reason': 'kill'}, 0, 'resultado_antes_do_fim'),
+    ({'serve_type': 'float'}, 1, 'saque_fora_do_inicio'),
+    ({'winning_team': 'b'}, 1, 'vencedor_muda_no_rali'),
+    ({'block_touch': 'yes', 'num_blockers': 0}, 0, 'toque_sem_bloqueio'),
+])
+def test_each_rule_quarantines_the_bad_row(actions, change, row, rule):
+    rows = rally(1) + rally(2)
+    rows[2 + row].update(change)
+    valid, quarantine, report = validate(actions(rows), mapping={})
+    assert list(quarantine[QUARANTINE_ROW]) == [2 + row]
+    assert rule in quarantine[QUARANTINE_REASON].iloc[0].split(', ')
+    assert report['rules'][rule] == 1
+    assert len(valid) == 3
+    assert list(valid['rally']) == [1, 1, 2]
+
+
+def test_reason_lists_every_rule(actions):
+    rows = rally(1)
+    rows[1].update({'hit_type': 'smash', 'num_blockers': 9})
+    _, quarantine, _ = validate(actions(rows), mapping={})
+    assert quarantine[QUARANTINE_REASON].iloc[0] == 'dominio:hit_type, intervalo:num_blockers'
+
+
+def test_mapping_detects_shifted_columns(raw):
+    mapping = detect_mapping(raw)
+    assert mapping == {'set_type': 'set_location', 'set_location': None}
+    valid, quarantine, report = validate(raw)
+    assert report['mapping'] == mapping
+    assert set(valid['set_type'].dropna().unique()) <= {'outside', 'oppo', 'quick', 'bic', 'd-ball', 'dump'}
+    assert valid['set_location'].isna().all()
+    assert len(valid) + len(quarantine) == len(raw) == report['rows']
+
+
+def test_split_last_rally(actions):
+    df = actions(rally(1) + rally(2, 3))
+    complete, last = split_last_rally(df)
+    assert list(complete['rally']) == [1, 1]
+    assert list(last['rally']) == [2, 2, 2]
+    complete, last = split_last_rally(actions(rally(5)))
+    assert len(complete) == 0 and len(last) == 2
+
+
+@pytest.mark.parametrize('chunksize', [37, 500])
+def test_whole_rallies_validate_like_the_full_file(raw, csv_path, chunksize):
+    chunks = list(whole_rallies(read_csv_chunks(csv_path, chunksize)))
+    assert sum(len(c) for c in chunks) == len(raw)
+    for chunk in chunks[:-1]:
+        rally_column = chunk['rally'].to_numpy(dtype='float64', na_value=np.nan)
+        assert not np.isnan(rally_column).any()
+    mapping, reports, valid = None, [], []
+    for chunk in chunks:
+        rows, _, report = validate(chunk, mapping)
+        mapping = report['mapping']
+        reports.append(report)
+        valid.append(rows)
+    full, _, full_report = validate(raw)
+    assert merge_reports(reports) == full_report
+    joined = pd.concat(valid, ignore_index=True)
+    assert list(joined['rally']) == list(full['rally'])
+
+
+def test_concat_chunks_keeps_categories(actions):
+    head = actions(rally(1))
+    tail = actions(rally(2, 2, 'b', 'ace'))
+    joined = concat_chunks(head, tail)
+    assert isinstance(joined['winning_team'].dtype, pd.CategoricalDtype)
+    assert list(joined['win_reason'].cat.categories) == ['ace', 'kill']
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.viewer import SortIndex, page_window, search_rows
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'round': pd.array([3, None, 1, 2, None, 1], dtype='Int64'),
+        'team': pd.Categorical(['b', 'a', None, 'b', 'a', 'c'], categories=['c', 'b', 'a']),
+        'zone': [2.5, 1.0, np.nan, 4.0, 1.0, 0.5],
+    })
+
+
+def test_order_puts_missing_last(frame):
+    index = SortIndex(frame)
+    assert list(index.order('round')) == [2, 5, 3, 0, 1, 4]
+    # Decrescente inverte só os não nulos (empates também saem invertidos)
+    assert list(index.order('round', ascending=False)) == [0, 3, 5, 2, 1, 4]
+    # Categorias ordenadas pelo rótulo, não pela ordem do dtype
+    assert list(index.order('team')) == [1, 4, 0, 3, 5, 2]
+    assert list(index.order('zone', ascending=False)) == [3, 0, 4, 1, 5, 2]
+
+
+def test_order_matches_pandas_on_the_dataset(data):
+    index = SortIndex(data)
+    for column in ('round', 'hit_type_pt', 'receive_location'):
+        values = data[column].astype(object) if isinstance(data[column].dtype, pd.CategoricalDtype) else data[column]
+        expected = values.sort_values(kind='stable', na_position='last').index
+        assert np.array_equal(index.order(column), expected), column
+
+
+def test_order_restricted_to_rows(frame):
+    index = SortIndex(frame)
+    assert list(index.order('round', rows=np.array([0, 1, 5]))) == [5, 0, 1]
+
+
+def test_search(frame):
+    assert list(search_rows(frame, 'team', 'A')) == [1, 4]
+    assert list(search_rows(frame, 'round', '1')) == [2, 5]
+    assert list(search_rows(frame, 'round', '1', rows=np.array([0, 5]))) == [5]
+    assert len(search_rows(frame, 'round', 'x')) == 0
+
+
+def test_page_window(frame):
+    order = np.array([5, 4, 3, 2, 1, 0])
+    assert list(page_window(frame, order, 1, 4).index) == [5, 4, 3, 2]
+    assert list(page_window(frame, order, 2, 4).index) == [1, 0]
+    assert page_window(frame, order, 3, 4).empty